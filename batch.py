@@ -0,0 +1,44 @@
+"""
+Helpers shared by the mass_batch / factor_of_safety_batch methods of the component classes.
+"""
+import numpy as np
+
+def columns(x, symbols):
+	"""
+	Split a batch of inputs into one float array per symbol, in the order of symbols.
+
+	x            : dict of arrays keyed by symbol, structured array with one field per symbol,
+	               or array whose last axis holds the symbols in order (one row per design)
+	"""
+	if not symbols:
+		return []
+	if x is None:
+		raise ValueError('missing batch inputs for %s' % list(symbols))
+	if isinstance(x, dict):
+		return [np.asarray(x[s], dtype=float) for s in symbols]
+	x = np.asarray(x)
+	if x.dtype.names is not None:
+		return [np.asarray(x[s], dtype=float) for s in symbols]
+	x = np.asarray(x, dtype=float)
+	if x.shape[-1:] != (len(symbols),):
+		raise ValueError('expected last axis of length %d for %s, got shape %s' % (len(symbols), list(symbols), x.shape))
+	return [x[..., i] for i in range(len(symbols))]
+
+def round2(a):
+	"""
+	Element-wise equivalent of round(a, 2) on Python floats.
+
+	np.round(a, 2) rounds a*100, which has already been rounded once, so it can land on the
+	other side of a half-way point than round() does on the exact decimal value. Those rows
+	are few and are redone with round() itself.
+	"""
+	a = np.asarray(a, dtype=float)
+	s = a*100
+	k = np.rint(s)
+	out = k/100
+	near = np.abs(np.abs(s-np.trunc(s))-0.5) <= 1e-9*np.maximum(1.0, np.abs(s))
+	if near.any():
+		out = np.array(out, copy=True)
+		for i in np.flatnonzero(near):
+			out.flat[i] = round(float(a.flat[i]), 2)
+	return out
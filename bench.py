@@ -0,0 +1,151 @@
+"""
+Benchmarks: per-call latency of every component and system/sweep throughput.
+
+	python bench.py run [-o baseline.json] [--sweep-designs N]
+	python bench.py compare baseline.json current.json [--threshold 0.1]
+
+run measures, for both requirement sets,
+	- latency of mass and factor_of_safety of each component class, and of their positional
+	  mass_si/factor_of_safety_si fast paths (best of several repeats)
+	- engine.evaluate and engine.evaluate_batch throughput (system assembly)
+	- catalog sweep throughput over the first N designs of the full-factorial space
+and writes them to JSON. compare reports every metric of the second file against the first and
+exits with status 1 if any got worse by more than the threshold (relative) or is missing from the
+second file.
+"""
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+from global_reqs import _initial_global_pars
+from engine import engine
+from sweep import sweep, catalog_space
+import numpy as np
+
+_reqs = ['engine', 'lawn_mower']
+
+def _latency(fn, number=20000, repeat=5):
+	# best-of-repeat time per call in microseconds
+	return min(timeit.repeat(fn, number=number, repeat=repeat))/number*1e6
+
+def bench_components(results, number=20000):
+	for req in _reqs:
+		eng = engine(req)
+		for part in eng.parts:
+			x = dict(zip(part.input_symbols, part.input_catalog[req][12]))
+			outside_x = {s: _initial_global_pars[req][s] for s in part.outside_input_symbols}
+			args = [v/s if s != 1 else v for v, s in zip(list(x.values())+list(outside_x.values()), part._arg_scales)]
+			for method in ['mass', 'factor_of_safety']:
+				fn = getattr(part, method)
+				results['%s.%s.%s' % (req, part.team_label, method)] = {
+					'value': _latency(lambda: fn(x, outside_x), number),
+					'unit': 'us/call',
+					'better': 'lower',
+				}
+				fn_si = getattr(part, method+'_si')
+				results['%s.%s.%s_si' % (req, part.team_label, method)] = {
+					'value': _latency(lambda: fn_si(*args), number),
+					'unit': 'us/call',
+					'better': 'lower',
+				}
+
+def bench_system(results, number=2000, batch=100000):
+	for req in _reqs:
+		space = catalog_space(req)
+		eng = space.engine
+		design = space.designs(space.size//2, space.size//2+1)[0].tolist()
+		results['%s.engine.evaluate' % req] = {
+			'value': 1/(_latency(lambda: eng.evaluate(design), number)*1e-6),
+			'unit': 'designs/s',
+			'better': 'higher',
+		}
+		designs = space.designs(0, batch)
+		t = min(timeit.repeat(lambda: eng.evaluate_batch(designs), number=1, repeat=3))
+		results['%s.engine.evaluate_batch' % req] = {
+			'value': batch/t,
+			'unit': 'designs/s',
+			'better': 'higher',
+		}
+
+def bench_sweep(results, n_designs=1000000, chunk_size=65536):
+	for req in _reqs:
+		t = time.perf_counter()
+		n = sweep(req, lambda chunk: None, chunk_size=chunk_size, stop=n_designs)
+		results['%s.sweep' % req] = {
+			'value': n/(time.perf_counter()-t),
+			'unit': 'designs/s',
+			'better': 'higher',
+		}
+
+def run(n_designs=1000000):
+	results = {}
+	bench_components(results)
+	bench_system(results)
+	bench_sweep(results, n_designs)
+	return {
+		'meta': {
+			'python': platform.python_version(),
+			'numpy': np.__version__,
+			'machine': platform.machine(),
+			'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		},
+		'results': results,
+	}
+
+def compare(baseline, current, threshold=0.1):
+	"""
+	Lines of the comparison table and the names of metrics that regressed beyond threshold.
+	A baseline metric missing from the current run counts as a regression.
+	"""
+	lines = ['%-45s %14s %14s %8s' % ('metric', 'baseline', 'current', 'change')]
+	regressions = []
+	for name, base in sorted(baseline['results'].items()):
+		if name not in current['results']:
+			regressions.append(name)
+			lines.append('%-45s %14.4g %14s %8s  MISSING' % (name, base['value'], '-', ''))
+			continue
+		cur = current['results'][name]
+		change = cur['value']/base['value']-1
+		worse = change > threshold if base['better'] == 'lower' else change < -threshold
+		if worse:
+			regressions.append(name)
+		lines.append('%-45s %14.4g %14.4g %+7.1f%%%s' % (name, base['value'], cur['value'], 100*change, '  REGRESSION' if worse else ''))
+	return lines, regressions
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='engine-design benchmarks')
+	sub = parser.add_subparsers(dest='command', required=True)
+	p_run = sub.add_parser('run', help='run the benchmarks and write JSON results')
+	p_run.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+	p_run.add_argument('--sweep-designs', type=int, default=1000000, help='designs per catalog sweep benchmark')
+	p_cmp = sub.add_parser('compare', help='compare two result files')
+	p_cmp.add_argument('baseline')
+	p_cmp.add_argument('current')
+	p_cmp.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+	args = parser.parse_args(argv)
+
+	if args.command == 'run':
+		res = run(args.sweep_designs)
+		text = json.dumps(res, indent=1)
+		if args.output == '-':
+			print(text)
+		else:
+			with open(args.output, 'w') as f:
+				f.write(text+'\n')
+		return 0
+
+	with open(args.baseline) as f:
+		baseline = json.load(f)
+	with open(args.current) as f:
+		current = json.load(f)
+	lines, regressions = compare(baseline, current, args.threshold)
+	print('\n'.join(lines))
+	if regressions:
+		print('%d regression(s) beyond %.0f%% or missing' % (len(regressions), 100*args.threshold))
+		return 1
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
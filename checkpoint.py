@@ -0,0 +1,102 @@
+"""
+Resumable, checkpointed sweeps.
+
+resumable_sweep works in a directory: evaluated chunks are appended to a result_store in
+<directory>/results (optional), and a running Pareto front and mass/fos statistics are kept
+alongside. Every interval seconds, and at the end, the sweep state is written to
+<directory>/checkpoint.pkl (atomically, via a temporary file):
+
+	next         : index of the first design not yet covered (the end of the last completed chunk)
+	store_length : number of rows in the result store at that point
+	archive      : the pareto_archive
+	stats        : running_stats of total mass and system fos
+	evaluated    : designs evaluated so far, rejected: designs dropped by the pre-filter per reason
+
+Calling resumable_sweep again with the same directory and settings continues from next: the
+result store is truncated to store_length first, so chunks completed after the last checkpoint
+are evaluated again but never stored twice, and chunks before it are not evaluated again.
+"""
+import os
+import time
+import pickle
+from global_reqs import _global_reqs
+from sweep import catalog_space, evaluate_chunk
+from store import result_store, engine_columns
+from pareto import pareto_archive
+from montecarlo import running_stats
+
+def load_checkpoint(directory):
+	"""The checkpoint in directory as a dict, or None if there is none."""
+	path = os.path.join(directory, 'checkpoint.pkl')
+	if not os.path.exists(path):
+		return None
+	with open(path, 'rb') as f:
+		return pickle.load(f)
+
+def _save_checkpoint(directory, state):
+	path = os.path.join(directory, 'checkpoint.pkl')
+	with open(path+'.tmp', 'wb') as f:
+		pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(path+'.tmp', path)
+
+def resumable_sweep(req, directory, chunk_size=65536, space=None, prefilter=False, store=True, float32=False,
+					interval=30.0, stop=None):
+	"""
+	Sweeps space (catalog_space(req) by default, or a sampled_space) chunk by chunk, resuming
+	from the checkpoint in directory if there is one.
+
+	store        : keep every evaluated design in a result_store under directory/results
+	float32      : store values in single precision (only when the store is created)
+	interval     : seconds between checkpoints
+	stop         : sweep only up to this index (a later call with a larger stop continues)
+
+	Returns the final state dict (see the module docstring) with 'done' True once the whole
+	range is covered.
+	"""
+	space = catalog_space(req) if space is None else space
+	stop = space.size if stop is None else min(stop, space.size)
+	os.makedirs(directory, exist_ok=True)
+	settings = {'req': req, 'space': space.key, 'chunk_size': chunk_size, 'prefilter': prefilter, 'store': store}
+
+	state = load_checkpoint(directory)
+	if state is None:
+		state = dict(settings, next=0, store_length=0, evaluated=0, rejected={},
+					 archive=pareto_archive(_global_reqs[req]['fos']),
+					 stats={'mass': running_stats(), 'fos': running_stats()})
+	else:
+		for key, value in settings.items():
+			if state[key] != value:
+				raise ValueError('checkpoint in %r has %s=%r, not %r' % (directory, key, state[key], value))
+
+	results = None
+	if store:
+		results = result_store(os.path.join(directory, 'results'), engine_columns(space.engine), float32)
+		if len(results) < state['store_length']:
+			raise ValueError('result store has %d rows, checkpoint expects %d' % (len(results), state['store_length']))
+		results.truncate(state['store_length'])
+
+	last = time.monotonic()
+	try:
+		for lo, designs in space.chunks(chunk_size, state['next'], stop):
+			chunk = evaluate_chunk(space, lo, designs, prefilter)
+			if results is not None:
+				results.add_chunk(chunk)
+			state['archive'].add_chunk(chunk)
+			state['stats']['mass'].update(chunk['mass'])
+			state['stats']['fos'].update(chunk['fos'])
+			state['evaluated'] += len(chunk['index'])
+			for reason, count in chunk.get('rejected', {}).items():
+				state['rejected'][reason] = state['rejected'].get(reason, 0)+count
+			state['next'] = lo+len(designs)
+			state['store_length'] = len(results) if results is not None else 0
+			if time.monotonic()-last >= interval:
+				_save_checkpoint(directory, state)
+				last = time.monotonic()
+	finally:
+		if results is not None:
+			results.close()
+	state['done'] = state['next'] >= space.size
+	_save_checkpoint(directory, state)
+	return state
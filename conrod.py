@@ -1,7 +1,19 @@
 from math import pi,sin,cos,sqrt
 from global_reqs import *
+from global_reqs import _global_reqs_labels
+from batch import columns, round2
+from gradient import value_and_gradient
+from shared import freeze, component_setattr, component_reduce
+from interval import rounded_bounds
+from loadcase import load_case_kernel
 
 class conrod(object):
+	"""
+	Fast path: mass_si(t_I, r1, D) and factor_of_safety_si(t_I, r1, D) take positional floats in
+	SI units (t_I and D in meters, r1 as ratio) and return unrounded values; mass() and
+	factor_of_safety() are thin wrappers around them. Both are built per instance by
+	_specialize.
+	"""
 
 	_fixed_pars = {
 		'Syc': 250e6,  	# Yield stress of the piston head material in Pa(N/m^2)
@@ -26,85 +38,97 @@ class conrod(object):
 
 	roles = ['piston', 'flywheel', 'crankshaft', 'conrod', 'pistonpin']
 
-	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
-		self.team_label = self.roles[3]
-		self.input_labels = ['thickness of connecting rod I-section in mm', 'ratio of length of connecting rod and crank length, l/r,']
-		self.input_symbols = ['t_I', 'r1']
-		self.inputs_min = {
-			'engine': [0.005*1000, 4.000],
-			'lawn_mower': [0.002*1000, 3.000]
-		}
-		self.inputs_max =  {
-			'engine': [0.015*1000, 5.000],
-			'lawn_mower': [0.008*1000, 6.000]
-		}
-
-		self.outside_input_labels = ['piston bore diameter in meters']
-		self.outside_input_symbols = ['D']
-		self.outside_inputs_min = {
-			'engine':[0.075*1000],
-			'lawn_mower': [0.040*1000]
-		}
-		self.outside_inputs_max =  {
-			'engine': [0.105*1000],
-			'lawn_mower': [0.070*1000]
-		}
-
-		self.input_catalog = { 
-			'engine': [[5.0, 4.0],
-					 [7.5, 4.0],
-					 [10.0, 4.0],
-					 [12.5, 4.0],
-					 [15.0, 4.0],
-					 [5.0, 4.25],
-					 [7.5, 4.25],
-					 [10.0, 4.25],
-					 [12.5, 4.25],
-					 [15.0, 4.25],
-					 [5.0, 4.5],
-					 [7.5, 4.5],
-					 [10.0, 4.5],
-					 [12.5, 4.5],
-					 [15.0, 4.5],
-					 [5.0, 4.75],
-					 [7.5, 4.75],
-					 [10.0, 4.75],
-					 [12.5, 4.75],
-					 [15.0, 4.75],
-					 [5.0, 5.0],
-					 [7.5, 5.0],
-					 [10.0, 5.0],
-					 [12.5, 5.0],
-					 [15.0, 5.0]],
-			'lawn_mower': [[2.0, 3.0],
-					 [3.5, 3.0],
-					 [5.0, 3.0],
-					 [6.5, 3.0],
-					 [8.0, 3.0],
-					 [2.0, 3.75],
-					 [3.5, 3.75],
-					 [5.0, 3.75],
-					 [6.5, 3.75],
-					 [8.0, 3.75],
-					 [2.0, 4.5],
-					 [3.5, 4.5],
-					 [5.0, 4.5],
-					 [6.5, 4.5],
-					 [8.0, 4.5],
-					 [2.0, 5.25],
-					 [3.5, 5.25],
-					 [5.0, 5.25],
-					 [6.5, 5.25],
-					 [8.0, 5.25],
-					 [2.0, 6.0],
-					 [3.5, 6.0],
-					 [5.0, 6.0],
-					 [6.5, 6.0],
-					 [8.0, 6.0]]
-		}
+	# divisors taking input_symbols + outside_input_symbols to the SI arguments of _fos/_mass
+	_arg_scales = [1000, 1, 1000]
+
+	# geometric constraints checked by _violations before evaluation (none)
+	constraints = ()
+
+	# instance attributes: requirements, fixed parameters and the kernels built by _specialize
+	__slots__ = tuple(dict.fromkeys(list(_global_reqs_labels)+list(_fixed_pars)+['_load_case', '_fos', '_mass', 'mass_si', 'factor_of_safety_si']))
+	__setattr__ = component_setattr       # read-only once built, see shared.py
+	__reduce__ = component_reduce
+
+	team_label = roles[3]
+	input_labels = freeze(['thickness of connecting rod I-section in mm', 'ratio of length of connecting rod and crank length, l/r,'])
+	input_symbols = freeze(['t_I', 'r1'])
+	inputs_min = freeze({
+		'engine': [0.005*1000, 4.000],
+		'lawn_mower': [0.002*1000, 3.000]
+	})
+	inputs_max = freeze({
+		'engine': [0.015*1000, 5.000],
+		'lawn_mower': [0.008*1000, 6.000]
+	})
+
+	outside_input_labels = freeze(['piston bore diameter in meters'])
+	outside_input_symbols = freeze(['D'])
+	outside_inputs_min = freeze({
+		'engine':[0.075*1000],
+		'lawn_mower': [0.040*1000]
+	})
+	outside_inputs_max = freeze({
+		'engine': [0.105*1000],
+		'lawn_mower': [0.070*1000]
+	})
+
+	input_catalog = freeze({
+		'engine': [[5.0, 4.0],
+				 [7.5, 4.0],
+				 [10.0, 4.0],
+				 [12.5, 4.0],
+				 [15.0, 4.0],
+				 [5.0, 4.25],
+				 [7.5, 4.25],
+				 [10.0, 4.25],
+				 [12.5, 4.25],
+				 [15.0, 4.25],
+				 [5.0, 4.5],
+				 [7.5, 4.5],
+				 [10.0, 4.5],
+				 [12.5, 4.5],
+				 [15.0, 4.5],
+				 [5.0, 4.75],
+				 [7.5, 4.75],
+				 [10.0, 4.75],
+				 [12.5, 4.75],
+				 [15.0, 4.75],
+				 [5.0, 5.0],
+				 [7.5, 5.0],
+				 [10.0, 5.0],
+				 [12.5, 5.0],
+				 [15.0, 5.0]],
+		'lawn_mower': [[2.0, 3.0],
+				 [3.5, 3.0],
+				 [5.0, 3.0],
+				 [6.5, 3.0],
+				 [8.0, 3.0],
+				 [2.0, 3.75],
+				 [3.5, 3.75],
+				 [5.0, 3.75],
+				 [6.5, 3.75],
+				 [8.0, 3.75],
+				 [2.0, 4.5],
+				 [3.5, 4.5],
+				 [5.0, 4.5],
+				 [6.5, 4.5],
+				 [8.0, 4.5],
+				 [2.0, 5.25],
+				 [3.5, 5.25],
+				 [5.0, 5.25],
+				 [6.5, 5.25],
+				 [8.0, 5.25],
+				 [2.0, 6.0],
+				 [3.5, 6.0],
+				 [5.0, 6.0],
+				 [6.5, 6.0],
+				 [8.0, 6.0]]
+	})
 
+	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
 		for key, value in {**global_reqs, **_fixed_pars}.items():
-			setattr(self, key, value)
+			if key in self.__slots__:         # other keys (e.g. extra requirement fields) are not used by the model
+				setattr(self, key, value)
 
 		"""
 		Variables: 
@@ -117,54 +141,116 @@ class conrod(object):
 		rho_cr       : density of connecting rod in kg/m^3
 		
 		"""
-	def get_Fl_r(self, D):
-		N = self.N*(pi/30)                     # output rpm; rpm to rad/s
-		L = self.LDr*D                         # stroke = [1.25D to 2D] in meters
-		r = L/2                           # crank length in meters   
-		Vd = (pi/4)*(D**2)*L              # displaced volume in m^3
-		P_b = N*self.T                         # brake power in Watts
-		mep = 2*P_b/(N*Vd)                # brake mean effective pressure in Pa
-		p_max = 9.5*mep                   # max pressure = 9-10 times mep in Pa
-		Fl = p_max*(pi/4)*D**2            # max. gas force on the piston (Fl=Fp=Fc) in N
 
+		self._specialize()
+
+	def get_Fl_r(self, D):
+		Fl, p_max, r = self._load_case(D)     # shared gas load case, see loadcase.py
 		return Fl, r
 
+	def _specialize(self):
+		"""
+		Builds _mass(t_I, r1, D) and _fos(t_I, r1, D) for this requirement set: unrounded mass
+		and fos for t_I and D in meters, as floats or NumPy arrays. Requirement-only constants
+		are folded in here once (see Fast-path kernels in README).
+		load: optional (Fl, p_max, r) of the gas load case for D, already computed by the caller
+		(engine.evaluate_batch computes it once for all parts).
+		"""
+		load_case = self._load_case = load_case_kernel(self.N, self.T, self.LDr)
+		rho_cr = self.rho_cr
+		Syc = self.Syc
+		NC = self.NC
+		a = 1/1600                         # material specific: 1/7500 for mild steel, 1/9000 for wrought iron, 1/1600 for cast iron 
+
+		def _mass(t_I, r1, D, load=None):
+			Fl, p_max, r = load_case(D) if load is None else load
+
+			"""connecting rod"""
+			
+			l = r1*r                          # length of connecting rod = 4-5 times crank length in meters
+			A = 11*(t_I*t_I)                        # cross-sectional area in m^2
+			mass_cr = rho_cr*l*A               # mass of connecting rod in kgs.
+			return NC*mass_cr
+
+		def _fos(t_I, r1, D, load=None):
+			Fl, p_max, r = load_case(D) if load is None else load
+
+			"""connecting rod"""
+			
+			l = r1*r                          # length of connecting rod = 4-5 times crank length in meters
+			
+			# BI = 4*t_I                          # width of I-section in meters
+			# HI = 5*t_I                          # height of I-section in meters
+			kxx = 1.78*t_I                       # radius of gyration about x-axis in meters
+			A = 11*(t_I*t_I)                        # cross-sectional area in m^2
+			slr = l/kxx                          # slenderness ratio
+			fos_cr = Syc*A/(Fl*(1+a*(slr*slr))) # fos against buckling
+			return fos_cr
+
+		self._mass = _mass
+		self._fos = _fos
+		self.mass_si = _mass
+		self.factor_of_safety_si = _fos
+
 	def mass(self, x, outside_x):
 		t_I = x['t_I']/1000
 		r1 = x['r1']
 
 		D = outside_x['D']/1000
 
-		Fl, r = self.get_Fl_r(D)
-
-		"""connecting rod"""
-		
-		l = r1*r                          # length of connecting rod = 4-5 times crank length in meters
-		
-		a = 1/1600                         # material specific: 1/7500 for mild steel, 1/9000 for wrought iron, 1/1600 for cast iron 
-		
-		BI = 4*t_I                          # width of I-section in meters
-		HI = 5*t_I                          # height of I-section in meters
-		kxx = 1.78*t_I                       # radius of gyration about x-axis in meters
-		A = 11*t_I**2                        # cross-sectional area in m^2
-		mass_cr = self.rho_cr*l*A               # mass of connecting rod in kgs.
-		return round(self.NC*mass_cr,2)
+		return round(self.mass_si(t_I, r1, D),2)
 
 	def factor_of_safety(self, x, outside_x):
 		t_I = x['t_I']/1000
 		r1 = x['r1']
 
 		D = outside_x['D']/1000
-		Fl, r = self.get_Fl_r(D)
-		"""connecting rod"""
-		
-		l = r1*r                          # length of connecting rod = 4-5 times crank length in meters
-		
-		a = 1/1600                         # material specific: 1/7500 for mild steel, 1/9000 for wrought iron, 1/1600 for cast iron 
-		
-		BI = 4*t_I                          # width of I-section in meters
-		HI = 5*t_I                          # height of I-section in meters
-		kxx = 1.78*t_I                       # radius of gyration about x-axis in meters
-		A = 11*t_I**2                        # cross-sectional area in m^2
-		fos_cr = self.Syc*A/(Fl*(1+a*(l/kxx)**2)) # fos against buckling
-		return round(fos_cr,2)
\ No newline at end of file
+		return round(self.factor_of_safety_si(t_I, r1, D),2)
+
+	def mass_batch(self, x, outside_x, load=None):
+		"""
+		Vectorized mass: x holds arrays of t_I (mm) and r1, outside_x an array of D in mm
+		(see batch.columns). Returns an array equal element-wise to the scalar results.
+		load: optional precomputed gas load case for D (see _specialize)
+		"""
+		t_I, r1 = columns(x, self.input_symbols)
+		D, = columns(outside_x, self.outside_input_symbols)
+		return round2(self._mass(t_I/1000, r1, D/1000, load))
+
+	def factor_of_safety_batch(self, x, outside_x, load=None):
+		"""
+		Vectorized factor_of_safety: x holds arrays of t_I (mm) and r1, outside_x an array of D
+		in mm (see batch.columns). Returns an array equal element-wise to the scalar results.
+		load: optional precomputed gas load case for D (see _specialize)
+		"""
+		t_I, r1 = columns(x, self.input_symbols)
+		D, = columns(outside_x, self.outside_input_symbols)
+		return round2(self._fos(t_I/1000, r1, D/1000, load))
+
+	def mass_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded mass with respect to each input and outside input, as a
+		dict keyed by symbol (kg per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._mass, self, x, outside_x)[1]
+
+	def factor_of_safety_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded factor of safety with respect to each input and outside
+		input, as a dict keyed by symbol (per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._fos, self, x, outside_x)[1]
+
+	def mass_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of mass() over a box: x_box and outside_box map each
+		input and outside input to (lo, hi), or a single value, in mm (see interval.py).
+		"""
+		return rounded_bounds(self._mass, self, x_box, outside_box)
+
+	def factor_of_safety_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of factor_of_safety() over a box, given as for
+		mass_bounds.
+		"""
+		return rounded_bounds(self._fos, self, x_box, outside_box)
@@ -1,7 +1,20 @@
 from math import pi,sin,cos,sqrt
 from global_reqs import *
+from global_reqs import _global_reqs_labels
+from batch import columns, round2
+from gradient import value_and_gradient
+from shared import freeze, component_setattr, component_reduce
+from interval import rounded_bounds
+from loadcase import load_case_kernel
+import numpy as np
 
 class crankshaft(object):
+	"""
+	Fast path: mass_si(c, dc, ds, t_fw, D) and factor_of_safety_si(c, dc, ds, t_fw, D) take
+	positional floats in SI units (lengths in meters) and return unrounded values; mass() and
+	factor_of_safety() are thin wrappers around them. Both are built per instance by
+	_specialize.
+	"""
 
 	_fixed_pars = {
 		'Sy2': 275e6,  	# Yield stress of the piston head material in Pa(N/m^2)
@@ -29,85 +42,97 @@ class crankshaft(object):
 
 	roles = ['piston', 'flywheel', 'crankshaft', 'conrod', 'pistonpin']
 
-	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
-		self.team_label = self.roles[2]
-		self.input_labels = ['crankshaft bearing offset in mm', 'crankshaft-pin diameter in mm']
-		self.input_symbols = ['c', 'dc']
-		self.inputs_min = {
-			'engine': [0.150*1000, 0.030*1000],
-			'lawn_mower': [0.060*1000, 0.010*1000]
-		}
-		self.inputs_max = {
-			'engine': [0.300*1000, 0.050*1000],
-			'lawn_mower': [0.13*1000, 0.020*1000]
-		}
-
-		self.outside_input_labels = ['flywheel shaft diameter in mm', 'flywheel thickness in mm', 'piston bore diameter in mm']
-		self.outside_input_symbols = ['ds', 't_f', 'D']
-		self.outside_inputs_min = {
-			'engine': [0.040*1000,0.004*1000,0.075*1000],
-			'lawn_mower': [0.015*1000, 0.010*1000, 0.040*1000]
-		}
-		self.outside_inputs_max = {
-			'engine': [0.060*1000, 0.051*1000, 0.105*1000],
-			'lawn_mower': [0.025*1000, 0.030*1000, 0.070*1000]
-		}
-
-		self.input_catalog = { 
-			'engine': [[150.0, 30.0],
-					 [187.5, 30.0],
-					 [225.0, 30.0],
-					 [262.5, 30.0],
-					 [300.0, 30.0],
-					 [150.0, 35.0],
-					 [187.5, 35.0],
-					 [225.0, 35.0],
-					 [262.5, 35.0],
-					 [300.0, 35.0],
-					 [150.0, 40.0],
-					 [187.5, 40.0],
-					 [225.0, 40.0],
-					 [262.5, 40.0],
-					 [300.0, 40.0],
-					 [150.0, 45.0],
-					 [187.5, 45.0],
-					 [225.0, 45.0],
-					 [262.5, 45.0],
-					 [300.0, 45.0],
-					 [150.0, 50.0],
-					 [187.5, 50.0],
-					 [225.0, 50.0],
-					 [262.5, 50.0],
-					 [300.0, 50.0]],
-			'lawn_mower': [[60.0, 10.0],
-					 [77.5, 10.0],
-					 [95.0, 10.0],
-					 [112.5, 10.0],
-					 [130.0, 10.0],
-					 [60.0, 12.5],
-					 [77.5, 12.5],
-					 [95.0, 12.5],
-					 [112.5, 12.5],
-					 [130.0, 12.5],
-					 [60.0, 15.0],
-					 [77.5, 15.0],
-					 [95.0, 15.0],
-					 [112.5, 15.0],
-					 [130.0, 15.0],
-					 [60.0, 17.5],
-					 [77.5, 17.5],
-					 [95.0, 17.5],
-					 [112.5, 17.5],
-					 [130.0, 17.5],
-					 [60.0, 20.0],
-					 [77.5, 20.0],
-					 [95.0, 20.0],
-					 [112.5, 20.0],
-					 [130.0, 20.0]]
-		}
+	# divisors taking input_symbols + outside_input_symbols to the SI arguments of _fos/_mass
+	_arg_scales = [1000, 1000, 1000, 1000, 1000]
+
+	# geometric constraints checked by _violations before evaluation
+	constraints = ('crankshaft_length',)
+
+	# instance attributes: requirements, fixed parameters and the kernels built by _specialize
+	__slots__ = tuple(dict.fromkeys(list(_global_reqs_labels)+list(_fixed_pars)+['_load_case', '_fos', '_mass', '_violations', 'mass_si', 'factor_of_safety_si']))
+	__setattr__ = component_setattr       # read-only once built, see shared.py
+	__reduce__ = component_reduce
+
+	team_label = roles[2]
+	input_labels = freeze(['crankshaft bearing offset in mm', 'crankshaft-pin diameter in mm'])
+	input_symbols = freeze(['c', 'dc'])
+	inputs_min = freeze({
+		'engine': [0.150*1000, 0.030*1000],
+		'lawn_mower': [0.060*1000, 0.010*1000]
+	})
+	inputs_max = freeze({
+		'engine': [0.300*1000, 0.050*1000],
+		'lawn_mower': [0.13*1000, 0.020*1000]
+	})
 
+	outside_input_labels = freeze(['flywheel shaft diameter in mm', 'flywheel thickness in mm', 'piston bore diameter in mm'])
+	outside_input_symbols = freeze(['ds', 't_f', 'D'])
+	outside_inputs_min = freeze({
+		'engine': [0.040*1000,0.004*1000,0.075*1000],
+		'lawn_mower': [0.015*1000, 0.010*1000, 0.040*1000]
+	})
+	outside_inputs_max = freeze({
+		'engine': [0.060*1000, 0.051*1000, 0.105*1000],
+		'lawn_mower': [0.025*1000, 0.030*1000, 0.070*1000]
+	})
+
+	input_catalog = freeze({
+		'engine': [[150.0, 30.0],
+				 [187.5, 30.0],
+				 [225.0, 30.0],
+				 [262.5, 30.0],
+				 [300.0, 30.0],
+				 [150.0, 35.0],
+				 [187.5, 35.0],
+				 [225.0, 35.0],
+				 [262.5, 35.0],
+				 [300.0, 35.0],
+				 [150.0, 40.0],
+				 [187.5, 40.0],
+				 [225.0, 40.0],
+				 [262.5, 40.0],
+				 [300.0, 40.0],
+				 [150.0, 45.0],
+				 [187.5, 45.0],
+				 [225.0, 45.0],
+				 [262.5, 45.0],
+				 [300.0, 45.0],
+				 [150.0, 50.0],
+				 [187.5, 50.0],
+				 [225.0, 50.0],
+				 [262.5, 50.0],
+				 [300.0, 50.0]],
+		'lawn_mower': [[60.0, 10.0],
+				 [77.5, 10.0],
+				 [95.0, 10.0],
+				 [112.5, 10.0],
+				 [130.0, 10.0],
+				 [60.0, 12.5],
+				 [77.5, 12.5],
+				 [95.0, 12.5],
+				 [112.5, 12.5],
+				 [130.0, 12.5],
+				 [60.0, 15.0],
+				 [77.5, 15.0],
+				 [95.0, 15.0],
+				 [112.5, 15.0],
+				 [130.0, 15.0],
+				 [60.0, 17.5],
+				 [77.5, 17.5],
+				 [95.0, 17.5],
+				 [112.5, 17.5],
+				 [130.0, 17.5],
+				 [60.0, 20.0],
+				 [77.5, 20.0],
+				 [95.0, 20.0],
+				 [112.5, 20.0],
+				 [130.0, 20.0]]
+	})
+
+	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
 		for key, value in {**global_reqs, **_fixed_pars}.items():
-			setattr(self, key, value)
+			if key in self.__slots__:         # other keys (e.g. extra requirement fields) are not used by the model
+				setattr(self, key, value)
 
 		"""
 		Variables: 
@@ -126,21 +151,98 @@ class crankshaft(object):
 		t_fw         : fly-wheel thickness in meters: obtained from fly-wheel team
 		
 		"""
-		
-		
-		
-	def get_Fl_r(self, D):
-		N = self.N*(pi/30)                     # output rpm; rpm to rad/s
-		L = self.LDr*D                         # stroke = [1.25D to 2D] in meters
-		r = L/2                           # crank length in meters   
-		Vd = (pi/4)*(D**2)*L              # displaced volume in m^3
-		P_b = N*self.T                         # brake power in Watts
-		mep = 2*P_b/(N*Vd)                # brake mean effective pressure in Pa
-		p_max = 9.5*mep                   # max pressure = 9-10 times mep in Pa
-		Fl = p_max*(pi/4)*D**2            # max. gas force on the piston (Fl=Fp=Fc) in N
 
+		self._specialize()
+
+	def get_Fl_r(self, D):
+		Fl, p_max, r = self._load_case(D)     # shared gas load case, see loadcase.py
 		return Fl, r
-		
+
+	def _specialize(self):
+		"""
+		Builds _fos(c, dc, ds, t_fw, D), returning unrounded (fos_cp, fos_cw), and
+		_mass(c, dc, ds, t_fw, D) for this requirement set; lengths in meters, as floats or
+		NumPy arrays. Requirement-only constants are folded in here once (see Fast-path
+		kernels in README).
+		load: optional (Fl, p_max, r) of the gas load case for D, already computed by the caller
+		(engine.evaluate_batch computes it once for all parts).
+		"""
+		load_case = self._load_case = load_case_kernel(self.N, self.T, self.LDr)
+		Sy2 = self.Sy2
+		k_cp = pi*Sy2
+		k_m = self.rho2*(pi/4)
+		k_cs = (pi/4)*self.rho2
+		rho2 = self.rho2
+		NC = self.NC
+
+		def _fos(c, dc, ds, t_fw, D, load=None):
+			Fl, p_max, r = load_case(D) if load is None else load
+
+			"""crankshaft"""
+			# assuming bearing locations are equidistant
+			b1 = b2 = c/2
+			
+			H1 = Fl*b1/(b1+b2)              # horizontal reactions at bearings in N
+			# net bearing reactions in N
+			#R2 = sqrt(H2**2+V2**2)
+			#R3 = V3
+			
+			# crank-pin 
+			fos_cp = k_cp*(dc*dc*dc)/(32*H1*b2) # bending fos of crank-pin
+			Pb = 24.5*10**6                    # permissible bearing pressure in Pa. range = [10.5 24.5]
+			lc = Fl/(dc*Pb)                  # length of crank-pin in meters
+			
+			
+			# crank-web
+			t_cw = (0.65*(dc*1000)+6.35)/1000             # crank-web thickness in meters
+			w_cw = (1.125*(dc*1000)+12.7)/1000            # crank-web width in meters
+			M_cw = H1*(b2-lc/2-t_cw/2)                    # max. bending moment on crank-web in N-m
+			Z_cw = (w_cw*(t_cw*t_cw))/6                       # section-modulus of crank-web in m^3
+			s_be = M_cw/Z_cw                              # bending stress in crank-web in Pa.
+			s_c = H1/(w_cw*t_cw)                          # compressive stress in crank-web in Pa.
+			s_total = s_be+s_c                            # total stress in crank-web in Pa.
+			fos_cw = Sy2/s_total                          # fos againt yield for crank-web
+			
+			return fos_cp, fos_cw
+
+		def _mass(c, dc, ds, t_fw, D, load=None):
+			Fl, p_max, r = load_case(D) if load is None else load
+
+			# assuming bearing locations are equidistant
+			b1 = b2 = c/2
+			c1 = c2 = c/2
+
+			# crank-pin
+			Pb = 17*10**6                    # permissible bearing pressure in Pa. range = [10.5 24.5]
+			lc = Fl/(dc*Pb)                  # length of crank-pin in meters
+			mass_cp  = k_m*lc*(dc*dc)  # mass of crank pin in kgs. 
+
+			# crank-web
+			t_cw = (0.65*(dc*1000)+6.35)/1000             # crank-web thickness in meters
+			w_cw = (1.125*(dc*1000)+12.7)/1000            # crank-web width in meters
+			mass_cw = t_cw*w_cw*r*2*rho2                  # mass of crank webs, assuming each crank web is a cuboid with dimensions w_cw,t_cw and r in kgs.
+			mass_cs = k_cs*(ds*ds)*(b1+b2+c1+c2-lc-2*t_cw-t_fw)     # mass of crank shaft in kgs, assuming crank shaft has diameter of flywheel shaft diameter            
+			m_total = mass_cp+mass_cw+mass_cs
+			
+			return NC*m_total
+
+		def _violations(c, dc, ds, t_fw, D):
+			Fl, p_max, r = load_case(D)
+			lc = Fl/(dc*(17*10**6))                        # crank-pin length, as in _mass
+			t_cw = (0.65*(dc*1000)+6.35)/1000
+			# crank-pin and webs longer than the shaft between the bearings (b1+b2+c1+c2 = 2c): negative mass_cs
+			return {'crankshaft_length': lc+2*t_cw+t_fw > 2*c}
+
+		def factor_of_safety_si(c, dc, ds, t_fw, D):
+			fos_cp, fos_cw = _fos(c, dc, ds, t_fw, D)
+			return fos_cw if fos_cw < fos_cp else fos_cp      # min(), for floats
+
+		self._fos = _fos
+		self._mass = _mass
+		self._violations = _violations
+		self.mass_si = _mass
+		self.factor_of_safety_si = factor_of_safety_si
+
 	def factor_of_safety(self, x, outside_x):
 		c = x['c']/1000
 		dc = x['dc']/1000
@@ -149,37 +251,7 @@ class crankshaft(object):
 		t_fw = outside_x['t_f']/1000
 		D = outside_x['D']/1000
 
-		Fl, r = self.get_Fl_r(D)
-
-		"""crankshaft"""
-		# assuming bearing locations are equidistant
-		b1 = b2 = c/2
-		c1 = c2 = c/2
-		
-		H1 = Fl*b1/(b1+b2)              # horizontal reactions at bearings in N
-		H2 = Fl*b2/(b1+b2)
-		# net bearing reactions in N
-		R1 = H1
-		#R2 = sqrt(H2**2+V2**2)
-		#R3 = V3
-		
-		# crank-pin 
-		fos_cp = pi*self.Sy2*dc**3/(32*H1*b2) # bending fos of crank-pin
-		Pb = 24.5*10**6                    # permissible bearing pressure in Pa. range = [10.5 24.5]
-		lc = Fl/(dc*Pb)                  # length of crank-pin in meters
-		
-		
-		# crank-web
-		t_cw = (0.65*(dc*1000)+6.35)/1000             # crank-web thickness in meters
-		w_cw = (1.125*(dc*1000)+12.7)/1000            # crank-web width in meters
-		M_cw = H1*(b2-lc/2-t_cw/2)                    # max. bending moment on crank-web in N-m
-		Z_cw = (w_cw*t_cw**2)/6                       # section-modulus of crank-web in m^3
-		s_be = M_cw/Z_cw                              # bending stress in crank-web in Pa.
-		s_c = H1/(w_cw*t_cw)                          # compressive stress in crank-web in Pa.
-		s_total = s_be+s_c                            # total stress in crank-web in Pa.
-		fos_cw = self.Sy2/s_total                          # fos againt yield for crank-web
-		
-		return round(min(fos_cp, fos_cw),2)
+		return round(self.factor_of_safety_si(c, dc, ds, t_fw, D),2)
 
 	def mass(self, x, outside_x):
 		c = x['c']/1000
@@ -189,22 +261,64 @@ class crankshaft(object):
 		t_fw = outside_x['t_f']/1000
 		D = outside_x['D']/1000
 
-		Fl, r = self.get_Fl_r(D)
+		return round(self.mass_si(c, dc, ds, t_fw, D),2)
 
-		# assuming bearing locations are equidistant
-		b1 = b2 = c/2
-		c1 = c2 = c/2
+	def factor_of_safety_batch(self, x, outside_x, load=None):
+		"""
+		Vectorized factor_of_safety: x holds arrays of c and dc, outside_x arrays of ds, t_f and D,
+		all in mm (see batch.columns). Returns an array equal element-wise to the scalar results.
+		load: optional precomputed gas load case for D (see _specialize)
+		"""
+		c, dc = columns(x, self.input_symbols)
+		ds, t_fw, D = columns(outside_x, self.outside_input_symbols)
+		fos_cp, fos_cw = self._fos(c/1000, dc/1000, ds/1000, t_fw/1000, D/1000, load)
+		return round2(np.minimum(fos_cp, fos_cw))
 
-		# crank-pin
-		Pb = 17*10**6                    # permissible bearing pressure in Pa. range = [10.5 24.5]
-		lc = Fl/(dc*Pb)                  # length of crank-pin in meters
-		mass_cp  = self.rho2*(pi/4)*lc*dc**2  # mass of crank pin in kgs. 
+	def mass_batch(self, x, outside_x, load=None):
+		"""
+		Vectorized mass: x holds arrays of c and dc, outside_x arrays of ds, t_f and D,
+		all in mm (see batch.columns). Returns an array equal element-wise to the scalar results.
+		load: optional precomputed gas load case for D (see _specialize)
+		"""
+		c, dc = columns(x, self.input_symbols)
+		ds, t_fw, D = columns(outside_x, self.outside_input_symbols)
+		return round2(self._mass(c/1000, dc/1000, ds/1000, t_fw/1000, D/1000, load))
 
-		# crank-web
-		t_cw = (0.65*(dc*1000)+6.35)/1000             # crank-web thickness in meters
-		w_cw = (1.125*(dc*1000)+12.7)/1000            # crank-web width in meters
-		mass_cw = t_cw*w_cw*r*2*self.rho2                  # mass of crank webs, assuming each crank web is a cuboid with dimensions w_cw,t_cw and r in kgs.
-		mass_cs = (pi/4)*self.rho2*(ds**2)*(b1+b2+c1+c2-lc-2*t_cw-t_fw)     # mass of crank shaft in kgs, assuming crank shaft has diameter of flywheel shaft diameter            
-		m_total = mass_cp+mass_cw+mass_cs
-		
-		return round(self.NC*m_total,2)
\ No newline at end of file
+	def mass_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded mass with respect to each input and outside input, as a
+		dict keyed by symbol (kg per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._mass, self, x, outside_x)[1]
+
+	def factor_of_safety_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded factor of safety with respect to each input and outside
+		input, as a dict keyed by symbol (per mm for inputs given in mm).
+		Follows the governing branch of min(fos_cp, fos_cw).
+		"""
+		return value_and_gradient(self._fos, self, x, outside_x)[1]
+
+	def mass_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of mass() over a box: x_box and outside_box map each
+		input and outside input to (lo, hi), or a single value, in mm (see interval.py).
+		"""
+		return rounded_bounds(self._mass, self, x_box, outside_box)
+
+	def factor_of_safety_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of factor_of_safety() over a box, given as for
+		mass_bounds.
+		Bounds min(fos_cp, fos_cw), both of which are non-monotone in the inputs.
+		"""
+		return rounded_bounds(self._fos, self, x_box, outside_box)
+
+	def violations_batch(self, x, outside_x):
+		"""
+		Vectorized check of the geometric constraints in constraints, with x and outside_x as
+		for mass_batch. Returns {reason: bool array}, True where the design violates it.
+		"""
+		c, dc = columns(x, self.input_symbols)
+		ds, t_fw, D = columns(outside_x, self.outside_input_symbols)
+		return self._violations(c/1000, dc/1000, ds/1000, t_fw/1000, D/1000)
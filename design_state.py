@@ -0,0 +1,95 @@
+"""
+Reactive design state: incremental re-evaluation of the engine model.
+
+The dependency graph comes from the components' input_symbols and outside_input_symbols,
+e.g. D feeds piston, pistonpin, conrod and crankshaft, c feeds crankshaft and flywheel.
+Setting a design variable marks only the components that read it dirty; results() recomputes
+those and reuses the cached (mass, fos) of the others, so it returns exactly what
+engine.evaluate returns for the current design.
+
+	state = design_state('engine', design)
+	state.set('D', 90.0)          # dirty: piston, crankshaft, conrod, pistonpin
+	res = state.results()         # recomputes those four only
+"""
+from global_reqs import _initial_global_pars
+from engine import engine
+
+class design_state(object):
+
+	def __init__(self, global_reqs, design=None, fixed_pars=None):
+		"""
+		global_reqs  : requirement-set name or dict, or an engine instance to share
+		design       : initial design (sequence in design_symbols order or dict). Variables
+		               not given start at the requirement set's initial_pars, else at its
+		               lower bounds; with an unnamed requirement dict they stay unset, and
+		               results() raises until they are set
+		"""
+		self.engine = global_reqs if isinstance(global_reqs, engine) else engine(global_reqs, fixed_pars)
+		self.design_symbols = self.engine.design_symbols
+		self._index = {s: i for i, s in enumerate(self.design_symbols)}
+
+		# symbol -> indices of the parts that read it (as input or outside input)
+		self.dependents = {s: [] for s in self.design_symbols}
+		for k, part in enumerate(self.engine.parts):
+			for s in list(part.input_symbols)+list(part.outside_input_symbols):
+				self.dependents[s].append(k)
+
+		if self.engine.req is not None:
+			start = dict(zip(self.design_symbols, self.engine.bounds()[0]))
+			start.update(_initial_global_pars[self.engine.req])
+			self._design = self.engine.design(start)
+		else:
+			self._design = [None]*len(self.design_symbols)
+		self._mass = {}
+		self._fos = {}
+		self._result = None
+		self.dirty = set(range(len(self.engine.parts)))
+		self.recomputed = {team: 0 for team in self.engine.roles}      # recompute count per team
+		if design is not None:
+			self.update(design)
+
+	def __getitem__(self, symbol):
+		return self._design[self._index[symbol]]
+
+	@property
+	def design(self):
+		"""Current design vector (copy), in design_symbols order."""
+		return list(self._design)
+
+	def set(self, symbol, value):
+		"""Sets one design variable; marks its dependents dirty if the value changed."""
+		i = self._index[symbol]
+		if self._design[i] == value:
+			return
+		self._design[i] = value
+		self.dirty.update(self.dependents[symbol])
+		self._result = None
+
+	def update(self, design):
+		"""Sets several variables from a dict, or all of them from a sequence."""
+		if not isinstance(design, dict):
+			if len(design) != len(self.design_symbols):
+				raise ValueError('expected %d design values, got %d' % (len(self.design_symbols), len(design)))
+			design = dict(zip(self.design_symbols, design))
+		for s, v in design.items():
+			self.set(s, v)
+
+	def dirty_teams(self):
+		return [self.engine.roles[k] for k in sorted(self.dirty)]
+
+	def results(self):
+		"""engine.evaluate of the current design, recomputing only the dirty components."""
+		if self._result is not None:
+			return self._result
+		unset = [s for s, v in zip(self.design_symbols, self._design) if v is None]
+		if unset:
+			raise ValueError('design variables not set: %s' % ', '.join(unset))
+		for k in sorted(self.dirty):
+			team = self.engine.roles[k]
+			self._mass[team], self._fos[team] = self.engine.evaluate_part(k, self._design)
+			self.recomputed[team] += 1
+		self.dirty.clear()
+		mass = {team: self._mass[team] for team in self.engine.roles}
+		fos = {team: self._fos[team] for team in self.engine.roles}
+		self._result = self.engine.system(mass, fos)
+		return self._result
@@ -0,0 +1,207 @@
+from global_reqs import _global_reqs
+from batch import columns, round2
+from gradient import value_and_gradient
+from shared import instance
+from piston import piston
+from flywheel import flywheel
+from crankshaft import crankshaft
+from conrod import conrod
+from pistonpin import pistonpin
+import numpy as np
+
+class engine(object):
+
+	# component classes in the order of roles
+	components = [piston, flywheel, crankshaft, conrod, pistonpin]
+
+	def __init__(self, req, fixed_pars=None):
+		"""
+		req          : requirement-set name (a key of _global_reqs), or a requirement dict;
+		               bounds() needs the name
+		fixed_pars   : optional overrides of the components' _fixed_pars, keyed by team, e.g.
+		               {'piston': {'Sy': 250e6}}; values may be NumPy arrays (one per design)
+		               for evaluate_batch
+		"""
+		self.req = req if isinstance(req, str) else None
+		global_reqs = _global_reqs[req] if isinstance(req, str) else req
+		fixed_pars = fixed_pars or {}
+		# shared instances per requirement set (see shared.py); array-valued overrides get their own
+		self.parts = [instance(cls, global_reqs, {**cls._fixed_pars, **fixed_pars.get(cls.__name__, {})}) for cls in self.components]
+		self.roles = [part.team_label for part in self.parts]
+		self.fos_req = global_reqs['fos']
+
+		"""
+		Flat design vector: the inputs of all components in the order of roles. The coupling
+		variables (D, t_f, ds, c) appear once, as inputs of the team that owns them, and are
+		routed to the components that take them as outside inputs.
+		"""
+		self.design_symbols = [s for part in self.parts for s in part.input_symbols]
+		index = {s: i for i, s in enumerate(self.design_symbols)}
+		self._routes = []
+		for part in self.parts:
+			symbols = list(part.input_symbols)+list(part.outside_input_symbols)
+			self._routes.append(([index[s] for s in symbols], part._arg_scales))
+
+		# parts driven by the gas load case of the bore (see loadcase.py); evaluate_batch computes
+		# it once per call and hands it to each of them
+		self._takes_load = [getattr(part, '_load_case', None) is not None for part in self.parts]
+		self._load_part = self._takes_load.index(True) if any(self._takes_load) else None
+		self._bore = index.get('D')
+
+	def bounds(self):
+		"""Lower and upper bounds of the design vector for this engine's requirement set."""
+		if self.req is None:
+			raise ValueError('bounds need the requirement-set name: build the engine with engine(name)')
+		lo = [v for part in self.parts for v in part.inputs_min[self.req]]
+		hi = [v for part in self.parts for v in part.inputs_max[self.req]]
+		return lo, hi
+
+	def design(self, x):
+		"""Design vector from a dict keyed by design symbol."""
+		return [x[s] for s in self.design_symbols]
+
+	def evaluate_part(self, k, design):
+		"""Rounded (mass, fos) of parts[k] for a design vector (sequence in design_symbols order)."""
+		part = self.parts[k]
+		idx, scales = self._routes[k]
+		args = [design[i]/s if s != 1 else design[i] for i, s in zip(idx, scales)]
+		return round(part.mass_si(*args),2), round(part.factor_of_safety_si(*args),2)
+
+	def system(self, mass, fos):
+		"""System result from per-team dicts of rounded component mass and fos."""
+		total = 0
+		for team in self.roles:
+			total = total+mass[team]
+		system_fos = min(fos[team] for team in self.roles)
+		return {
+			'mass': round(total,2),
+			'fos': system_fos,
+			'feasible': system_fos >= self.fos_req,
+			'component_mass': mass,
+			'component_fos': fos,
+		}
+
+	def evaluate(self, design):
+		"""
+		Evaluate one design, given as a sequence in design_symbols order or a dict.
+		Returns total mass, system fos (weakest component) and the per-component results,
+		each rounded as the component methods round them.
+		"""
+		if isinstance(design, dict):
+			design = self.design(design)
+		mass = {}
+		fos = {}
+		for k, team in enumerate(self.roles):
+			mass[team], fos[team] = self.evaluate_part(k, design)
+		return self.system(mass, fos)
+
+	def evaluate_gradient(self, design):
+		"""
+		Unrounded component masses and fos of one design with their gradients with respect to
+		the design vector, for gradient-based optimizers. Returns (mass, fos), each a dict keyed
+		by team of (value, gradient array in design_symbols order, per mm for inputs in mm).
+		"""
+		if isinstance(design, dict):
+			design = self.design(design)
+		mass = {}
+		fos = {}
+		for part, (idx, scales) in zip(self.parts, self._routes):
+			n = len(part.input_symbols)
+			x = {s: design[i] for s, i in zip(part.input_symbols, idx[:n])}
+			outside_x = {s: design[i] for s, i in zip(part.outside_input_symbols, idx[n:])}
+			for out, kernel in [(mass, part._mass), (fos, part._fos)]:
+				val, grad = value_and_gradient(kernel, part, x, outside_x)
+				g = np.zeros(len(self.design_symbols))
+				for s, i in zip(list(part.input_symbols)+list(part.outside_input_symbols), idx):
+					g[i] += grad[s]
+				out[part.team_label] = (val, g)
+		return mass, fos
+
+	def evaluate_bounds(self, lo, hi):
+		"""
+		Guaranteed bounds of evaluate() over the design box lo <= x <= hi (sequences in
+		design_symbols order or dicts). Returns mass and fos as (lo, hi), the per-component
+		bounds, and feasible as True (every design in the box meets the fos requirement),
+		False (none does) or None (undecided; bisect the box).
+		"""
+		if isinstance(lo, dict):
+			lo = self.design(lo)
+		if isinstance(hi, dict):
+			hi = self.design(hi)
+		mass = {}
+		fos = {}
+		for part, (idx, scales) in zip(self.parts, self._routes):
+			n = len(part.input_symbols)
+			x = {s: (lo[i], hi[i]) for s, i in zip(part.input_symbols, idx[:n])}
+			outside_x = {s: (lo[i], hi[i]) for s, i in zip(part.outside_input_symbols, idx[n:])}
+			mass[part.team_label] = part.mass_bounds(x, outside_x)
+			fos[part.team_label] = part.factor_of_safety_bounds(x, outside_x)
+		# rounded addition and round() are monotone, so summing the bounds bounds the sum
+		total_lo = total_hi = 0
+		for team in self.roles:
+			total_lo = total_lo+mass[team][0]
+			total_hi = total_hi+mass[team][1]
+		fos_lo = min(fos[team][0] for team in self.roles)
+		fos_hi = min(fos[team][1] for team in self.roles)
+		return {
+			'mass': (round(total_lo,2), round(total_hi,2)),
+			'fos': (fos_lo, fos_hi),
+			'feasible': True if fos_lo >= self.fos_req else False if fos_hi < self.fos_req else None,
+			'component_mass': mass,
+			'component_fos': fos,
+		}
+
+	def screen(self, designs):
+		"""
+		Vectorized feasibility pre-filter over the components' geometric constraints (see their
+		constraints attribute), cheap enough to run before evaluate_batch.
+		Returns (valid bool array, {reason: number of designs violating it}); a design that
+		violates several constraints is counted under each of them.
+		"""
+		cols = columns(designs, self.design_symbols)
+		valid = np.ones(len(cols[0]) if cols else 0, dtype=bool)
+		rejected = {}
+		for part, (idx, scales) in zip(self.parts, self._routes):
+			if not part.constraints:
+				continue
+			n = len(part.input_symbols)
+			x = {s: cols[i] for s, i in zip(part.input_symbols, idx[:n])}
+			outside_x = {s: cols[i] for s, i in zip(part.outside_input_symbols, idx[n:])}
+			for reason, bad in part.violations_batch(x, outside_x).items():
+				rejected[reason] = int(np.count_nonzero(bad))
+				valid &= ~bad
+		return valid, rejected
+
+	def evaluate_batch(self, designs):
+		"""
+		Vectorized evaluate: designs holds one row per design (see batch.columns, keyed by
+		design_symbols). Returns a dict of arrays equal element-wise to evaluate(). The gas load
+		case of the bore is computed once here and shared by the parts that need it.
+		"""
+		cols = columns(designs, self.design_symbols)
+		load = self.parts[self._load_part]._load_case(cols[self._bore]/1000) if self._load_part is not None else None
+		mass = {}
+		fos = {}
+		for part, (idx, scales), takes_load in zip(self.parts, self._routes, self._takes_load):
+			n = len(part.input_symbols)
+			x = {s: cols[i] for s, i in zip(part.input_symbols, idx[:n])}
+			outside_x = {s: cols[i] for s, i in zip(part.outside_input_symbols, idx[n:])}
+			if takes_load:
+				mass[part.team_label] = part.mass_batch(x, outside_x, load)
+				fos[part.team_label] = part.factor_of_safety_batch(x, outside_x, load)
+			else:
+				mass[part.team_label] = part.mass_batch(x, outside_x)
+				fos[part.team_label] = part.factor_of_safety_batch(x, outside_x)
+
+		total = 0
+		system_fos = None
+		for team in self.roles:
+			total = total+mass[team]
+			system_fos = fos[team] if system_fos is None else np.minimum(system_fos, fos[team])
+		return {
+			'mass': round2(total),
+			'fos': system_fos,
+			'feasible': system_fos >= self.fos_req,
+			'component_mass': mass,
+			'component_fos': fos,
+		}
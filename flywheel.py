@@ -1,7 +1,19 @@
 from math import pi,sin,cos,sqrt
 from global_reqs import *
+from global_reqs import _global_reqs_labels
+from batch import columns, round2
+from gradient import value_and_gradient, sqrt as any_sqrt
+from shared import freeze, component_setattr, component_reduce
+from interval import rounded_bounds, sqrt as interval_sqrt
+from loadcase import derived_constants
+import numpy as np
 
 class flywheel(object):
+	"""
+	Fast path: mass_si(t_fw, ds, c) and factor_of_safety_si(t_fw, ds, c) take positional floats
+	in SI units (lengths in meters) and return unrounded values; mass() and factor_of_safety()
+	are thin wrappers around them. Both are built per instance by _specialize.
+	"""
 
 	_fixed_pars = {
 		'Sy2': 275e6,  	# Yield stress of the piston head material in Pa(N/m^2)
@@ -29,85 +41,97 @@ class flywheel(object):
 
 	roles = ['piston', 'flywheel', 'crankshaft', 'conrod', 'pistonpin']
 
-	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
-		self.team_label = self.roles[1]
-		self.input_labels = ['flywheel thickness in mm', 'flywheel shaft diameter in mm']
-		self.input_symbols = ['t_f', 'ds']
-		self.inputs_min = {
-			'engine': [0.012*1000, 0.040*1000],
-			'lawn_mower': [0.010*1000, 0.015*1000]
-		}
-		self.inputs_max =  {
-			'engine': [0.051*1000, 0.060*1000],
-			'lawn_mower': [0.030*1000, 0.025*1000]
-		}
-
-		self.outside_input_labels = ['crank-shaft bearing support offset in mm']
-		self.outside_input_symbols = ['c']
-		self.outside_inputs_min = {
-			'engine':[0.150*1000],
-			'lawn_mower': [0.060*1000]
-		}
-		self.outside_inputs_max =  {
-			'engine': [0.300*1000],
-			'lawn_mower': [0.130*1000]
-		}
-
-		self.input_catalog = { 
-			'engine': [[12.0, 40.0],
-					 [21.75, 40.0],
-					 [31.5, 40.0],
-					 [41.25, 40.0],
-					 [51.0, 40.0],
-					 [12.0, 45.0],
-					 [21.75, 45.0],
-					 [31.5, 45.0],
-					 [41.25, 45.0],
-					 [51.0, 45.0],
-					 [12.0, 50.0],
-					 [21.75, 50.0],
-					 [31.5, 50.0],
-					 [41.25, 50.0],
-					 [51.0, 50.0],
-					 [12.0, 55.0],
-					 [21.75, 55.0],
-					 [31.5, 55.0],
-					 [41.25, 55.0],
-					 [51.0, 55.0],
-					 [12.0, 60.0],
-					 [21.75, 60.0],
-					 [31.5, 60.0],
-					 [41.25, 60.0],
-					 [51.0, 60.0]],
-			'lawn_mower': [[10.0, 15.0],
-					 [15.0, 15.0],
-					 [20.0, 15.0],
-					 [25.0, 15.0],
-					 [30.0, 15.0],
-					 [10.0, 17.5],
-					 [15.0, 17.5],
-					 [20.0, 17.5],
-					 [25.0, 17.5],
-					 [30.0, 17.5],
-					 [10.0, 20.0],
-					 [15.0, 20.0],
-					 [20.0, 20.0],
-					 [25.0, 20.0],
-					 [30.0, 20.0],
-					 [10.0, 22.5],
-					 [15.0, 22.5],
-					 [20.0, 22.5],
-					 [25.0, 22.5],
-					 [30.0, 22.5],
-					 [10.0, 25.0],
-					 [15.0, 25.0],
-					 [20.0, 25.0],
-					 [25.0, 25.0],
-					 [30.0, 25.0]]
-		}
+	# divisors taking input_symbols + outside_input_symbols to the SI arguments of _fos/_mass
+	_arg_scales = [1000, 1000, 1000]
+
+	# geometric constraints checked by _violations before evaluation
+	constraints = ('flywheel_radius',)
+
+	# instance attributes: requirements, fixed parameters and the kernels built by _specialize
+	__slots__ = tuple(dict.fromkeys(list(_global_reqs_labels)+list(_fixed_pars)+['w_mean', 'Cs', 'del_E', '_fos', '_mass', '_violations', 'mass_si', 'factor_of_safety_si']))
+	__setattr__ = component_setattr       # read-only once built, see shared.py
+	__reduce__ = component_reduce
+
+	team_label = roles[1]
+	input_labels = freeze(['flywheel thickness in mm', 'flywheel shaft diameter in mm'])
+	input_symbols = freeze(['t_f', 'ds'])
+	inputs_min = freeze({
+		'engine': [0.012*1000, 0.040*1000],
+		'lawn_mower': [0.010*1000, 0.015*1000]
+	})
+	inputs_max = freeze({
+		'engine': [0.051*1000, 0.060*1000],
+		'lawn_mower': [0.030*1000, 0.025*1000]
+	})
+
+	outside_input_labels = freeze(['crank-shaft bearing support offset in mm'])
+	outside_input_symbols = freeze(['c'])
+	outside_inputs_min = freeze({
+		'engine':[0.150*1000],
+		'lawn_mower': [0.060*1000]
+	})
+	outside_inputs_max = freeze({
+		'engine': [0.300*1000],
+		'lawn_mower': [0.130*1000]
+	})
+
+	input_catalog = freeze({
+		'engine': [[12.0, 40.0],
+				 [21.75, 40.0],
+				 [31.5, 40.0],
+				 [41.25, 40.0],
+				 [51.0, 40.0],
+				 [12.0, 45.0],
+				 [21.75, 45.0],
+				 [31.5, 45.0],
+				 [41.25, 45.0],
+				 [51.0, 45.0],
+				 [12.0, 50.0],
+				 [21.75, 50.0],
+				 [31.5, 50.0],
+				 [41.25, 50.0],
+				 [51.0, 50.0],
+				 [12.0, 55.0],
+				 [21.75, 55.0],
+				 [31.5, 55.0],
+				 [41.25, 55.0],
+				 [51.0, 55.0],
+				 [12.0, 60.0],
+				 [21.75, 60.0],
+				 [31.5, 60.0],
+				 [41.25, 60.0],
+				 [51.0, 60.0]],
+		'lawn_mower': [[10.0, 15.0],
+				 [15.0, 15.0],
+				 [20.0, 15.0],
+				 [25.0, 15.0],
+				 [30.0, 15.0],
+				 [10.0, 17.5],
+				 [15.0, 17.5],
+				 [20.0, 17.5],
+				 [25.0, 17.5],
+				 [30.0, 17.5],
+				 [10.0, 20.0],
+				 [15.0, 20.0],
+				 [20.0, 20.0],
+				 [25.0, 20.0],
+				 [30.0, 20.0],
+				 [10.0, 22.5],
+				 [15.0, 22.5],
+				 [20.0, 22.5],
+				 [25.0, 22.5],
+				 [30.0, 22.5],
+				 [10.0, 25.0],
+				 [15.0, 25.0],
+				 [20.0, 25.0],
+				 [25.0, 25.0],
+				 [30.0, 25.0]]
+	})
 
+	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
 		for key, value in {**global_reqs, **_fixed_pars}.items():
-			setattr(self, key, value)
+			if key in self.__slots__:         # other keys (e.g. extra requirement fields) are not used by the model
+				setattr(self, key, value)
 
 		"""
 		Variables: 
@@ -127,43 +151,75 @@ class flywheel(object):
 		"""
 		   
 		"""fly-wheel"""
-		w_max = self.N*pi/30             # max angular velocity in rad/s
-		w_mean = w_max/(1+self.f_p/2)     # mean angular velocity in rad/s
-		Cs = self.f_p                     	# coefficient of fluctuation of speed
-		W_cycle = (self.P/self.n_m)*60/self.N            # work done by fly-wheel per cycle in Joules
-		C_E = 0.066                     # energy coefficient: 1.93 for 4-stroke 1 cylinder, 0.066 for 4 cylinder, 0.031 for 6 cylinder
-		del_E = C_E*W_cycle                 # maximum fluctuation of energy in Joules
+		# w_mean, Cs and del_E only depend on the requirements; computed once per profile
+		derived = derived_constants(self.N, self.T, self.P, self.n_m, self.f_p)
+		self.w_mean = derived['w_mean']     # mean angular velocity in rad/s
+		self.Cs = derived['Cs']             # coefficient of fluctuation of speed
+		self.del_E = derived['del_E']       # maximum fluctuation of energy in Joules
 
-		self.w_mean=w_mean
-		self.Cs=Cs
-		self.del_E=del_E
+		self._specialize()
 
+	def _specialize(self):
+		"""
+		Builds _fos(t_fw, ds, c) and _mass(t_fw, ds, c) for this requirement set: unrounded fos
+		and mass for lengths in meters, as floats, NumPy arrays or dual numbers.
+		Requirement-only constants are folded in here once (see Fast-path kernels in
+		README).
+		"""
+		k_fw = self.del_E*pi*self.rho1
+		k_w = self.Cs*self.w_mean**2
+		k_fws = pi*self.Sy2
+		k_m = self.rho2*(pi/4)
+		k_r = self.rho1*pi
 
-	def factor_of_safety(self, x, outside_x):
-		t_fw = x['t_f']/1000
-		ds = x['ds']/1000
+		def _fos(t_fw, ds, c, sqrt=any_sqrt):
+			c1 = c/2
+			c2 = c/2
 
-		c = outside_x['c']/1000
+			"""fly-wheel"""
+			m_flywheel = sqrt(k_fw*t_fw/k_w) # mass of flywheel in kgs. 
+			# r_flywheel = sqrt((ds/2)**2+m_flywheel/(self.rho1*pi*t_fw))          # radius of flywheel in meters
+			
 
-		c1 = c/2
-		c2 = c/2
+			"""fly-wheel shaft"""
+			W_fw = m_flywheel*9.81          # weight of flywheel in N
+			V3 = W_fw*c2/(c1+c2)            # vertical reaction at bearings in N
+			
+			fos_fws = (k_fws*(ds*ds*ds))/(32*V3*c1)  # yield fos of flywheel shaft against bending
 
-		"""fly-wheel"""
-		m_flywheel = sqrt(self.del_E*pi*self.rho1*t_fw/(self.Cs*self.w_mean**2)) # mass of flywheel in kgs. 
-		r_flywheel = sqrt((ds/2)**2+m_flywheel/(self.rho1*pi*t_fw))          # radius of flywheel in meters
-		
+			# if r_flywheel<1.1*ds/2:
+	  #       	fos_fws=0
 
-		"""fly-wheel shaft"""
-		W_fw = m_flywheel*9.81          # weight of flywheel in N
-		V3 = W_fw*c2/(c1+c2)            # vertical reaction at bearings in N
-		
-		fos_fws = (pi*self.Sy2*ds**3)/(32*V3*c1)  # yield fos of flywheel shaft against bending
+			return fos_fws
+
+		def _mass(t_fw, ds, c, sqrt=any_sqrt):
+			"""fly-wheel"""
+			m_flywheel = sqrt(k_fw*t_fw/k_w) # mass of flywheel in kgs. 
+
+			m_fws = k_m*(ds*ds)*t_fw     # mass of flywheel shaft
+			m_total = m_flywheel+m_fws           # total mass: mass of fly-wheel + mass of fly-wheel shaft in kgs.
+			
+			return m_total
+
+		def _violations(t_fw, ds, c, sqrt=any_sqrt):
+			m_flywheel = sqrt(k_fw*t_fw/k_w)
+			r_flywheel = sqrt((ds/2)*(ds/2)+m_flywheel/(k_r*t_fw))          # radius of flywheel in meters
+			# flywheel hardly wider than its shaft
+			return {'flywheel_radius': r_flywheel < 1.1*ds/2}
+
+		self._fos = _fos
+		self._mass = _mass
+		self._violations = _violations
+		self.mass_si = _mass
+		self.factor_of_safety_si = _fos
+
+	def factor_of_safety(self, x, outside_x):
+		t_fw = x['t_f']/1000
+		ds = x['ds']/1000
 
-		# if r_flywheel<1.1*ds/2:
-  #       	fos_fws=0
+		c = outside_x['c']/1000
 
-		# self.r_flywheel=r_flywheel
-		return round(fos_fws,2)
+		return round(self.factor_of_safety_si(t_fw, ds, c),2)
 
 	def mass(self, x, outside_x):
 		t_fw = x['t_f']/1000
@@ -171,15 +227,59 @@ class flywheel(object):
 
 		c = outside_x['c']/1000
 
-		c1 = c/2
-		c2 = c/2
+		return round(self.mass_si(t_fw, ds, c),2)
 
-		"""fly-wheel"""
-		m_flywheel = sqrt(self.del_E*pi*self.rho1*t_fw/(self.Cs*self.w_mean**2)) # mass of flywheel in kgs. 
-		r_flywheel = sqrt((ds/2)**2+m_flywheel/(self.rho1*pi*t_fw))           # radius of flywheel in meters
+	def factor_of_safety_batch(self, x, outside_x):
+		"""
+		Vectorized factor_of_safety: x holds arrays of t_f and ds, outside_x an array of c,
+		all in mm (see batch.columns). Returns an array equal element-wise to the scalar results.
+		"""
+		t_fw, ds = columns(x, self.input_symbols)
+		c, = columns(outside_x, self.outside_input_symbols)
+		return round2(self._fos(t_fw/1000, ds/1000, c/1000, sqrt=np.sqrt))
 
-		m_fws = self.rho2*(pi/4)*(ds**2)*t_fw     # mass of flywheel shaft
-		m_total = m_flywheel+m_fws           # total mass: mass of fly-wheel + mass of fly-wheel shaft in kgs.
-		
-		# self.r_flywheel=r_flywheel
-		return round(m_total,2)
\ No newline at end of file
+	def mass_batch(self, x, outside_x):
+		"""
+		Vectorized mass: x holds arrays of t_f and ds, outside_x an array of c,
+		all in mm (see batch.columns). Returns an array equal element-wise to the scalar results.
+		"""
+		t_fw, ds = columns(x, self.input_symbols)
+		c, = columns(outside_x, self.outside_input_symbols)
+		return round2(self._mass(t_fw/1000, ds/1000, c/1000, sqrt=np.sqrt))
+
+	def mass_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded mass with respect to each input and outside input, as a
+		dict keyed by symbol (kg per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._mass, self, x, outside_x)[1]
+
+	def factor_of_safety_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded factor of safety with respect to each input and outside
+		input, as a dict keyed by symbol (per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._fos, self, x, outside_x)[1]
+
+	def mass_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of mass() over a box: x_box and outside_box map each
+		input and outside input to (lo, hi), or a single value, in mm (see interval.py).
+		"""
+		return rounded_bounds(self._mass, self, x_box, outside_box, sqrt=interval_sqrt)
+
+	def factor_of_safety_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of factor_of_safety() over a box, given as for
+		mass_bounds.
+		"""
+		return rounded_bounds(self._fos, self, x_box, outside_box, sqrt=interval_sqrt)
+
+	def violations_batch(self, x, outside_x):
+		"""
+		Vectorized check of the geometric constraints in constraints, with x and outside_x as
+		for mass_batch. Returns {reason: bool array}, True where the design violates it.
+		"""
+		t_fw, ds = columns(x, self.input_symbols)
+		c, = columns(outside_x, self.outside_input_symbols)
+		return self._violations(t_fw/1000, ds/1000, c/1000, sqrt=np.sqrt)
@@ -0,0 +1,201 @@
+"""
+Opt-in hot-path instrumentation.
+
+enable() wraps the public evaluation methods of the five component classes (mass,
+factor_of_safety, their batch versions, get_Fl_r / get_Fl_pmax), engine.evaluate /
+evaluate_batch / evaluate_part and the scalar gas load-case lookup, recording call counts and
+timings; disable() puts the original functions back. Nothing is wrapped while disabled, so
+there is no overhead then.
+
+engine.evaluate runs each component through engine.evaluate_part (the positional mass_si /
+factor_of_safety_si kernels), so its time is recorded per component as
+'<team>.evaluate_part': that is where to look for the component a slow system evaluation
+spends its time in.
+
+The component kernels reach the gas load case directly rather than through get_Fl_r /
+get_Fl_pmax, so that stage shows up as 'loadcase.gas_load' (one entry per scalar lookup, hit or
+miss) together with the load-case cache hit rate.
+
+	import instrument
+	instrument.enable()
+	... run a sweep ...
+	print(instrument.summary())     # or instrument.stats() for a dict
+	instrument.disable()
+"""
+import time
+import random
+from piston import piston
+from pistonpin import pistonpin
+from conrod import conrod
+from crankshaft import crankshaft
+from flywheel import flywheel
+from engine import engine
+import loadcase
+
+_methods = ['mass', 'factor_of_safety', 'mass_batch', 'factor_of_safety_batch']
+_targets = [
+	(piston, _methods),
+	(pistonpin, _methods+['get_Fl_pmax']),
+	(conrod, _methods+['get_Fl_r']),
+	(crankshaft, _methods+['get_Fl_r']),
+	(flywheel, _methods),
+	(engine, ['evaluate', 'evaluate_batch']),
+]
+
+_reservoir_size = 4096          # timing samples kept per entry for percentiles
+
+class _timer(object):
+
+	def __init__(self, seed):
+		self.calls = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.samples = []
+		self._random = random.Random(seed)
+
+	def add(self, dt):
+		self.calls += 1
+		self.total += dt
+		if dt > self.max:
+			self.max = dt
+		# reservoir sampling keeps a uniform sample of all calls in bounded memory
+		if len(self.samples) < _reservoir_size:
+			self.samples.append(dt)
+		else:
+			i = self._random.randrange(self.calls)
+			if i < _reservoir_size:
+				self.samples[i] = dt
+
+	def reset(self):
+		self.calls = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.samples = []
+
+	def percentile(self, q):
+		s = sorted(self.samples)
+		return s[min(int(q*len(s)), len(s)-1)] if s else 0.0
+
+_timers = {}
+_originals = []
+_cache_start = None
+
+def _get_timer(name):
+	timer = _timers.get(name)
+	if timer is None:
+		timer = _timers[name] = _timer(len(_timers))
+	return timer
+
+def _wrap(name, fn):
+	timer = _get_timer(name)
+	clock = time.perf_counter
+
+	def wrapper(*args, **kwargs):
+		t = clock()
+		try:
+			return fn(*args, **kwargs)
+		finally:
+			timer.add(clock()-t)
+
+	wrapper.__wrapped__ = fn
+	wrapper.__name__ = getattr(fn, '__name__', name)
+	wrapper.__doc__ = getattr(fn, '__doc__', None)
+	return wrapper
+
+def _wrap_part(fn):
+	# engine.evaluate_part(k, design): one entry per component, named after its team
+	clock = time.perf_counter
+
+	def wrapper(self, k, design):
+		timer = _get_timer('%s.evaluate_part' % self.roles[k])
+		t = clock()
+		try:
+			return fn(self, k, design)
+		finally:
+			timer.add(clock()-t)
+
+	wrapper.__wrapped__ = fn
+	wrapper.__name__ = fn.__name__
+	wrapper.__doc__ = fn.__doc__
+	return wrapper
+
+def enabled():
+	return bool(_originals)
+
+def enable():
+	"""Starts recording; a no-op if already enabled."""
+	global _cache_start
+	if _originals:
+		return
+	for cls, methods in _targets:
+		for method in methods:
+			fn = cls.__dict__[method]
+			_originals.append((cls, method, fn))
+			setattr(cls, method, _wrap('%s.%s' % (cls.__name__, method), fn))
+	fn = engine.__dict__['evaluate_part']
+	_originals.append((engine, 'evaluate_part', fn))
+	engine.evaluate_part = _wrap_part(fn)
+	_originals.append((loadcase, '_cached_gas_load', loadcase._cached_gas_load))
+	loadcase._cached_gas_load = _wrap('loadcase.gas_load', loadcase._cached_gas_load)
+	if _cache_start is None:
+		_cache_start = loadcase.cache_info()
+
+def disable():
+	"""Stops recording and restores the original functions; collected data is kept."""
+	while _originals:
+		obj, name, fn = _originals.pop()
+		setattr(obj, name, fn)
+
+def reset():
+	"""Drops collected data; recording goes on if enabled."""
+	global _cache_start
+	# zero the timers in place: the installed wrappers keep references to them
+	for timer in _timers.values():
+		timer.reset()
+	_cache_start = loadcase.cache_info() if _originals else None
+
+def stats():
+	"""
+	Collected data as a dict: per entry calls, total/mean/max and p50/p90/p99 in seconds, and
+	'cache' with the load-case cache hits, misses and hit rate since enable() or reset().
+	"""
+	out = {}
+	for name, t in sorted(_timers.items()):
+		if not t.calls:
+			continue
+		out[name] = {
+			'calls': t.calls,
+			'total': t.total,
+			'mean': t.total/t.calls,
+			'p50': t.percentile(0.50),
+			'p90': t.percentile(0.90),
+			'p99': t.percentile(0.99),
+			'max': t.max,
+		}
+	if _cache_start is not None:
+		info = loadcase.cache_info()
+		hits = info.hits-_cache_start.hits
+		misses = info.misses-_cache_start.misses
+		out['cache'] = {
+			'loadcase': {
+				'hits': hits,
+				'misses': misses,
+				'hit_rate': hits/(hits+misses) if hits+misses else 0.0,
+				'size': info.currsize,
+				'maxsize': info.maxsize,
+			}
+		}
+	return out
+
+def summary():
+	"""stats() as a text table, slowest total first (times in microseconds)."""
+	data = stats()
+	cache = data.pop('cache', {})
+	lines = ['%-40s %10s %12s %9s %9s %9s %9s' % ('entry', 'calls', 'total ms', 'mean', 'p50', 'p90', 'p99')]
+	for name, s in sorted(data.items(), key=lambda kv: -kv[1]['total']):
+		lines.append('%-40s %10d %12.2f %9.2f %9.2f %9.2f %9.2f' % (
+			name, s['calls'], s['total']*1e3, s['mean']*1e6, s['p50']*1e6, s['p90']*1e6, s['p99']*1e6))
+	for name, c in cache.items():
+		lines.append('cache %-34s hits %d, misses %d, hit rate %.1f%%, size %d/%d' % (
+			name, c['hits'], c['misses'], 100*c['hit_rate'], c['size'], c['maxsize']))
+	return '\n'.join(lines)
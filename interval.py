@@ -0,0 +1,114 @@
+"""
+Guaranteed bounds of the unrounded component kernels over input boxes, by interval arithmetic.
+
+The _fos/_mass kernels only use +, -, *, / and sqrt, so running them on intervals gives an
+enclosure of every value the model takes inside the box, including the non-monotone parts
+(crank-web moment, flywheel sqrt and bearing terms): each operation returns the full range of
+its operands, rounded outward, and a division by an interval containing 0 returns the whole
+real line. Enclosures are sound but can be wide for large boxes; bisecting the box tightens
+them, which is what a branch-and-bound search does.
+
+Squares written as x*x of the same variable are evaluated as x**2 (never negative), the
+rest of the dependency problem is left alone.
+"""
+from math import sqrt as _math_sqrt, nextafter, inf, isnan
+
+_pad = 1e-9         # relative padding covering the floating-point error of the point kernels
+
+def _down(a):
+	return nextafter(a, -inf)
+
+def _up(a):
+	return nextafter(a, inf)
+
+class interval(object):
+
+	__slots__ = ['lo', 'hi']
+
+	def __init__(self, lo, hi=None):
+		self.lo = lo
+		self.hi = lo if hi is None else hi
+
+	def __repr__(self):
+		return 'interval(%r, %r)' % (self.lo, self.hi)
+
+	def __add__(self, other):
+		if isinstance(other, interval):
+			return interval(_down(self.lo+other.lo), _up(self.hi+other.hi))
+		return interval(_down(self.lo+other), _up(self.hi+other))
+
+	__radd__ = __add__
+
+	def __sub__(self, other):
+		if isinstance(other, interval):
+			return interval(_down(self.lo-other.hi), _up(self.hi-other.lo))
+		return interval(_down(self.lo-other), _up(self.hi-other))
+
+	def __rsub__(self, other):
+		return interval(_down(other-self.hi), _up(other-self.lo))
+
+	def __neg__(self):
+		return interval(-self.hi, -self.lo)
+
+	def __mul__(self, other):
+		if other is self:
+			lo, hi = self.lo, self.hi
+			if lo >= 0:
+				return interval(_down(lo*lo), _up(hi*hi))
+			if hi <= 0:
+				return interval(_down(hi*hi), _up(lo*lo))
+			return interval(0.0, _up(max(lo*lo, hi*hi)))
+		if not isinstance(other, interval):
+			other = interval(other)
+		p = [self.lo*other.lo, self.lo*other.hi, self.hi*other.lo, self.hi*other.hi]
+		if any(isnan(v) for v in p):         # 0*inf
+			return interval(-inf, inf)
+		return interval(_down(min(p)), _up(max(p)))
+
+	__rmul__ = __mul__
+
+	def __truediv__(self, other):
+		if not isinstance(other, interval):
+			other = interval(other)
+		if other.lo <= 0 <= other.hi:
+			return interval(-inf, inf)
+		q = [self.lo/other.lo, self.lo/other.hi, self.hi/other.lo, self.hi/other.hi]
+		if any(isnan(v) for v in q):         # inf/inf
+			return interval(-inf, inf)
+		return interval(_down(min(q)), _up(max(q)))
+
+	def __rtruediv__(self, other):
+		return interval(other)/self
+
+def sqrt(a):
+	"""sqrt of an interval, over the part of it where sqrt is defined (a.lo clamped at 0)."""
+	lo = _math_sqrt(max(a.lo, 0.0))
+	hi = _math_sqrt(a.hi) if a.hi >= 0 else float('nan')
+	return interval(max(_down(lo), 0.0), _up(hi))
+
+def _box(value, scale):
+	lo, hi = value if isinstance(value, (tuple, list)) else (value, value)
+	if lo > hi:
+		raise ValueError('empty box side (%r, %r)' % (lo, hi))
+	x = interval(lo, hi)
+	return x/scale if scale != 1 else x
+
+def kernel_bounds(kernel, component, x_box, outside_box, **kwargs):
+	"""
+	Lower and upper bound of the unrounded kernel over a box of one component.
+
+	x_box, outside_box : dicts of (lo, hi), or single values, in the units of the component's
+	                     mass/factor_of_safety methods
+	Kernels returning a tuple of candidates (crankshaft fos) are bounded as their min().
+	"""
+	values = [x_box[s] for s in component.input_symbols]+[outside_box[s] for s in component.outside_input_symbols]
+	args = [_box(v, scale) for v, scale in zip(values, component._arg_scales)]
+	res = kernel(*args, **kwargs)
+	if isinstance(res, tuple):
+		res = interval(min(r.lo for r in res), min(r.hi for r in res))
+	return res.lo-_pad*abs(res.lo), res.hi+_pad*abs(res.hi)
+
+def rounded_bounds(kernel, component, x_box, outside_box, **kwargs):
+	"""kernel_bounds rounded to 2 decimals, bounding what mass()/factor_of_safety() return."""
+	lo, hi = kernel_bounds(kernel, component, x_box, outside_box, **kwargs)
+	return round(lo,2), round(hi,2)
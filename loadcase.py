@@ -0,0 +1,113 @@
+"""
+Gas load case shared by pistonpin, conrod and crankshaft.
+
+All three derive the max. gas force on the piston from the same chain (rpm to rad/s, stroke,
+displaced volume, brake power, mep, p_max). It only depends on the requirement set (N, T, LDr)
+and the bore D, so scalar evaluations go through a bounded LRU cache keyed on exactly those;
+one system evaluation computes it once and the other five calls are cache hits. Batch
+evaluations (engine.evaluate_batch) compute it once per call for the whole array of bores and
+pass it to the kernels of the parts that need it.
+
+The requirement-only constants (angular speed, brake power, the flywheel's energy fluctuation)
+are computed once per distinct requirement values by speed_power and derived_constants, also
+cached, and shared by every component of that requirement profile.
+"""
+from math import pi
+from functools import lru_cache
+from shared import freeze
+
+_maxsize = 4096
+
+@lru_cache(maxsize=_maxsize)
+def speed_power(N, T):
+	"""
+	Angular speed in rad/s, brake power in Watts and twice the brake power, for N in rpm and
+	T in N-m. mep = P_b2/(w*Vd) then only depends on the displaced volume.
+	"""
+	w = N*(pi/30)                     # output rpm; rpm to rad/s
+	P_b = w*T                         # brake power in Watts
+	return w, P_b, 2*P_b
+
+def _derived_constants(N, T, P, n_m, f_p):
+	w, P_b, P_b2 = speed_power(N, T)
+	w_max = N*pi/30                   # max angular velocity in rad/s, as the flywheel computes it
+	w_mean = w_max/(1+f_p/2)          # mean angular velocity in rad/s
+	W_cycle = (P/n_m)*60/N            # work done by fly-wheel per cycle in Joules
+	C_E = 0.066                       # energy coefficient: 1.93 for 4-stroke 1 cylinder, 0.066 for 4 cylinder, 0.031 for 6 cylinder
+	return freeze({
+		'w': w,
+		'P_b': P_b,
+		'P_b2': P_b2,
+		'w_max': w_max,
+		'w_mean': w_mean,
+		'Cs': f_p,                    # coefficient of fluctuation of speed
+		'W_cycle': W_cycle,
+		'del_E': C_E*W_cycle,         # maximum fluctuation of energy in Joules
+	})
+
+_derived_cache = lru_cache(maxsize=_maxsize)(_derived_constants)
+
+def derived_constants(N, T, P, n_m, f_p):
+	"""
+	Requirement-derived constants of one profile (N in rpm, T in N-m, P in Watts, mechanical
+	efficiency n_m and speed fluctuation f_p as ratios) as a read-only dict: w, P_b, P_b2 (see
+	speed_power), w_max, w_mean, Cs, W_cycle and del_E. Cached on the values, so profiles
+	with the same numbers share one entry; unhashable (array) values are computed uncached.
+	"""
+	try:
+		return _derived_cache(N, T, P, n_m, f_p)
+	except TypeError:
+		return _derived_constants(N, T, P, n_m, f_p)
+
+def gas_load_kernel(N, T, LDr):
+	"""
+	gas_load for one requirement set, with the requirement-only part of the chain folded in.
+	The returned function takes the bore D in meters, as a float or NumPy array.
+	"""
+	N, P_b, P_b2 = speed_power(N, T)  # N in rad/s from here on
+
+	def gas_load(D):
+		L = LDr*D                         # stroke = [1.25D to 2D] in meters
+		r = L/2                           # crank length in meters
+		Vd = (pi/4)*(D*D)*L              # displaced volume in m^3
+		mep = P_b2/(N*Vd)                # brake mean effective pressure in Pa
+		p_max = 9.5*mep                   # max pressure = 9-10 times mep in Pa
+		Fl = p_max*(pi/4)*(D*D)            # max. gas force on the piston (Fl=Fp=Fc) in N
+
+		return Fl, p_max, r
+
+	return gas_load
+
+def gas_load(N, T, LDr, D):
+	"""
+	Returns (Fl, p_max, r) for bore D in meters, as a float or NumPy array.
+
+	Fl           : max. gas force on the piston (Fl=Fp=Fc) in N
+	p_max        : max. cylinder pressure in Pa
+	r            : crank length in meters
+	"""
+	return gas_load_kernel(N, T, LDr)(D)
+
+_gas_load_cache = lru_cache(maxsize=_maxsize)(gas_load)
+_cached_gas_load = _gas_load_cache         # looked up on every call, so instrument.py can wrap it
+
+def load_case_kernel(N, T, LDr):
+	"""
+	load_case for one requirement set: single values of D go through the shared cache,
+	arrays are computed directly with the folded kernel.
+	"""
+	kernel = gas_load_kernel(N, T, LDr)
+
+	def load_case(D):
+		if isinstance(D, (int, float)):
+			return _cached_gas_load(N, T, LDr, D)
+		return kernel(D)
+
+	return load_case
+
+def cache_info():
+	"""Hits, misses, maxsize and current size of the load-case cache."""
+	return _gas_load_cache.cache_info()
+
+def cache_clear():
+	_gas_load_cache.cache_clear()
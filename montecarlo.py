@@ -0,0 +1,153 @@
+"""
+Monte Carlo uncertainty propagation through the engine model.
+
+Material properties from the components' _fixed_pars (strengths and densities) and
+manufacturing tolerances on the design inputs are sampled in large blocks; each block is
+evaluated with one engine.evaluate_batch call, with the sampled properties passed as arrays
+through engine's fixed_pars. Statistics are kept in streaming form, so memory does not grow
+with the number of samples:
+	- count, mean, variance (merged block by block), min and max of the finite values; NaN
+	  and inf values are counted separately and left out of every statistic
+	- exact quantiles: the model rounds mass and fos to 0.01, so a count per distinct value
+	  is exact and bounded by the value range rather than the sample count
+	- the probability that the system fos is below the requirement
+"""
+from global_reqs import _global_reqs
+from engine import engine
+import numpy as np
+
+# relative standard deviation of each sampled property; a property shared by several
+# components (Sy2, rho2: crankshaft material) gets one sample per design for all of them
+_material_cov = {
+	'Sy': 0.05,              # piston
+	'rho_piston': 0.01,
+	'Sb': 0.05,              # pistonpin
+	'rho_pp': 0.01,
+	'Syc': 0.05,             # conrod
+	'rho_cr': 0.01,
+	'Sy2': 0.05,             # crankshaft, flywheel shaft
+	'rho2': 0.01,
+	'rho1': 0.01,            # flywheel
+}
+
+class running_stats(object):
+
+	def __init__(self):
+		self.n = 0                                      # finite values; the statistics cover only these
+		self.nonfinite = 0                              # NaN and inf values, counted but left out
+		self.mean = 0.0
+		self.m2 = 0.0
+		self.min = np.inf
+		self.max = -np.inf
+		self._keys = np.zeros(0, dtype=np.int64)        # distinct values in hundredths, sorted
+		self._counts = np.zeros(0, dtype=np.int64)
+
+	def update(self, a):
+		"""Adds a block of values (rounded to 0.01, as the model returns them)."""
+		a = np.asarray(a, dtype=float).ravel()
+		finite = np.isfinite(a)
+		self.nonfinite += len(a)-int(np.count_nonzero(finite))
+		a = a[finite]
+		if len(a) == 0:
+			return
+		n_b = len(a)
+		mean_b = a.mean()
+		m2_b = ((a-mean_b)**2).sum()
+		n = self.n+n_b
+		delta = mean_b-self.mean
+		self.mean += delta*n_b/n
+		self.m2 += m2_b+delta*delta*self.n*n_b/n
+		self.n = n
+		self.min = min(self.min, a.min())
+		self.max = max(self.max, a.max())
+
+		keys, counts = np.unique(np.rint(a*100).astype(np.int64), return_counts=True)
+		merged = np.union1d(self._keys, keys)
+		total = np.zeros(len(merged), dtype=np.int64)
+		total[np.searchsorted(merged, self._keys)] += self._counts
+		total[np.searchsorted(merged, keys)] += counts
+		self._keys, self._counts = merged, total
+
+	@property
+	def var(self):
+		return self.m2/(self.n-1) if self.n > 1 else 0.0
+
+	def quantile(self, q):
+		"""Exact q-quantile (lower value) of the finite values seen so far."""
+		if not self.n:
+			return np.nan
+		cum = np.cumsum(self._counts)
+		i = np.searchsorted(cum, max(1, int(np.ceil(q*self.n))))
+		return self._keys[min(i, len(self._keys)-1)]/100
+
+	def fraction_below(self, x):
+		"""Fraction of the finite values seen so far that are < x."""
+		i = np.searchsorted(self._keys, np.rint(x*100), side='left')
+		return self._counts[:i].sum()/self.n if self.n else 0.0
+
+	def summary(self, quantiles=(0.01, 0.05, 0.5, 0.95, 0.99)):
+		return {
+			'n': self.n,
+			'nonfinite': self.nonfinite,
+			'mean': float(self.mean),
+			'std': float(np.sqrt(self.var)),
+			'min': float(self.min),
+			'max': float(self.max),
+			'quantiles': {q: float(self.quantile(q)) for q in quantiles},
+		}
+
+def montecarlo(req, design, samples=1000000, block=65536, material_cov=None, tolerances=None, seed=0):
+	"""
+	Propagates material and manufacturing uncertainty for one design.
+
+	req          : requirement set ('engine' or 'lawn_mower')
+	design       : nominal design vector (engine.design_symbols order) or dict
+	material_cov : {property: relative std} of normally distributed _fixed_pars entries;
+	               defaults to _material_cov, {} for nominal material
+	tolerances   : {design symbol: std}, in the units of the design vector (mm or ratio), of
+	               normally distributed manufacturing deviations; none by default
+	samples      : total number of samples, drawn in blocks of block
+
+	Returns a dict with summaries of total 'mass', system 'fos' and per-team
+	'component_fos', and 'p_fail', the probability that the system fos is below the
+	requirement. Results are reproducible for a given seed and block size.
+	"""
+	material_cov = _material_cov if material_cov is None else material_cov
+	tolerances = tolerances or {}
+	reqs = _global_reqs[req]
+	nominal = engine(req)
+	if isinstance(design, dict):
+		design = nominal.design(design)
+	design = np.asarray(design, dtype=float)
+	tol = np.array([tolerances.get(s, 0.0) for s in nominal.design_symbols])
+
+	stats = {'mass': running_stats(), 'fos': running_stats()}
+	component_stats = {team: running_stats() for team in nominal.roles}
+	n_fail = 0
+	rng = np.random.default_rng(seed)
+
+	done = 0
+	while done < samples:
+		n = min(block, samples-done)
+		# one draw per property, shared by every component that has it
+		draws = {key: np.maximum(1+material_cov[key]*rng.standard_normal(n), 1e-3) for key in sorted(material_cov)}
+		fixed_pars = {part.team_label: {key: value*draws[key] for key, value in part._fixed_pars.items() if key in draws}
+					  for part in nominal.parts}
+
+		designs = design+tol*rng.standard_normal((n, len(design)))
+		res = engine(req, fixed_pars).evaluate_batch(designs)
+
+		stats['mass'].update(res['mass'])
+		stats['fos'].update(res['fos'])
+		for team in nominal.roles:
+			component_stats[team].update(res['component_fos'][team])
+		n_fail += int(np.count_nonzero(res['fos'] < reqs['fos']))
+		done += n
+
+	return {
+		'samples': done,
+		'mass': stats['mass'].summary(),
+		'fos': stats['fos'].summary(),
+		'component_fos': {team: s.summary() for team, s in component_stats.items()},
+		'p_fail': n_fail/done,
+	}
@@ -0,0 +1,129 @@
+"""
+Minimum-mass engine design subject to the system fos requirement.
+
+Minimizes the unrounded total mass over the engine design vector within the inputs_min /
+inputs_max bounds of every team, subject to fos >= _global_reqs[req]['fos'] for each
+component (so the weakest link meets it too). The coupled variables D, c, t_f and ds appear
+once in the design vector and engine routes them, so their effect on every component is in
+the gradients.
+
+Method: augmented Lagrangian on the five fos constraints; each subproblem is solved on the
+bound-scaled box [0, 1]^n by projected BFGS steps on the variables not held at a bound, with
+a projected Armijo line search. Gradients are exact (see gradient.py), and every trial point
+costs one evaluation of the design.
+"""
+from global_reqs import _global_reqs
+from engine import engine
+import numpy as np
+
+class _problem(object):
+
+	def __init__(self, req):
+		self.engine = engine(req)
+		lo, hi = self.engine.bounds()
+		self.lo = np.array(lo, dtype=float)
+		self.span = np.array(hi, dtype=float)-self.lo
+		self.fos_req = _global_reqs[req]['fos']
+		self.m_scale = _global_reqs[req]['m']
+		self.evaluations = 0
+
+	def design(self, u):
+		return (self.lo+u*self.span).tolist()
+
+	def __call__(self, u):
+		"""Scaled objective, constraints (<= 0 when met) and their gradients with respect to u."""
+		self.evaluations += 1
+		mass, fos = self.engine.evaluate_gradient(self.design(u))
+		f = sum(v for v, g in mass.values())/self.m_scale
+		df = sum(g for v, g in mass.values())*self.span/self.m_scale
+		c = np.array([1-v/self.fos_req for v, g in fos.values()])
+		dc = np.array([-g/self.fos_req for v, g in fos.values()])*self.span
+		return f, df, c, dc
+
+def _lagrangian(f, df, c, dc, lam, mu):
+	p = np.maximum(0, lam+mu*c)
+	L = f+(np.sum(p*p)-np.sum(lam*lam))/(2*mu)
+	dL = df+p.dot(dc)
+	return L, dL
+
+def minimize_mass(req, x0=None, max_evals=500, tol=1e-6):
+	"""
+	Lightest design for requirement set req ('engine' or 'lawn_mower') meeting its fos.
+
+	x0           : starting design vector (engine.design_symbols order); defaults to the
+	               middle of the bounds
+	max_evals    : budget of design evaluations (each one gives values and gradients)
+	tol          : tolerance on constraint violation (relative to the fos requirement) and on
+	               the projected gradient
+
+	Returns a dict with 'design' (dict keyed by design symbol), the rounded results of
+	engine.evaluate ('mass', 'fos', 'feasible', 'component_mass', 'component_fos'),
+	'evaluations' used and 'trace', one entry per outer iteration.
+	"""
+	prob = _problem(req)
+	n = len(prob.lo)
+	u = np.full(n, 0.5) if x0 is None else np.clip((np.asarray(x0, dtype=float)-prob.lo)/prob.span, 0, 1)
+	lam = np.zeros(len(prob.engine.parts))
+	mu = 10.0
+	trace = []
+	inner_tol = 1e-2
+	f, df, c, dc = prob(u)
+	violation = np.max(np.maximum(c, 0))
+
+	while prob.evaluations < max_evals:
+		# subproblem: min L(u; lam, mu) over the box, by projected quasi-Newton steps on the
+		# variables that are not held at a bound
+		L, dL = _lagrangian(f, df, c, dc, lam, mu)
+		H = np.eye(n)
+		for inner in range(100):
+			pg = np.clip(u-dL, 0, 1)-u
+			if np.max(np.abs(pg)) < inner_tol or prob.evaluations >= max_evals:
+				break
+			free = ~(((u <= 0) & (dL > 0)) | ((u >= 1) & (dL < 0)))
+			d = np.zeros(n)
+			d[free] = -np.linalg.solve(H[np.ix_(free, free)], dL[free])
+			if dL.dot(d) >= 0:
+				H = np.eye(n)
+				d = -dL
+			t = 1.0
+			while prob.evaluations < max_evals:
+				u_new = np.clip(u+t*d, 0, 1)
+				f_new, df_new, c_new, dc_new = prob(u_new)
+				L_new, dL_new = _lagrangian(f_new, df_new, c_new, dc_new, lam, mu)
+				if L_new <= L+1e-4*dL.dot(u_new-u):
+					break
+				t *= 0.5
+			else:
+				break
+			s = u_new-u
+			y = dL_new-dL
+			sy = s.dot(y)
+			if sy > 1e-12:
+				Hs = H.dot(s)
+				H = H-np.outer(Hs, Hs)/s.dot(Hs)+np.outer(y, y)/sy
+			u, f, df, c, dc, L, dL = u_new, f_new, df_new, c_new, dc_new, L_new, dL_new
+			if np.max(np.abs(s)) < tol*1e-2:
+				break
+
+		prev_violation = violation
+		violation = np.max(np.maximum(c, 0))
+		lam = np.maximum(0, lam+mu*c)
+		trace.append({
+			'evaluations': prob.evaluations,
+			'mass': float(f*prob.m_scale),
+			'violation': float(violation),
+			'mu': mu,
+		})
+		pg = np.clip(u-_lagrangian(f, df, c, dc, lam, mu)[1], 0, 1)-u
+		if violation <= tol and np.max(np.abs(pg)) < np.sqrt(tol):
+			break
+		if violation > 0.25*prev_violation:
+			mu *= 10
+		inner_tol = max(inner_tol*0.1, tol)
+
+	design = prob.design(u)
+	res = prob.engine.evaluate(design)
+	res['design'] = dict(zip(prob.engine.design_symbols, design))
+	res['evaluations'] = prob.evaluations
+	res['trace'] = trace
+	return res
@@ -0,0 +1,78 @@
+"""
+Incremental Pareto archive trading total mass (minimized) against system fos (maximized).
+
+The front is kept sorted by mass; along it fos is strictly increasing too. A new point is
+dominated iff the heaviest archived point not heavier than it has at least its fos, so accepting
+or rejecting a point is one binary search, and the points it dominates are a contiguous run
+right after its insertion position.
+"""
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+class pareto_archive(object):
+
+	def __init__(self, fos_min=None):
+		"""fos_min: if given (e.g. _global_reqs[req]['fos']), designs below it are not archived."""
+		self.fos_min = fos_min
+		self._mass = []
+		self._fos = []
+		self._design = []
+
+	def __len__(self):
+		return len(self._mass)
+
+	def add(self, mass, fos, design=None):
+		"""Adds one design; returns True if it is on the front (for now)."""
+		if self.fos_min is not None and fos < self.fos_min:
+			return False
+		i = bisect_right(self._mass, mass)
+		if i > 0 and self._fos[i-1] >= fos:
+			return False
+		j = bisect_left(self._mass, mass, 0, i)
+		k = j
+		while k < len(self._fos) and self._fos[k] <= fos:
+			k += 1
+		self._mass[j:k] = [mass]
+		self._fos[j:k] = [fos]
+		self._design[j:k] = [design]
+		return True
+
+	def add_batch(self, mass, fos, designs=None):
+		"""
+		Adds arrays of designs; returns the number that made it onto the front. The batch is first
+		reduced to its own front with one sort, so only a handful of points reach add().
+		"""
+		mass = np.asarray(mass, dtype=float)
+		fos = np.asarray(fos, dtype=float)
+		sel = np.arange(len(mass))
+		if self.fos_min is not None:
+			sel = sel[fos >= self.fos_min]
+		if len(sel) == 0:
+			return 0
+		sel = sel[np.lexsort((-fos[sel], mass[sel]))]
+		f = fos[sel]
+		best = np.maximum.accumulate(f)
+		sel = sel[np.concatenate(([True], f[1:] > best[:-1]))]
+
+		# cheap rejection against the archive before touching the lists
+		if self._mass:
+			i = np.searchsorted(self._mass, mass[sel], side='right')
+			archived = np.asarray(self._fos)
+			prev = np.where(i > 0, archived[np.maximum(i-1, 0)], -np.inf)
+			sel = sel[fos[sel] > prev]
+
+		n = 0
+		for k in sel.tolist():
+			design = None if designs is None else designs[k]
+			if isinstance(design, np.ndarray):
+				design = design.tolist()          # don't keep the whole chunk alive
+			n += self.add(float(mass[k]), float(fos[k]), design)
+		return n
+
+	def add_chunk(self, chunk):
+		"""Sink for sweep.sweep: archives the designs of one evaluated chunk."""
+		return self.add_batch(chunk['mass'], chunk['fos'], chunk['design'])
+
+	def front(self):
+		"""Current front as a list of (mass, fos, design), lightest first."""
+		return list(zip(self._mass, self._fos, self._design))
@@ -1,7 +1,18 @@
 from math import pi,sin,cos,sqrt
 from global_reqs import *
+from global_reqs import _global_reqs_labels
+from batch import columns, round2
+from gradient import value_and_gradient
+from shared import freeze, component_setattr, component_reduce
+from interval import rounded_bounds
+from loadcase import speed_power
 
 class piston(object):
+	"""
+	Fast path: mass_si(t_H, D) and factor_of_safety_si(t_H, D) take positional floats in SI
+	units (t_H and D in meters) and return unrounded values; mass() and factor_of_safety() are
+	thin wrappers around them. Both are built per instance by _specialize.
+	"""
 
 	_fixed_pars = {
 		'Sy':275e6,  #Yield stress of the piston head material in Pa(N/m^2)
@@ -20,87 +31,99 @@ class piston(object):
 
 	roles = ['piston', 'flywheel', 'crankshaft', 'conrod', 'pistonpin']
 
-	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
-		self.team_label = self.roles[0]
-		self.input_labels = ['piston head thickness in mm', 'piston bore diameter in mm']
-		self.input_symbols = ['t_H', 'D']
-		self.inputs_min = {
-			'engine': [0.004*1000, 0.075*1000],
-			'lawn_mower': [0.002*1000, 0.040*1000]
-		}
-		self.inputs_max = {
-			'engine': [0.0105*1000, 0.105*1000],
-			'lawn_mower': [0.007*1000, 0.070*1000]
-		}
-
-		self.input_catalog = { 
-			'engine': [[4.0, 75.0],
-					 [5.62, 75.0],
-					 [7.25, 75.0],
-					 [8.88, 75.0],
-					 [10.5, 75.0],
-					 [4.0, 82.5],
-					 [5.62, 82.5],
-					 [7.25, 82.5],
-					 [8.88, 82.5],
-					 [10.5, 82.5],
-					 [4.0, 90.0],
-					 [5.62, 90.0],
-					 [7.25, 90.0],
-					 [8.88, 90.0],
-					 [10.5, 90.0],
-					 [4.0, 97.5],
-					 [5.62, 97.5],
-					 [7.25, 97.5],
-					 [8.88, 97.5],
-					 [10.5, 97.5],
-					 [4.0, 105.0],
-					 [5.62, 105.0],
-					 [7.25, 105.0],
-					 [8.88, 105.0],
-					 [10.5, 105.0]],
-			'lawn_mower': [[2.0, 40.0],
-					 [3.25, 40.0],
-					 [4.5, 40.0],
-					 [5.75, 40.0],
-					 [7.0, 40.0],
-					 [2.0, 47.5],
-					 [3.25, 47.5],
-					 [4.5, 47.5],
-					 [5.75, 47.5],
-					 [7.0, 47.5],
-					 [2.0, 55.0],
-					 [3.25, 55.0],
-					 [4.5, 55.0],
-					 [5.75, 55.0],
-					 [7.0, 55.0],
-					 [2.0, 62.5],
-					 [3.25, 62.5],
-					 [4.5, 62.5],
-					 [5.75, 62.5],
-					 [7.0, 62.5],
-					 [2.0, 70.0],
-					 [3.25, 70.0],
-					 [4.5, 70.0],
-					 [5.75, 70.0],
-					 [7.0, 70.0]]
-		}
-
-		self.outside_input_labels = {
-		}
-		self.outside_input_symbols = {
-		}
-		self.outside_inputs_min = {
-			'engine':0,
-			'lawn_mower':0
-		}
-		self.outside_inputs_max = {
-			'engine':0,
-			'lawn_mower':0
-		}
+	# divisors taking input_symbols + outside_input_symbols to the SI arguments of _fos/_mass
+	_arg_scales = [1000, 1000]
+
+	# geometric constraints checked by _violations before evaluation (none)
+	constraints = ()
+
+	# instance attributes: requirements, fixed parameters and the kernels built by _specialize
+	__slots__ = tuple(dict.fromkeys(list(_global_reqs_labels)+list(_fixed_pars)+['_fos', '_mass', 'mass_si', 'factor_of_safety_si']))
+	__setattr__ = component_setattr       # read-only once built, see shared.py
+	__reduce__ = component_reduce
+
+	team_label = roles[0]
+	input_labels = freeze(['piston head thickness in mm', 'piston bore diameter in mm'])
+	input_symbols = freeze(['t_H', 'D'])
+	inputs_min = freeze({
+		'engine': [0.004*1000, 0.075*1000],
+		'lawn_mower': [0.002*1000, 0.040*1000]
+	})
+	inputs_max = freeze({
+		'engine': [0.0105*1000, 0.105*1000],
+		'lawn_mower': [0.007*1000, 0.070*1000]
+	})
+
+	input_catalog = freeze({
+		'engine': [[4.0, 75.0],
+				 [5.62, 75.0],
+				 [7.25, 75.0],
+				 [8.88, 75.0],
+				 [10.5, 75.0],
+				 [4.0, 82.5],
+				 [5.62, 82.5],
+				 [7.25, 82.5],
+				 [8.88, 82.5],
+				 [10.5, 82.5],
+				 [4.0, 90.0],
+				 [5.62, 90.0],
+				 [7.25, 90.0],
+				 [8.88, 90.0],
+				 [10.5, 90.0],
+				 [4.0, 97.5],
+				 [5.62, 97.5],
+				 [7.25, 97.5],
+				 [8.88, 97.5],
+				 [10.5, 97.5],
+				 [4.0, 105.0],
+				 [5.62, 105.0],
+				 [7.25, 105.0],
+				 [8.88, 105.0],
+				 [10.5, 105.0]],
+		'lawn_mower': [[2.0, 40.0],
+				 [3.25, 40.0],
+				 [4.5, 40.0],
+				 [5.75, 40.0],
+				 [7.0, 40.0],
+				 [2.0, 47.5],
+				 [3.25, 47.5],
+				 [4.5, 47.5],
+				 [5.75, 47.5],
+				 [7.0, 47.5],
+				 [2.0, 55.0],
+				 [3.25, 55.0],
+				 [4.5, 55.0],
+				 [5.75, 55.0],
+				 [7.0, 55.0],
+				 [2.0, 62.5],
+				 [3.25, 62.5],
+				 [4.5, 62.5],
+				 [5.75, 62.5],
+				 [7.0, 62.5],
+				 [2.0, 70.0],
+				 [3.25, 70.0],
+				 [4.5, 70.0],
+				 [5.75, 70.0],
+				 [7.0, 70.0]]
+	})
+
+	outside_input_labels = freeze({
+	})
+	outside_input_symbols = freeze({
+	})
+	outside_inputs_min = freeze({
+		'engine':0,
+		'lawn_mower':0
+	})
+	outside_inputs_max = freeze({
+		'engine':0,
+		'lawn_mower':0
+	})
 
+	def __init__(self, global_reqs, _fixed_pars=_fixed_pars):
 		for key, value in {**global_reqs, **_fixed_pars}.items():
-			setattr(self, key, value)
+			if key in self.__slots__:         # other keys (e.g. extra requirement fields) are not used by the model
+				setattr(self, key, value)
 
 		"""
 		Variables: 
@@ -117,33 +140,98 @@ class piston(object):
 		# ED = self.ED*0.001                     # Engine displacement in m^3
 		# Vd = ED/self.NC                        # Displacement volume in m^3       
 
+		self._specialize()
+
+	def _specialize(self):
+		"""
+		Builds _fos(t_H, D) and _mass(t_H, D) for this requirement set: unrounded fos and mass
+		for t_H and D in meters, as floats or NumPy arrays. Everything that only depends on the
+		requirements and fixed parameters is computed here once (see Fast-path kernels in README).
+		"""
+		N, P_b, P_b2 = speed_power(self.N, self.T)     # rad/s, brake power in Watts, 2*P_b (shared, see loadcase.py)
+		LDr = self.LDr                               # Stroke-to-bore ratio. typically, stroke = [1.25D to 2D] in meters 
+		Sy = self.Sy
+		k_p = (pi/4)*self.rho_piston
+		NC = self.NC
+
+		def _fos(t_H, D):
+			Vd = pi*(D*D*D)*LDr/4
+			# D = ceil(1000*((4*Vd/(pi*LDr))**(1/3)))/1000  # bore diameter in m.
+			mep = P_b2/(N*Vd)                # brake mean effective pressure in Pa
+			
+			"""piston subassembly"""
+			
+			p_max = 9.5*mep                          # max pressure = 9-10 times mep in Pa
+
+			fos_y = 16*(t_H*t_H)*Sy/(3*p_max*(D*D))    # yield fos against bending
+			return fos_y
+
+		def _mass(t_H, D):
+			"""piston subassembly"""
+			
+			L_p = 1.25*D                             # Piston length = 1-1.5 times D in meters
+
+			t_D = D-2*t_H
+			m_p = k_p*((D*D)*L_p-(t_D*t_D)*(L_p-t_H))  # mass of piston head in Kgs.
+			return NC*m_p
+
+		self._fos = _fos
+		self._mass = _mass
+		self.mass_si = _mass
+		self.factor_of_safety_si = _fos
+
 	def factor_of_safety(self, x, outside_x):
 		t_H = x['t_H']/1000
 		D = x['D']/1000
 
-		N = self.N*(pi/30)                     # output rpm; rpm to rad/s
-		LDr = self.LDr                               # Stroke-to-bore ratio. typically, stroke = [1.25D to 2D] in meters 
-		
-		Vd = pi*D**3*LDr/4
-		# D = ceil(1000*((4*Vd/(pi*LDr))**(1/3)))/1000  # bore diameter in m.
-		P_b = N*self.T                         # brake power in Watts
-		mep = 2*P_b/(N*Vd)                # brake mean effective pressure in Pa
-		
-		"""piston subassembly"""
-		
-		p_max = 9.5*mep                          # max pressure = 9-10 times mep in Pa
-		L_p = self.LDr*D                             # Piston length = 1-1.5 times D in meters
-
-		fos_y = 16*(t_H**2)*self.Sy/(3*p_max*D**2)    # yield fos against bending
-		return round(fos_y,2)
+		return round(self.factor_of_safety_si(t_H, D),2)
 
 	def mass(self, x, outside_x):
 		t_H = x['t_H']/1000
 		D = x['D']/1000
 
-		"""piston subassembly"""
-		
-		L_p = 1.25*D                             # Piston length = 1-1.5 times D in meters
+		return round(self.mass_si(t_H, D),2)
+
+	def factor_of_safety_batch(self, x, outside_x=None):
+		"""
+		Vectorized factor_of_safety: x holds arrays of t_H and D in mm (see batch.columns).
+		Returns an array equal element-wise to the scalar results.
+		"""
+		t_H, D = columns(x, self.input_symbols)
+		return round2(self._fos(t_H/1000, D/1000))
+
+	def mass_batch(self, x, outside_x=None):
+		"""
+		Vectorized mass: x holds arrays of t_H and D in mm (see batch.columns).
+		Returns an array equal element-wise to the scalar results.
+		"""
+		t_H, D = columns(x, self.input_symbols)
+		return round2(self._mass(t_H/1000, D/1000))
 
-		m_p = (pi/4)*self.rho_piston*((D**2)*L_p-((D-2*t_H)**2)*(L_p-t_H))  # mass of piston head in Kgs.
-		return round(self.NC*m_p,2)
\ No newline at end of file
+	def mass_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded mass with respect to each input and outside input, as a
+		dict keyed by symbol (kg per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._mass, self, x, outside_x)[1]
+
+	def factor_of_safety_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded factor of safety with respect to each input and outside
+		input, as a dict keyed by symbol (per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._fos, self, x, outside_x)[1]
+
+	def mass_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of mass() over a box: x_box and outside_box map each
+		input and outside input to (lo, hi), or a single value, in mm (see interval.py).
+		"""
+		return rounded_bounds(self._mass, self, x_box, outside_box)
+
+	def factor_of_safety_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of factor_of_safety() over a box, given as for
+		mass_bounds.
+		"""
+		return rounded_bounds(self._fos, self, x_box, outside_box)
@@ -1,7 +1,19 @@
 from math import pi,sin,cos,sqrt
 from global_reqs import *
+from global_reqs import _global_reqs_labels
+from batch import columns, round2
+from gradient import value_and_gradient
+from shared import freeze, component_setattr, component_reduce
+from interval import rounded_bounds
+from loadcase import load_case_kernel
 
 class pistonpin(object):
+	"""
+	Fast path: mass_si(r2, r3, D) and factor_of_safety_si(r2, r3, D) take positional floats in
+	SI units (r2 and r3 as ratios, D in meters) and return unrounded values; mass() and
+	factor_of_safety() are thin wrappers around them. Both are built per instance by
+	_specialize.
+	"""
 
 	_fixed_pars = {
 		'Sb': 140e6,  	# Yield stress of the piston head material in Pa(N/m^2)
@@ -26,85 +38,97 @@ class pistonpin(object):
 
 	roles = ['piston', 'flywheel', 'crankshaft', 'conrod', 'pistonpin']
 
-	def __init__(self, global_reqs,  _fixed_pars=_fixed_pars):
-		self.team_label = self.roles[4]
-		self.input_labels = ['piston-pin length to piston diameter ratio, l1/D,', 'piston-pin inner diameter to pin outer diameter ratio, do/di,']
-		self.input_symbols = ['r2', 'r3']
-		self.inputs_min = {
-			'engine': [0.700, 0.300],
-			'lawn_mower': [0.500, 0.2]
-		}
-		self.inputs_max =  {
-			'engine': [0.900, 0.800],
-			'lawn_mower': [0.95, 0.8]
-		}
-
-		self.outside_input_labels = ['piston bore diameter in mm']
-		self.outside_input_symbols = ['D']
-		self.outside_inputs_min = {
-			'engine':[0.075*1000],
-			'lawn_mower': [0.040*1000]
-		}
-		self.outside_inputs_max =  {
-			'engine': [0.105*1000],
-			'lawn_mower': [0.070*1000]
-		}
-
-		self.input_catalog = { 
-			'engine': [[0.7, 0.3],
-				 [0.75, 0.3],
-				 [0.8, 0.3],
-				 [0.85, 0.3],
-				 [0.9, 0.3],
-				 [0.7, 0.42],
-				 [0.75, 0.42],
-				 [0.8, 0.42],
-				 [0.85, 0.42],
-				 [0.9, 0.42],
-				 [0.7, 0.55],
-				 [0.75, 0.55],
-				 [0.8, 0.55],
-				 [0.85, 0.55],
-				 [0.9, 0.55],
-				 [0.7, 0.68],
-				 [0.75, 0.68],
-				 [0.8, 0.68],
-				 [0.85, 0.68],
-				 [0.9, 0.68],
-				 [0.7, 0.8],
-				 [0.75, 0.8],
-				 [0.8, 0.8],
-				 [0.85, 0.8],
-				 [0.9, 0.8]],
-			'lawn_mower': [[0.5, 0.2],
-				 [0.61, 0.2],
-				 [0.72, 0.2],
-				 [0.84, 0.2],
-				 [0.95, 0.2],
-				 [0.5, 0.35],
-				 [0.61, 0.35],
-				 [0.72, 0.35],
-				 [0.84, 0.35],
-				 [0.95, 0.35],
-				 [0.5, 0.5],
-				 [0.61, 0.5],
-				 [0.72, 0.5],
-				 [0.84, 0.5],
-				 [0.95, 0.5],
-				 [0.5, 0.65],
-				 [0.61, 0.65],
-				 [0.72, 0.65],
-				 [0.84, 0.65],
-				 [0.95, 0.65],
-				 [0.5, 0.8],
-				 [0.61, 0.8],
-				 [0.72, 0.8],
-				 [0.84, 0.8],
-				 [0.95, 0.8]]
-		}
+	# divisors taking input_symbols + outside_input_symbols to the SI arguments of _fos/_mass
+	_arg_scales = [1, 1, 1000]
+
+	# geometric constraints checked by _violations before evaluation
+	constraints = ('pistonpin_diameter',)
+
+	# instance attributes: requirements, fixed parameters and the kernels built by _specialize
+	__slots__ = tuple(dict.fromkeys(list(_global_reqs_labels)+list(_fixed_pars)+['_load_case', '_fos', '_mass', '_violations', 'mass_si', 'factor_of_safety_si']))
+	__setattr__ = component_setattr       # read-only once built, see shared.py
+	__reduce__ = component_reduce
+
+	team_label = roles[4]
+	input_labels = freeze(['piston-pin length to piston diameter ratio, l1/D,', 'piston-pin inner diameter to pin outer diameter ratio, do/di,'])
+	input_symbols = freeze(['r2', 'r3'])
+	inputs_min = freeze({
+		'engine': [0.700, 0.300],
+		'lawn_mower': [0.500, 0.2]
+	})
+	inputs_max = freeze({
+		'engine': [0.900, 0.800],
+		'lawn_mower': [0.95, 0.8]
+	})
+
+	outside_input_labels = freeze(['piston bore diameter in mm'])
+	outside_input_symbols = freeze(['D'])
+	outside_inputs_min = freeze({
+		'engine':[0.075*1000],
+		'lawn_mower': [0.040*1000]
+	})
+	outside_inputs_max = freeze({
+		'engine': [0.105*1000],
+		'lawn_mower': [0.070*1000]
+	})
+
+	input_catalog = freeze({
+		'engine': [[0.7, 0.3],
+			 [0.75, 0.3],
+			 [0.8, 0.3],
+			 [0.85, 0.3],
+			 [0.9, 0.3],
+			 [0.7, 0.42],
+			 [0.75, 0.42],
+			 [0.8, 0.42],
+			 [0.85, 0.42],
+			 [0.9, 0.42],
+			 [0.7, 0.55],
+			 [0.75, 0.55],
+			 [0.8, 0.55],
+			 [0.85, 0.55],
+			 [0.9, 0.55],
+			 [0.7, 0.68],
+			 [0.75, 0.68],
+			 [0.8, 0.68],
+			 [0.85, 0.68],
+			 [0.9, 0.68],
+			 [0.7, 0.8],
+			 [0.75, 0.8],
+			 [0.8, 0.8],
+			 [0.85, 0.8],
+			 [0.9, 0.8]],
+		'lawn_mower': [[0.5, 0.2],
+			 [0.61, 0.2],
+			 [0.72, 0.2],
+			 [0.84, 0.2],
+			 [0.95, 0.2],
+			 [0.5, 0.35],
+			 [0.61, 0.35],
+			 [0.72, 0.35],
+			 [0.84, 0.35],
+			 [0.95, 0.35],
+			 [0.5, 0.5],
+			 [0.61, 0.5],
+			 [0.72, 0.5],
+			 [0.84, 0.5],
+			 [0.95, 0.5],
+			 [0.5, 0.65],
+			 [0.61, 0.65],
+			 [0.72, 0.65],
+			 [0.84, 0.65],
+			 [0.95, 0.65],
+			 [0.5, 0.8],
+			 [0.61, 0.8],
+			 [0.72, 0.8],
+			 [0.84, 0.8],
+			 [0.95, 0.8]]
+	})
 
+	def __init__(self, global_reqs,  _fixed_pars=_fixed_pars):
 		for key, value in {**global_reqs, **_fixed_pars}.items():
-			setattr(self, key, value)
+			if key in self.__slots__:         # other keys (e.g. extra requirement fields) are not used by the model
+				setattr(self, key, value)
 
 		"""
 			Variables: 
@@ -116,49 +140,132 @@ class pistonpin(object):
 			rho_pp       : density of piston pin material in kg/m^3
 		"""
 
+		self._specialize()
 
-	def get_Fl_pmax(self, D):
-		N = self.N*(pi/30)                     # output rpm; rpm to rad/s
-		L = self.LDr*D                         # stroke = [1.25D to 2D] in meters
-		r = L/2                           # crank length in meters   
-		Vd = (pi/4)*(D**2)*L              # displaced volume in m^3
-		P_b = N*self.T                         # brake power in Watts
-		mep = 2*P_b/(N*Vd)                # brake mean effective pressure in Pa
-		p_max = 9.5*mep                   # max pressure = 9-10 times mep in Pa
-		Fl = p_max*(pi/4)*D**2            # max. gas force on the piston (Fl=Fp=Fc) in N
 
+	def get_Fl_pmax(self, D):
+		Fl, p_max, r = self._load_case(D)     # shared gas load case, see loadcase.py
 		return Fl, p_max
 
+	def _specialize(self):
+		"""
+		Builds _fos(r2, r3, D) and _mass(r2, r3, D) for this requirement set: unrounded fos and
+		mass for D in meters, as floats or NumPy arrays. Requirement-only constants are folded
+		in here once (see Fast-path kernels in README).
+		load: optional (Fl, p_max, r) of the gas load case for D, already computed by the caller
+		(engine.evaluate_batch computes it once for all parts).
+		"""
+		load_case = self._load_case = load_case_kernel(self.N, self.T, self.LDr)
+		Sb = self.Sb
+		k_pp = self.rho_pp*(pi/4)
+		NC = self.NC
+		p_b1 = 10e6                        # bearing pressure of bronze bushing in Pa
+
+		def _fos(r2, r3, D, load=None):
+			Fl, p_max, r = load_case(D) if load is None else load
+
+			"""piston pin"""
+			
+			l1 = r2*D                        # length of piston pin taken as 0.45 times diameter in meters
+			d0 =Fl/(p_b1*l1)                  # OD of piston pin in meters
+			
+			M_max = (pi/32)*p_max*(D*D*D)         # max bending moment in N-m
+			di = r3*d0                        # inner diameter of piston pin in meters
+			d0_2 = d0*d0
+			di_2 = di*di
+			Z = (pi/32)*(d0_2*d0_2-di_2*di_2)/d0       # section modulus in m^3
+			fos_pp = Sb/(M_max/Z)              # fos against bending 
+			return fos_pp
+
+		def _mass(r2, r3, D, load=None):
+			Fl, p_max, r = load_case(D) if load is None else load
+
+			"""piston pin"""
+			l1 = r2*D                        # length of piston pin taken as 0.45 times diameter in meters
+			d0 =Fl/(p_b1*l1)                  # OD of piston pin in meters
+			di = r3*d0                        # inner diameter of piston pin in meters
+			mass_pp = k_pp*l1*(d0*d0-di*di)               # mass piston pin in kgs. 
+			return NC*mass_pp
+
+		def _violations(r2, r3, D):
+			Fl, p_max, r = load_case(D)
+			d0 = Fl/(p_b1*(r2*D))              # OD of piston pin in meters
+			# pin wider than the bore it sits in
+			return {'pistonpin_diameter': d0 > D}
+
+		self._fos = _fos
+		self._mass = _mass
+		self.mass_si = _mass
+		self.factor_of_safety_si = _fos
+		self._violations = _violations
+
 	def factor_of_safety(self, x, outside_x):
 		r2 = x['r2']
 		r3 = x['r3']
 		D = outside_x['D']/1000
 
-		Fl, p_max = self.get_Fl_pmax(D)
-
-		"""piston pin"""
-		
-		l1 = r2*D                        # length of piston pin taken as 0.45 times diameter in meters
-		p_b1 = 10e6                        # bearing pressure of bronze bushing in Pa
-		d0 =Fl/(p_b1*l1)                  # OD of piston pin in meters
-		
-		M_max = (pi/32)*p_max*D**3         # max bending moment in N-m
-		di = r3*d0                        # inner diameter of piston pin in meters
-		Z = (pi/32)*(d0**4-di**4)/d0       # section modulus in m^3
-		fos_pp = self.Sb/(M_max/Z)              # fos against bending 
-		return round(fos_pp,2)
+		return round(self.factor_of_safety_si(r2, r3, D),2)
 
 	def mass(self, x, outside_x):
 		r2 = x['r2']
 		r3 = x['r3']
 		D = outside_x['D']/1000
 
-		Fl, p_max = self.get_Fl_pmax(D)
+		return round(self.mass_si(r2, r3, D),2)
 
-		"""piston pin"""
-		l1 = r2*D                        # length of piston pin taken as 0.45 times diameter in meters
-		p_b1 = 10e6                        # bearing pressure of bronze bushing in Pa
-		d0 =Fl/(p_b1*l1)                  # OD of piston pin in meters
-		di = r3*d0                        # inner diameter of piston pin in meters
-		mass_pp = self.rho_pp*(pi/4)*l1*(d0**2-di**2)               # mass piston pin in kgs. 
-		return round(self.NC*mass_pp,2)
\ No newline at end of file
+	def factor_of_safety_batch(self, x, outside_x, load=None):
+		"""
+		Vectorized factor_of_safety: x holds arrays of r2 and r3, outside_x an array of D in mm
+		(see batch.columns). Returns an array equal element-wise to the scalar results.
+		load: optional precomputed gas load case for D (see _specialize)
+		"""
+		r2, r3 = columns(x, self.input_symbols)
+		D, = columns(outside_x, self.outside_input_symbols)
+		return round2(self._fos(r2, r3, D/1000, load))
+
+	def mass_batch(self, x, outside_x, load=None):
+		"""
+		Vectorized mass: x holds arrays of r2 and r3, outside_x an array of D in mm
+		(see batch.columns). Returns an array equal element-wise to the scalar results.
+		load: optional precomputed gas load case for D (see _specialize)
+		"""
+		r2, r3 = columns(x, self.input_symbols)
+		D, = columns(outside_x, self.outside_input_symbols)
+		return round2(self._mass(r2, r3, D/1000, load))
+
+	def mass_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded mass with respect to each input and outside input, as a
+		dict keyed by symbol (kg per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._mass, self, x, outside_x)[1]
+
+	def factor_of_safety_gradient(self, x, outside_x):
+		"""
+		Derivatives of the unrounded factor of safety with respect to each input and outside
+		input, as a dict keyed by symbol (per mm for inputs given in mm).
+		"""
+		return value_and_gradient(self._fos, self, x, outside_x)[1]
+
+	def mass_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of mass() over a box: x_box and outside_box map each
+		input and outside input to (lo, hi), or a single value, in mm (see interval.py).
+		"""
+		return rounded_bounds(self._mass, self, x_box, outside_box)
+
+	def factor_of_safety_bounds(self, x_box, outside_box):
+		"""
+		Guaranteed lower and upper bound of factor_of_safety() over a box, given as for
+		mass_bounds.
+		"""
+		return rounded_bounds(self._fos, self, x_box, outside_box)
+
+	def violations_batch(self, x, outside_x):
+		"""
+		Vectorized check of the geometric constraints in constraints, with x and outside_x as
+		for mass_batch. Returns {reason: bool array}, True where the design violates it.
+		"""
+		r2, r3 = columns(x, self.input_symbols)
+		D, = columns(outside_x, self.outside_input_symbols)
+		return self._violations(r2, r3, D/1000)
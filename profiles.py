@@ -0,0 +1,310 @@
+"""
+Requirement profiles: named requirement sets beyond the built-in 'engine' and 'lawn_mower',
+loaded from JSON files, validated and registered into the same tables the built-in ones live
+in (_global_reqs, _initial_global_pars, the components' inputs_min/inputs_max,
+outside_inputs_min/outside_inputs_max and input_catalog), so that engine, sweep, optimize,
+stream and the server accept their names like any other.
+
+A profile file holds
+
+	name           : profile name (default: the file name without .json)
+	requirements   : N, T, NC, P, LDr, m and fos, as in _global_reqs
+	initial_pars   : D, c, t_f and ds in mm, as in _initial_global_pars
+	inputs         : per team, {"min": [...], "max": [...]} in the order of its input_symbols
+	outside_inputs : optional, per team, {"min": [...], "max": [...]} in the order of its
+	                 outside_input_symbols (default: the owning team's input bounds)
+	catalogs       : optional, per team, a list of input rows (default: a 5-level full
+	                 factorial over the input bounds, as the built-in catalogs are)
+	mass_scale     : rating level: [lo, hi] total mass in kg, as in _mass_scale (scoring and the
+	                 evaluation server rate every profile with it)
+
+The requirement-derived constants (angular speed, brake power, the flywheel's energy
+fluctuation, see loadcase.derived_constants) are computed once per profile at registration
+and kept by profile hash, so profiles with the same data share one record.
+"""
+import os
+import json
+import hashlib
+from math import isfinite
+from global_reqs import _global_reqs, _global_reqs_labels, _initial_global_pars, _global_pars_labels, _mass_scale
+from loadcase import derived_constants
+from shared import freeze
+from piston import piston
+from flywheel import flywheel
+from crankshaft import crankshaft
+from conrod import conrod
+from pistonpin import pistonpin
+
+components = [piston, flywheel, crankshaft, conrod, pistonpin]
+_builtin = ('engine', 'lawn_mower')
+_levels = 5
+
+_names = {}                   # profile name: profile hash
+_records = {}                 # profile hash: read-only profile record (see get)
+
+def _number(value):
+	return isinstance(value, (int, float)) and not isinstance(value, bool) and isfinite(value)
+
+def _owner(symbol):
+	for cls in components:
+		if symbol in cls.input_symbols:
+			return cls
+
+def grid_catalog(lo, hi, levels=_levels):
+	"""Full-factorial catalog over lo..hi, first input varying fastest, values rounded to 0.01."""
+	rows = [[]]
+	for a, b in zip(lo, hi):
+		values = [round(a+(b-a)*k/(levels-1), 2) for k in range(levels)]
+		rows = [row+[v] for v in values for row in rows]
+	return rows
+
+def profile_data(name):
+	"""Profile dict (the file format above, all fields filled in) of a registered or built-in profile."""
+	return {
+		'name': name,
+		'requirements': dict(_global_reqs[name]),
+		'initial_pars': dict(_initial_global_pars[name]),
+		'inputs': {cls.team_label: {'min': list(cls.inputs_min[name]), 'max': list(cls.inputs_max[name])}
+				   for cls in components},
+		'outside_inputs': {cls.team_label: {'min': list(cls.outside_inputs_min[name]), 'max': list(cls.outside_inputs_max[name])}
+						   for cls in components if cls.outside_input_symbols},
+		'catalogs': {cls.team_label: [list(row) for row in cls.input_catalog[name]] for cls in components},
+		'mass_scale': {level: list(span) for level, span in _mass_scale[name].items()},
+	}
+
+def profile_hash(data):
+	"""SHA-1 of the canonical JSON of a profile dict, name excluded."""
+	data = {key: value for key, value in data.items() if key != 'name'}
+	text = json.dumps(data, sort_keys=True, separators=(',', ':'))
+	return hashlib.sha1(text.encode()).hexdigest()
+
+def _check_bounds(problems, where, bounds, n):
+	if not isinstance(bounds, dict) or set(bounds) != {'min', 'max'}:
+		problems.append('%s: expected {"min": [...], "max": [...]}' % where)
+		return False
+	for key in ['min', 'max']:
+		values = bounds[key]
+		if not isinstance(values, list) or len(values) != n or not all(_number(v) for v in values):
+			problems.append('%s.%s: expected %d numbers' % (where, key, n))
+			return False
+	for i, (lo, hi) in enumerate(zip(bounds['min'], bounds['max'])):
+		if not 0 <= lo <= hi:
+			problems.append('%s: need 0 <= min <= max, got %r, %r at position %d' % (where, lo, hi, i))
+	return True
+
+def validate(data):
+	"""List of the problems of a profile dict (empty if it can be registered)."""
+	problems = []
+	name = data.get('name')
+	if not isinstance(name, str) or not name.isidentifier():
+		problems.append('name: expected an identifier, got %r' % (name,))
+	elif name in _builtin:
+		problems.append('name: %r is a built-in profile' % name)
+	for key in data:
+		if key not in ('name', 'requirements', 'initial_pars', 'inputs', 'outside_inputs', 'catalogs', 'mass_scale'):
+			problems.append('unknown field %r' % key)
+
+	reqs = data.get('requirements')
+	if not isinstance(reqs, dict) or set(reqs) != set(_global_reqs_labels):
+		problems.append('requirements: expected exactly %s' % ', '.join(_global_reqs_labels))
+	else:
+		for key, value in reqs.items():
+			if not _number(value) or value <= 0:
+				problems.append('requirements.%s: expected a positive number, got %r' % (key, value))
+		if not isinstance(reqs['NC'], int) or isinstance(reqs['NC'], bool):
+			problems.append('requirements.NC: expected a whole number of cylinders, got %r' % (reqs['NC'],))
+
+	pars = data.get('initial_pars')
+	if not isinstance(pars, dict) or set(pars) != set(_global_pars_labels):
+		problems.append('initial_pars: expected exactly %s' % ', '.join(_global_pars_labels))
+		pars = None
+	else:
+		for key, value in pars.items():
+			if not _number(value) or value <= 0:
+				problems.append('initial_pars.%s: expected a positive number, got %r' % (key, value))
+				pars = None
+
+	inputs = data.get('inputs')
+	valid = {}
+	if not isinstance(inputs, dict):
+		problems.append('inputs: expected bounds for %s' % ', '.join(cls.team_label for cls in components))
+	else:
+		for team in inputs:
+			if team not in [cls.team_label for cls in components]:
+				problems.append('inputs: unknown team %r' % team)
+		for cls in components:
+			if cls.team_label not in inputs:
+				problems.append('inputs: missing %s' % cls.team_label)
+			elif _check_bounds(problems, 'inputs.%s' % cls.team_label, inputs[cls.team_label], len(cls.input_symbols)):
+				valid[cls.team_label] = inputs[cls.team_label]
+	if pars is not None:
+		# the initial design has to lie inside the owning team's bounds
+		for key, value in pars.items():
+			cls = _owner(key)
+			if cls.team_label in valid:
+				i = cls.input_symbols.index(key)
+				lo, hi = valid[cls.team_label]['min'][i], valid[cls.team_label]['max'][i]
+				if not lo <= value <= hi:
+					problems.append('initial_pars.%s: %r outside the %s bounds [%r, %r]' % (key, value, cls.team_label, lo, hi))
+
+	outside = data.get('outside_inputs') or {}
+	if not isinstance(outside, dict):
+		problems.append('outside_inputs: expected bounds per team')
+		outside = {}
+	for team, bounds in outside.items():
+		cls = [cls for cls in components if cls.team_label == team]
+		if not cls or not cls[0].outside_input_symbols:
+			problems.append('outside_inputs: %r is not a team with outside inputs' % team)
+		else:
+			_check_bounds(problems, 'outside_inputs.%s' % team, bounds, len(cls[0].outside_input_symbols))
+
+	catalogs = data.get('catalogs') or {}
+	if not isinstance(catalogs, dict):
+		problems.append('catalogs: expected input rows per team')
+		catalogs = {}
+	for team, rows in catalogs.items():
+		if team not in valid:
+			problems.append('catalogs: %r is not a team with valid input bounds' % team)
+			continue
+		lo, hi = valid[team]['min'], valid[team]['max']
+		if not isinstance(rows, list) or not rows:
+			problems.append('catalogs.%s: expected a list of input rows' % team)
+			continue
+		for j, row in enumerate(rows):
+			if (not isinstance(row, list) or len(row) != len(lo) or not all(_number(v) for v in row)
+					or not all(a <= v <= b for v, a, b in zip(row, lo, hi))):
+				problems.append('catalogs.%s[%d]: expected %d numbers within the input bounds, got %r' % (team, j, len(lo), row))
+
+	scale = data.get('mass_scale')
+	if scale is None:
+		problems.append('mass_scale: missing (scoring needs it)')
+	elif not isinstance(scale, dict) or not scale:
+		problems.append('mass_scale: expected {level: [lo, hi]}')
+	else:
+		for level, span in scale.items():
+			if not str(level).isdigit():
+				problems.append('mass_scale: level %r is not a whole number' % (level,))
+			if not isinstance(span, list) or len(span) != 2 or not all(_number(v) for v in span) or span[0] > span[1]:
+				problems.append('mass_scale.%s: expected [lo, hi], got %r' % (level, span))
+	return problems
+
+def _complete(data):
+	# fill in the optional fields, so that equal profiles hash equal however they were written
+	data = json.loads(json.dumps(data))
+	inputs = data['inputs']
+	outside = data.get('outside_inputs') or {}
+	catalogs = data.get('catalogs') or {}
+	for cls in components:
+		team = cls.team_label
+		if cls.outside_input_symbols and team not in outside:
+			bounds = {'min': [], 'max': []}
+			for s in cls.outside_input_symbols:
+				owner = inputs[_owner(s).team_label]
+				i = _owner(s).input_symbols.index(s)
+				bounds['min'].append(owner['min'][i])
+				bounds['max'].append(owner['max'][i])
+			outside[team] = bounds
+		if team not in catalogs:
+			catalogs[team] = grid_catalog(inputs[team]['min'], inputs[team]['max'])
+	data['outside_inputs'] = outside
+	data['catalogs'] = catalogs
+	data['mass_scale'] = {int(level): span for level, span in data['mass_scale'].items()}
+	return data
+
+_tables = ('inputs_min', 'inputs_max', 'outside_inputs_min', 'outside_inputs_max', 'input_catalog')
+
+def _set(cls, attribute, name, value):
+	# the class-level tables are frozen_dicts (see shared.py): replace them, extended
+	setattr(cls, attribute, freeze({**getattr(cls, attribute), name: value}))
+
+def register(data, replace=False):
+	"""
+	Validates the profile dict data and registers it under data['name']. Registering the same
+	data again is a no-op; different data under a registered name needs replace=True.
+	Returns the profile record (see get). Raises ValueError listing every problem found.
+	"""
+	problems = validate(data)
+	if problems:
+		raise ValueError('invalid profile %r:\n  %s' % (data.get('name'), '\n  '.join(problems)))
+	name = data['name']
+	data = _complete(data)
+	key = profile_hash(data)
+	if name in _names:
+		if _names[name] == key:
+			return _records[key]
+		if not replace:
+			raise ValueError('profile %r is already registered with different data' % name)
+
+	_global_reqs[name] = dict(data['requirements'])
+	_initial_global_pars[name] = dict(data['initial_pars'])
+	_mass_scale[name] = {level: list(span) for level, span in sorted(data['mass_scale'].items())}
+	for cls in components:
+		team = cls.team_label
+		_set(cls, 'inputs_min', name, data['inputs'][team]['min'])
+		_set(cls, 'inputs_max', name, data['inputs'][team]['max'])
+		_set(cls, 'outside_inputs_min', name, data['outside_inputs'][team]['min'] if cls.outside_input_symbols else 0)
+		_set(cls, 'outside_inputs_max', name, data['outside_inputs'][team]['max'] if cls.outside_input_symbols else 0)
+		_set(cls, 'input_catalog', name, data['catalogs'][team])
+	_names[name] = key
+	return _record(key, data)
+
+def unregister(name):
+	"""
+	Removes the registered profile name from every table register added it to. Engines built
+	for it elsewhere (e.g. cached by stream or sweep workers) are not tracked here.
+	"""
+	if name in _builtin:
+		raise ValueError('built-in profile %r cannot be removed' % name)
+	if name not in _names:
+		raise KeyError('unknown profile %r' % name)
+	key = _names.pop(name)
+	del _global_reqs[name], _initial_global_pars[name], _mass_scale[name]
+	for cls in components:
+		for attribute in _tables:
+			setattr(cls, attribute, freeze({k: v for k, v in getattr(cls, attribute).items() if k != name}))
+	if key not in _names.values():
+		_records.pop(key, None)
+
+def _record(key, data):
+	if key not in _records:
+		reqs = data['requirements']
+		fixed = flywheel._fixed_pars
+		_records[key] = freeze({
+			'hash': key,
+			'requirements': reqs,
+			'initial_pars': data['initial_pars'],
+			'derived': derived_constants(reqs['N'], reqs['T'], reqs['P'], fixed['n_m'], fixed['f_p']),
+		})
+	return _records[key]
+
+def get(name):
+	"""
+	Read-only record of the profile name (built-in or registered): its hash, requirements,
+	initial_pars and derived constants (loadcase.derived_constants, with the components'
+	default mechanical efficiency and speed fluctuation).
+	"""
+	if name not in _names:
+		if name not in _builtin:
+			raise KeyError('unknown profile %r' % name)
+		_names[name] = profile_hash(profile_data(name))
+	key = _names[name]
+	return _records[key] if key in _records else _record(key, profile_data(name))
+
+def names():
+	"""Names of all profiles, built-in first."""
+	return list(_builtin)+sorted(name for name in _names if name not in _builtin)
+
+def load(path, replace=False):
+	"""Registers the profile in the JSON file path. Returns its name."""
+	with open(path) as f:
+		data = json.load(f)
+	data.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+	try:
+		register(data, replace)
+	except ValueError as e:
+		raise ValueError('%s: %s' % (path, e))
+	return data['name']
+
+def load_dir(directory, replace=False):
+	"""Registers every *.json profile in directory, in name order. Returns their names."""
+	return [load(os.path.join(directory, f), replace) for f in sorted(os.listdir(directory)) if f.endswith('.json')]
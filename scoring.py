@@ -0,0 +1,70 @@
+"""
+Ratings and payoffs from _mass_scale, _fos_scale, _format_scale and _payoff_structure.
+
+The interval tables are compiled once into sorted boundary arrays and looked up with binary
+search (np.searchsorted), so whole arrays of results are rated at once.
+
+How the tables are read:
+	- a rating is reached at its better-side bound: total mass <= hi of the mass interval,
+	  fos >= lo of the fos interval. The tables leave small gaps between intervals (e.g. mass
+	  45 to 45.001, fos 1.499 to 1.50); a value inside a gap gets the worse of the two ratings,
+	  so fos 1.4995 is 0 ('Poor') and fos 1.50 is 1 ('Fair'), mass 45.0 is 2 and 45.0005 is 1.
+	- _fos_scale has no key 3: fos >= 2.0 rates 4 ('Excellent') and 3 is never produced.
+	- values beyond either end of a table clamp to the rating at that end (fos above 200 is
+	  4, total mass above 200 kg is 0); NaN is unrated (-1) and earns no payoff.
+	- payoff per player is _payoff_structure of the mass rating, and 0 unless the system fos
+	  meets the requirement set's 'fos'.
+"""
+from global_reqs import _global_reqs, _mass_scale, _fos_scale, _format_scale, _payoff_structure
+import numpy as np
+
+class scorer(object):
+
+	def __init__(self, req):
+		self.req = req
+		self.fos_req = _global_reqs[req]['fos']
+
+		mass_scale = sorted(_mass_scale[req].items(), key=lambda kv: kv[1][1])
+		self._mass_hi = np.array([hi for r, (lo, hi) in mass_scale], dtype=float)
+		self._mass_rating = np.array([r for r, (lo, hi) in mass_scale])
+
+		fos_scale = sorted(_fos_scale.items(), key=lambda kv: kv[1][0])
+		self._fos_lo = np.array([lo for r, (lo, hi) in fos_scale], dtype=float)
+		self._fos_rating = np.array([r for r, (lo, hi) in fos_scale])
+
+		# lookup tables indexed by rating + 1, so that -1 (unrated) maps to the first entry
+		ratings = range(max(_format_scale)+1)
+		self._labels = np.array([''] + [_format_scale[r] for r in ratings], dtype=object)
+		self._payoffs = np.array([0] + [_payoff_structure[_format_scale[r]] for r in ratings])
+
+	def mass_rating(self, mass):
+		"""Rating (0-4, -1 for NaN) of total mass in kg."""
+		mass = np.asarray(mass, dtype=float)
+		i = np.searchsorted(self._mass_hi, mass, side='left')
+		rating = self._mass_rating[np.minimum(i, len(self._mass_hi)-1)]
+		return np.where(np.isnan(mass), -1, rating)
+
+	def fos_rating(self, fos):
+		"""Rating (0-4, -1 for NaN) of system fos."""
+		fos = np.asarray(fos, dtype=float)
+		i = np.searchsorted(self._fos_lo, fos, side='right')-1
+		rating = self._fos_rating[np.maximum(i, 0)]
+		return np.where(np.isnan(fos), -1, rating)
+
+	def label(self, rating):
+		"""_format_scale label of each rating ('' for unrated)."""
+		return self._labels[np.asarray(rating)+1]
+
+	def payoff(self, mass, fos):
+		"""Payoff per player for each (total mass, system fos) result."""
+		fos = np.asarray(fos, dtype=float)
+		payoff = self._payoffs[self.mass_rating(mass)+1]
+		return np.where(fos >= self.fos_req, payoff, 0)
+
+	def score(self, mass, fos):
+		"""Mass rating, fos rating and payoff of arrays of results, as a dict of arrays."""
+		return {
+			'mass_rating': self.mass_rating(mass),
+			'fos_rating': self.fos_rating(fos),
+			'payoff': self.payoff(mass, fos),
+		}
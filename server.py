@@ -0,0 +1,155 @@
+"""
+Local asyncio evaluation server for the multi-team design game.
+
+Protocol: newline-delimited JSON over TCP (localhost by default). Each request line is
+
+	{"id": 1, "req": "engine", "design": {"t_H": 8.88, "D": 97.5, ...}, "team": "piston"}
+
+with design a dict keyed by engine design symbol or a list in design_symbols order; id and team
+are optional and echoed back. Each response line carries mass, fos, feasible, the
+per-component results, mass/fos rating, rating label and payoff per player, or "error".
+Responses on one connection come back as they complete; match them by id.
+
+Requests for the same requirement set that arrive within window seconds of each other (up to
+max_batch of them) are evaluated together with one engine.evaluate_batch call, which bounds
+the tail latency at roughly window plus one batch evaluation under load.
+
+	python server.py [--host 127.0.0.1] [--port 8765] [--window 0.005] [--max-batch 4096]
+"""
+import sys
+import json
+import asyncio
+import argparse
+from global_reqs import _global_reqs
+from engine import engine
+from scoring import scorer
+import numpy as np
+
+class batcher(object):
+
+	def __init__(self, req, window=0.005, max_batch=4096):
+		self.req = req
+		self.engine = engine(req)
+		self.scorer = scorer(req)
+		self.window = window
+		self.max_batch = max_batch
+		self._queue = asyncio.Queue()
+		self._task = None
+
+	def start(self):
+		if self._task is None:
+			self._task = asyncio.get_running_loop().create_task(self._run())
+
+	async def submit(self, design):
+		"""Result dict for one design (dict or list); waits for the batch it lands in."""
+		if isinstance(design, dict):
+			design = self.engine.design(design)
+		if len(design) != len(self.engine.design_symbols):
+			raise ValueError('expected %d design values, got %d' % (len(self.engine.design_symbols), len(design)))
+		future = asyncio.get_running_loop().create_future()
+		await self._queue.put(([float(v) for v in design], future))
+		self.start()
+		return await future
+
+	async def _run(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			batch = [await self._queue.get()]
+			deadline = loop.time()+self.window
+			while len(batch) < self.max_batch:
+				timeout = deadline-loop.time()
+				if timeout <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+				except asyncio.TimeoutError:
+					break
+			designs = np.array([design for design, future in batch])
+			try:
+				results = await loop.run_in_executor(None, self._evaluate, designs)
+			except Exception as e:
+				for design, future in batch:
+					if not future.done():
+						future.set_exception(e)
+				continue
+			for (design, future), res in zip(batch, results):
+				if not future.done():
+					future.set_result(res)
+
+	def _evaluate(self, designs):
+		res = self.engine.evaluate_batch(designs)
+		score = self.scorer.score(res['mass'], res['fos'])
+		label = self.scorer.label(score['mass_rating'])
+		teams = self.engine.roles
+		out = []
+		for i in range(len(designs)):
+			out.append({
+				'mass': float(res['mass'][i]),
+				'fos': float(res['fos'][i]),
+				'feasible': bool(res['feasible'][i]),
+				'component_mass': {team: float(res['component_mass'][team][i]) for team in teams},
+				'component_fos': {team: float(res['component_fos'][team][i]) for team in teams},
+				'mass_rating': int(score['mass_rating'][i]),
+				'fos_rating': int(score['fos_rating'][i]),
+				'rating': label[i],
+				'payoff': int(score['payoff'][i]),
+			})
+		return out
+
+class evaluation_server(object):
+
+	def __init__(self, window=0.005, max_batch=4096):
+		self.batchers = {req: batcher(req, window, max_batch) for req in _global_reqs}
+
+	async def _respond(self, line, writer):
+		reply = {}
+		try:
+			request = json.loads(line)
+			reply['id'] = request.get('id')
+			if 'team' in request:
+				reply['team'] = request['team']
+			if request.get('req') not in self.batchers:
+				raise ValueError('unknown requirement set %r, expected one of %s' % (request.get('req'), sorted(self.batchers)))
+			reply.update(await self.batchers[request['req']].submit(request['design']))
+		except Exception as e:
+			reply['error'] = '%s: %s' % (type(e).__name__, e)
+		writer.write((json.dumps(reply)+'\n').encode())
+		await writer.drain()                   # back-pressure: a client that stops reading pauses its replies
+
+	async def handle(self, reader, writer):
+		pending = set()
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				if not line.strip():
+					continue
+				task = asyncio.get_running_loop().create_task(self._respond(line, writer))
+				pending.add(task)
+				task.add_done_callback(pending.discard)
+			if pending:
+				await asyncio.gather(*pending)
+		finally:
+			writer.close()
+
+	async def serve(self, host='127.0.0.1', port=8765):
+		server = await asyncio.start_server(self.handle, host, port)
+		async with server:
+			await server.serve_forever()
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='engine-design evaluation server')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8765)
+	parser.add_argument('--window', type=float, default=0.005, help='micro-batching window in seconds')
+	parser.add_argument('--max-batch', type=int, default=4096, help='max. designs per evaluation')
+	args = parser.parse_args(argv)
+	try:
+		asyncio.run(evaluation_server(args.window, args.max_batch).serve(args.host, args.port))
+	except KeyboardInterrupt:
+		pass
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Shared immutable component data and cached component instances.
+
+The catalogs, bounds, labels and symbols of the component classes are class-level data,
+frozen once at import (freeze) so that every instance can share them safely. Components are
+not modified after construction either, so instance() can hand out one instance per
+(component class, requirement set, fixed parameters) instead of building a new one for every
+engine or session.
+
+Since instances are shared, and their kernels (see the components' _specialize) capture the
+requirements and fixed parameters when they are built, a built instance is read-only:
+component_setattr refuses to change a parameter afterwards (construct a new instance with
+other _fixed_pars instead). component_reduce pickles an instance as its class, requirements
+and fixed parameters and rebuilds it through __init__, since the kernels are closures.
+"""
+from functools import lru_cache
+from global_reqs import _global_reqs_labels
+
+_maxsize = 1024
+
+class frozen_dict(dict):
+	"""A dict that refuses writes. Unlike a mappingproxy it can be pickled and deep-copied."""
+	def _read_only(self, *args, **kwargs):
+		raise TypeError('%s is read-only' % type(self).__name__)
+	__setitem__ = __delitem__ = __ior__ = _read_only
+	clear = pop = popitem = setdefault = update = _read_only
+
+	def __reduce__(self):
+		return type(self), (dict(self),)
+
+def freeze(data):
+	"""Read-only copy of nested lists and dicts: tuples and frozen_dicts."""
+	if isinstance(data, dict):
+		return frozen_dict({key: freeze(value) for key, value in data.items()})
+	if isinstance(data, (list, tuple)):
+		return tuple(freeze(value) for value in data)
+	return data
+
+# attributes _specialize writes; everything else is a parameter the kernels have captured
+_kernels = frozenset(['_fos', '_mass', '_violations', '_load_case', 'mass_si', 'factor_of_safety_si'])
+
+def component_setattr(part, name, value):
+	"""__setattr__ of the component classes: parameters are read-only once the kernels are built."""
+	if name in type(part).__slots__ and name not in _kernels and hasattr(part, 'mass_si'):
+		raise AttributeError('%s.%s is read-only once built: the kernels have captured it; build a new '
+							 'instance (e.g. with other _fixed_pars) instead' % (type(part).__name__, name))
+	object.__setattr__(part, name, value)
+
+def component_reduce(part):
+	"""__reduce__ of the component classes: rebuilt from requirements and fixed parameters."""
+	cls = type(part)
+	global_reqs = {key: getattr(part, key) for key in _global_reqs_labels if hasattr(part, key)}
+	fixed_pars = {key: getattr(part, key) for key in cls._fixed_pars}
+	return cls, (global_reqs, fixed_pars)
+
+@lru_cache(maxsize=_maxsize)
+def _cached(cls, global_reqs, fixed_pars):
+	return cls(dict(global_reqs), dict(fixed_pars))
+
+def instance(cls, global_reqs, fixed_pars=None):
+	"""
+	Shared instance of component class cls for the requirement dict global_reqs and fixed
+	parameters fixed_pars (cls._fixed_pars by default). Parameters that cannot be hashed,
+	e.g. NumPy arrays of sampled material properties, get a new, unshared instance.
+	"""
+	fixed_pars = cls._fixed_pars if fixed_pars is None else fixed_pars
+	try:
+		return _cached(cls, frozenset(global_reqs.items()), frozenset(fixed_pars.items()))
+	except TypeError:
+		return cls(global_reqs, fixed_pars)
+
+def cache_info():
+	"""Hits, misses, maxsize and current size of the instance cache."""
+	return _cached.cache_info()
+
+def cache_clear():
+	_cached.cache_clear()
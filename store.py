@@ -0,0 +1,224 @@
+"""
+Columnar, memory-mapped store for sweep results.
+
+A store is a directory with one flat binary file per column (<column>.bin) and meta.json
+holding the column names, dtype and number of rows. Columns are fixed-dtype: 'index' (int64,
+the design's flat index in the sweep) and float64, or float32 with float32=True, for every
+design symbol (the inputs of all teams, which include every outside input), per-component
+mass and fos ('mass.<team>', 'fos.<team>') and total 'mass' and system 'fos'. That is about
+100 bytes per design in float32, so a full catalog sweep fits on disk and is read back
+through memory maps rather than loaded.
+
+Rows are appended chunk by chunk (add_chunk is a sink for sweep.sweep); meta.json is rewritten
+after the data, so a store read back after a crash only shows complete chunks.
+
+Range queries go through sorted indexes (<column>.order with the row numbers sorted by value,
+<column>.sorted with the values in that order): each condition is a binary search, the most
+selective one picks the candidate rows and the others are checked on those rows only. Rows
+appended after build_index are scanned until the index is rebuilt.
+
+	store = result_store('results/engine', engine_columns(eng), float32=True)
+	sweep('engine', store.add_chunk)
+	store.build_index('fos')
+	store.build_index('mass')
+	rows = store.query(fos=(2.0, None), mass=(None, 35))
+	store.rows(rows, ['mass', 'fos', 'D'])
+"""
+import os
+import json
+import numpy as np
+
+def engine_columns(eng):
+	"""Value columns of a store for sweeps of engine eng, in store order."""
+	return (list(eng.design_symbols)+['mass.%s' % team for team in eng.roles]+['fos.%s' % team for team in eng.roles]
+			+['mass', 'fos'])
+
+class result_store(object):
+
+	def __init__(self, path, columns=None, float32=False):
+		"""
+		Opens the store in directory path. If it does not exist yet it is created with the
+		value columns columns (e.g. engine_columns(eng)); float32 stores them in single
+		precision. An existing store keeps its own columns and dtype.
+		"""
+		self.path = path
+		meta_file = os.path.join(path, 'meta.json')
+		if os.path.exists(meta_file):
+			with open(meta_file) as f:
+				meta = json.load(f)
+		else:
+			if columns is None:
+				raise ValueError('no store at %r and no columns to create one with' % path)
+			os.makedirs(path, exist_ok=True)
+			meta = {'columns': list(columns), 'dtype': 'float32' if float32 else 'float64', 'length': 0, 'indexes': {}}
+		self.columns = meta['columns']
+		self.dtype = np.dtype(meta['dtype'])
+		self.length = meta['length']
+		self.indexes = meta['indexes']              # column -> number of rows covered
+		self._dtypes = {'index': np.dtype(np.int64)}
+		self._dtypes.update((c, self.dtype) for c in self.columns)
+		self._files = {}
+		self._maps = {}
+		if not os.path.exists(meta_file):
+			for c in self._dtypes:
+				open(self._file(c), 'wb').close()
+			self._write_meta()
+		else:
+			self.truncate(self.length)              # drop a chunk that was cut off mid-write
+
+	def __len__(self):
+		return self.length
+
+	def _file(self, column, suffix='bin'):
+		return os.path.join(self.path, '%s.%s' % (column, suffix))
+
+	def _write_meta(self):
+		meta = {'columns': self.columns, 'dtype': self.dtype.name, 'length': self.length, 'indexes': self.indexes}
+		tmp = os.path.join(self.path, 'meta.json.tmp')
+		with open(tmp, 'w') as f:
+			json.dump(meta, f)
+		os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+	def append(self, data):
+		"""
+		Appends rows given as a dict of equal-length arrays, one per column (and 'index').
+		Every column is converted and checked before any is written, so a bad chunk raises
+		ValueError and leaves the store as it was.
+		"""
+		if 'index' not in data:
+			raise ValueError("missing column 'index'")
+		n = len(data['index'])
+		arrays = {}
+		for c, dtype in self._dtypes.items():
+			if c not in data:
+				raise ValueError('missing column %r' % c)
+			a = np.asarray(data[c], dtype=dtype)
+			if a.shape != (n,):
+				raise ValueError('column %r: expected %d values, got shape %s' % (c, n, a.shape))
+			arrays[c] = a
+		try:
+			for c, a in arrays.items():
+				if c not in self._files:
+					self._files[c] = open(self._file(c), 'ab')
+				self._files[c].write(a.tobytes())
+			for f in self._files.values():
+				f.flush()
+		except BaseException:
+			self.truncate(self.length)              # drop the part of the chunk already written
+			raise
+		self.length += n
+		self._maps.clear()
+		self._write_meta()
+
+	def add_chunk(self, chunk):
+		"""Sink for sweep.sweep: appends one evaluated chunk."""
+		data = {'index': chunk['index'], 'mass': chunk['mass'], 'fos': chunk['fos']}
+		k = 0                                       # design columns come in design_symbols order
+		for c in self.columns:
+			if c.startswith('mass.'):
+				data[c] = chunk['component_mass'][c[5:]]
+			elif c.startswith('fos.'):
+				data[c] = chunk['component_fos'][c[4:]]
+			elif c not in data:
+				data[c] = chunk['design'][:, k]
+				k += 1
+		self.append(data)
+
+	def truncate(self, n):
+		"""
+		Keeps the first n rows and drops the rest (e.g. rows written after a checkpoint);
+		indexes covering dropped rows are discarded.
+		"""
+		if n > self.length:
+			raise ValueError('cannot truncate %d rows to %d' % (self.length, n))
+		self.close()
+		for c, dtype in self._dtypes.items():
+			with open(self._file(c), 'r+b') as f:
+				f.truncate(n*dtype.itemsize)
+		self.indexes = {c: covered for c, covered in self.indexes.items() if covered <= n}
+		self.length = n
+		self._write_meta()
+
+	def close(self):
+		for f in self._files.values():
+			f.close()
+		self._files.clear()
+		self._maps.clear()
+
+	def column(self, name):
+		"""Read-only memory map of one column (all rows)."""
+		if name not in self._maps:
+			if self.length == 0:
+				return np.zeros(0, dtype=self._dtypes[name])
+			self._maps[name] = np.memmap(self._file(name), dtype=self._dtypes[name], mode='r', shape=(self.length,))
+		return self._maps[name]
+
+	def rows(self, sel, columns=None):
+		"""Values of the given rows (row numbers or a bool mask) as a dict of arrays."""
+		columns = ['index']+self.columns if columns is None else columns
+		return {c: np.asarray(self.column(c)[sel]) for c in columns}
+
+	def build_index(self, name):
+		"""Builds (or rebuilds) the sorted index of one column over all current rows."""
+		values = np.asarray(self.column(name))
+		order = np.argsort(values, kind='stable').astype(np.int64)
+		order.tofile(self._file(name, 'order'))
+		values[order].tofile(self._file(name, 'sorted'))
+		self.indexes[name] = self.length
+		self._write_meta()
+
+	def _span(self, name, lo, hi):
+		# positions [i, j) in the sorted index of the indexed rows with lo <= value <= hi
+		covered = self.indexes[name]
+		values = np.memmap(self._file(name, 'sorted'), dtype=self._dtypes[name], mode='r', shape=(covered,))
+		i = 0 if lo is None else int(np.searchsorted(values, lo, side='left'))
+		j = covered if hi is None else int(np.searchsorted(values, hi, side='right'))
+		return i, j
+
+	def _range(self, name, lo, hi, span):
+		# rows with lo <= value <= hi: the index span plus a scan of the rows appended after it
+		covered = self.indexes[name]
+		order = np.memmap(self._file(name, 'order'), dtype=np.int64, mode='r', shape=(covered,))
+		sel = np.asarray(order[span[0]:span[1]])
+		if covered < self.length:
+			tail = np.asarray(self.column(name)[covered:])
+			sel = np.concatenate([sel, covered+np.flatnonzero(_between(tail, lo, hi))])
+		return np.sort(sel)
+
+	def query(self, **conditions):
+		"""
+		Row numbers (ascending) of the rows meeting every condition, given as
+		column=(lo, hi) with inclusive bounds, None for open ends, e.g.
+		query(fos=(2.0, None), mass=(None, 35)). Bounds are compared in the column's dtype.
+		Indexed conditions are answered by binary search; the one matching the fewest rows
+		picks the candidates and the rest are checked on those rows only. Without any indexed
+		condition the first column is scanned.
+		"""
+		if not conditions:
+			return np.arange(self.length)
+		bounds = {c: self._bounds(c, b) for c, b in conditions.items()}
+		spans = {c: self._span(c, *bounds[c]) for c in bounds if self.indexes.get(c)}
+		if spans:
+			first = min(spans, key=lambda c: spans[c][1]-spans[c][0])
+			sel = self._range(first, *bounds[first], spans[first])
+		else:
+			first = next(iter(bounds))
+			sel = np.flatnonzero(_between(np.asarray(self.column(first)), *bounds[first]))
+		for c, (lo, hi) in bounds.items():
+			if c == first or len(sel) == 0:
+				continue
+			sel = sel[_between(np.asarray(self.column(c)[sel]), lo, hi)]
+		return sel
+
+	def _bounds(self, name, bounds):
+		dtype = self._dtypes[name]
+		lo, hi = bounds
+		return (None if lo is None else dtype.type(lo)), (None if hi is None else dtype.type(hi))
+
+def _between(a, lo, hi):
+	mask = np.ones(len(a), dtype=bool)
+	if lo is not None:
+		mask &= a >= lo
+	if hi is not None:
+		mask &= a <= hi
+	return mask
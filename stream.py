@@ -0,0 +1,243 @@
+"""
+Streaming batch evaluation from the command line.
+
+	python stream.py --req engine [-i designs.csv] [-o results.csv] [--chunk-size 65536] [--workers 4]
+	cat designs.jsonl | python stream.py --req lawn_mower > results.jsonl
+	python stream.py --profiles profiles --req motorcycle -i designs.csv
+
+Input is CSV (read with the csv module, so quoted fields may hold commas) with a header row
+naming the design symbols (any order, other columns ignored except 'id', which is passed
+through) or JSONL with one object per line, keyed by design
+symbol or with 'design' as a list in design_symbols order, and an optional 'id'. The format
+is taken from the first line ('{' for JSONL) unless given with --format; the output uses the
+input format unless --output-format says otherwise.
+
+Each output row has the id (if any), the design, total mass, system fos, feasible and the
+per-component mass and fos, in input order (JSONL writes non-finite values as null). A row that cannot be read gets its 'error'
+instead of results (CSV: the error column, empty otherwise), and keeps its id whenever the
+id itself could be read.
+
+Rows are read, evaluated with engine.evaluate_batch and written chunk by chunk; with workers
+> 1 chunks are parsed, evaluated and formatted in a process pool with at most 2*workers
+chunks in flight, so memory stays constant however large the input is. --profiles registers
+the requirement profiles in a directory (see profiles.py) before --req is looked up.
+"""
+import io
+import os
+import sys
+import csv
+import json
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from global_reqs import _global_reqs
+from engine import engine
+import profiles
+from math import isfinite
+import numpy as np
+
+_engines = {}
+
+def _engine(req):
+	if req not in _engines:
+		_engines[req] = engine(req)
+	return _engines[req]
+
+def _parse_csv(values, columns):
+	if len(values) <= max(columns):
+		raise ValueError('expected at least %d fields, got %d' % (max(columns)+1, len(values)))
+	return [float(values[j]) for j in columns]
+
+def _parse_jsonl(obj, symbols):
+	if not isinstance(obj, dict):
+		raise ValueError('expected a JSON object, got %s' % type(obj).__name__)
+	design = obj['design'] if 'design' in obj else [obj[s] for s in symbols]
+	if len(design) != len(symbols):
+		raise ValueError('expected %d design values, got %d' % (len(symbols), len(design)))
+	return [float(v) for v in design]
+
+def output_header(eng, with_id):
+	"""Column names of CSV output."""
+	return ((['id'] if with_id else [])+list(eng.design_symbols)+['mass', 'fos', 'feasible']
+			+['mass.%s' % team for team in eng.roles]+['fos.%s' % team for team in eng.roles]+['error'])
+
+def evaluate_lines(req, in_format, out_format, lines, columns=None, id_column=None, with_id=False):
+	"""
+	Evaluates a chunk of input lines (JSONL) or rows (CSV, already split into fields) and
+	returns the output text for them.
+	columns, id_column: positions of the design symbols and of 'id' in CSV input rows
+	with_id           : CSV output has an id column
+	"""
+	eng = _engine(req)
+	symbols = eng.design_symbols
+	ids = []
+	designs = []
+	errors = []
+	for line in lines:
+		# the id is read first, so that a row with bad design values keeps it
+		row_id = None
+		try:
+			if in_format == 'csv':
+				if id_column is not None and id_column < len(line):
+					row_id = line[id_column]
+				design = _parse_csv(line, columns)
+			else:
+				obj = json.loads(line)
+				if isinstance(obj, dict):
+					row_id = obj.get('id')
+				design = _parse_jsonl(obj, symbols)
+			designs.append(design)
+			errors.append(None)
+		except Exception as e:
+			designs.append([np.nan]*len(symbols))
+			errors.append('%s: %s' % (type(e).__name__, e))
+		ids.append(row_id)
+	designs = np.array(designs, dtype=float).reshape(-1, len(symbols))
+	res = eng.evaluate_batch(designs)
+	mass = res['mass'].tolist()
+	fos = res['fos'].tolist()
+	feasible = res['feasible'].tolist()
+	component_mass = [res['component_mass'][team].tolist() for team in eng.roles]
+	component_fos = [res['component_fos'][team].tolist() for team in eng.roles]
+	rows = designs.tolist()
+
+	out = []
+	text = io.StringIO()
+	writer = csv.writer(text, lineterminator='')
+	for i, error in enumerate(errors):
+		if out_format == 'csv':
+			head = [str(ids[i]) if ids[i] is not None else ''] if with_id else []
+			if error is not None:
+				n = len(symbols)+3+2*len(eng.roles)
+				writer.writerow(head+['']*n+[error])
+			else:
+				values = rows[i]+[mass[i], fos[i]]
+				writer.writerow(head+[repr(v) for v in values]+[str(feasible[i])]
+								+[repr(m[i]) for m in component_mass]+[repr(f[i]) for f in component_fos]+[''])
+			out.append(text.getvalue())
+			text.seek(0)
+			text.truncate()
+		else:
+			reply = {} if ids[i] is None else {'id': ids[i]}
+			if error is not None:
+				reply['error'] = error
+			else:
+				reply['design'] = [_finite(v) for v in rows[i]]
+				reply['mass'] = _finite(mass[i])
+				reply['fos'] = _finite(fos[i])
+				reply['feasible'] = feasible[i]
+				reply['component_mass'] = {team: _finite(m[i]) for team, m in zip(eng.roles, component_mass)}
+				reply['component_fos'] = {team: _finite(f[i]) for team, f in zip(eng.roles, component_fos)}
+			out.append(json.dumps(reply, allow_nan=False))
+	return ''.join(line+'\n' for line in out)
+
+def _finite(v):
+	# JSON has no NaN or Infinity: non-finite results are written as null
+	return v if isfinite(v) else None
+
+def _chunks(lines, chunk_size):
+	chunk = []
+	for line in lines:
+		chunk.append(line)
+		if len(chunk) == chunk_size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+def run(req, fin, fout, in_format=None, out_format=None, chunk_size=65536, workers=1, profile_dir=None):
+	"""
+	Streams designs from the open text file fin to fout. Returns the number of rows written.
+	profile_dir  : directory of requirement profiles the worker processes register first
+	"""
+	eng = _engine(req)
+	first = fin.readline()
+	while first and not first.strip():
+		first = fin.readline()
+	if not first:
+		return 0
+	in_format = in_format or ('jsonl' if first.lstrip().startswith('{') else 'csv')
+	out_format = out_format or in_format
+
+	columns = id_column = None
+	if in_format == 'csv':
+		header = [name.strip() for name in next(csv.reader([first]))]
+		missing = [s for s in eng.design_symbols if s not in header]
+		if missing:
+			raise ValueError('CSV header lacks design symbols %s' % missing)
+		columns = [header.index(s) for s in eng.design_symbols]
+		id_column = header.index('id') if 'id' in header else None
+		lines = (row for row in csv.reader(fin) if row)
+	else:
+		lines = (line for line in _prepend(first, fin) if line.strip())
+	with_id = id_column is not None or in_format == 'jsonl'
+	if out_format == 'csv':
+		fout.write(','.join(output_header(eng, with_id))+'\n')
+
+	n = 0
+	if workers is None or workers <= 1:
+		for chunk in _chunks(lines, chunk_size):
+			fout.write(evaluate_lines(req, in_format, out_format, chunk, columns, id_column, with_id))
+			n += len(chunk)
+		return n
+
+	with ProcessPoolExecutor(max_workers=workers, initializer=profiles.load_dir if profile_dir else None, initargs=(profile_dir,)) as pool:
+		pending = deque()
+		for chunk in _chunks(lines, chunk_size):
+			pending.append((len(chunk), pool.submit(evaluate_lines, req, in_format, out_format, chunk, columns, id_column, with_id)))
+			while len(pending) >= 2*workers:
+				size, future = pending.popleft()
+				fout.write(future.result())
+				n += size
+		while pending:
+			size, future = pending.popleft()
+			fout.write(future.result())
+			n += size
+	return n
+
+def _prepend(first, lines):
+	yield first
+	yield from lines
+
+def main(argv=None):
+	# profiles first, so that --req can offer their names
+	pre = argparse.ArgumentParser(add_help=False)
+	pre.add_argument('--profiles')
+	known, _ = pre.parse_known_args(argv)
+	if known.profiles:
+		try:
+			profiles.load_dir(known.profiles)
+		except (OSError, ValueError) as e:
+			print('error: %s' % e, file=sys.stderr)
+			return 2
+	parser = argparse.ArgumentParser(description='stream designs from CSV/JSONL through the engine model')
+	parser.add_argument('--profiles', help='directory of requirement profiles (JSON) to register')
+	parser.add_argument('--req', required=True, choices=sorted(_global_reqs), help='requirement set')
+	parser.add_argument('-i', '--input', default='-', help='input file (default: stdin)')
+	parser.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+	parser.add_argument('--format', choices=['csv', 'jsonl'], help='input format (default: from the first line)')
+	parser.add_argument('--output-format', choices=['csv', 'jsonl'], help='output format (default: input format)')
+	parser.add_argument('--chunk-size', type=int, default=65536, help='rows per evaluation')
+	parser.add_argument('--workers', type=int, default=1, help='processes evaluating chunks concurrently')
+	args = parser.parse_args(argv)
+
+	fin = sys.stdin if args.input == '-' else open(args.input)
+	fout = sys.stdout if args.output == '-' else open(args.output, 'w')
+	try:
+		run(args.req, fin, fout, args.format, args.output_format, args.chunk_size, args.workers, args.profiles)
+	except ValueError as e:
+		print('error: %s' % e, file=sys.stderr)
+		return 2
+	except BrokenPipeError:
+		# reader went away (e.g. piped into head): stop without a traceback at exit
+		os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+		return 1
+	finally:
+		if fin is not sys.stdin:
+			fin.close()
+		if fout is not sys.stdout:
+			fout.close()
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Surrogate mode: mass and fos of a component from precomputed grid tables.
+
+A surrogate tabulates the unrounded mass and fos of one component for one requirement set on a
+regular grid over inputs_min..inputs_max and outside_inputs_min..outside_inputs_max, and answers
+by multilinear interpolation, at a cost independent of the component model. The maximum
+interpolation error, measured against the exact model on random points of the box, is reported
+in max_error.
+
+Tables are saved as .npy files next to a meta.json and memory-mapped on load, so processes that
+load the same surrogate share its pages instead of rebuilding it.
+"""
+import os
+import json
+from batch import columns, round2
+import numpy as np
+
+class surrogate(object):
+
+	def __init__(self, symbols, n_inputs, axes, tables, max_error, team_label=None, req=None):
+		self.symbols = list(symbols)
+		self.n_inputs = n_inputs                      # symbols[:n_inputs] are inputs, the rest outside inputs
+		self.axes = [np.asarray(a, dtype=float) for a in axes]
+		self.tables = tables                          # {'mass': array, 'fos': array}
+		self.max_error = max_error
+		self.team_label = team_label
+		self.req = req
+
+	@classmethod
+	def build(cls, component, req, points=17, samples=2000, seed=0):
+		"""
+		Tabulates component (an instance for requirement set req) on a grid with points nodes
+		per input (an int, or one per symbol), then measures the interpolation error on samples
+		random points.
+		"""
+		symbols = list(component.input_symbols)+list(component.outside_input_symbols)
+		lo = list(component.inputs_min[req])
+		hi = list(component.inputs_max[req])
+		if component.outside_input_symbols:
+			lo += list(component.outside_inputs_min[req])
+			hi += list(component.outside_inputs_max[req])
+		if isinstance(points, int):
+			points = [points]*len(symbols)
+		axes = [np.linspace(a, b, k) for a, b, k in zip(lo, hi, points)]
+
+		grid = np.meshgrid(*axes, indexing='ij')
+		tables = _evaluate(component, grid)
+		self = cls(symbols, len(component.input_symbols), axes, tables, None, component.team_label, req)
+
+		rng = np.random.default_rng(seed)
+		sample = [rng.uniform(a, b, samples) for a, b in zip(lo, hi)]
+		exact = _evaluate(component, sample)
+		self.max_error = {}
+		for name in tables:
+			err = np.abs(self.interpolate(name, sample)-exact[name])
+			self.max_error[name] = float(err.max())
+			self.max_error[name+'_rel'] = float((err/np.abs(exact[name])).max())
+		return self
+
+	def interpolate(self, name, cols):
+		"""Multilinear interpolation of table name ('mass' or 'fos') at arrays cols, one per symbol."""
+		table = self.tables[name]
+		cols = np.broadcast_arrays(*[np.asarray(c, dtype=float) for c in cols])
+		idx = []
+		frac = []
+		for axis, c in zip(self.axes, cols):
+			i = np.clip(np.searchsorted(axis, c, side='right')-1, 0, len(axis)-2)
+			idx.append(i)
+			frac.append((c-axis[i])/(axis[i+1]-axis[i]))
+		out = np.zeros(cols[0].shape)
+		for corner in range(2**len(cols)):
+			w = 1.0
+			at = []
+			for k in range(len(cols)):
+				if corner >> k & 1:
+					w = w*frac[k]
+					at.append(idx[k]+1)
+				else:
+					w = w*(1-frac[k])
+					at.append(idx[k])
+			out = out+w*table[tuple(at)]
+		return out
+
+	def _values(self, x, outside_x):
+		return [x[s] for s in self.symbols[:self.n_inputs]]+[outside_x[s] for s in self.symbols[self.n_inputs:]]
+
+	def _columns(self, x, outside_x):
+		return columns(x, self.symbols[:self.n_inputs])+columns(outside_x, self.symbols[self.n_inputs:])
+
+	# same interface as the component methods
+
+	def mass(self, x, outside_x):
+		return round(float(self.interpolate('mass', self._values(x, outside_x))),2)
+
+	def factor_of_safety(self, x, outside_x):
+		return round(float(self.interpolate('fos', self._values(x, outside_x))),2)
+
+	def mass_batch(self, x, outside_x=None):
+		return round2(self.interpolate('mass', self._columns(x, outside_x)))
+
+	def factor_of_safety_batch(self, x, outside_x=None):
+		return round2(self.interpolate('fos', self._columns(x, outside_x)))
+
+	def save(self, path):
+		"""Writes the tables and metadata to directory path."""
+		os.makedirs(path, exist_ok=True)
+		for name, table in self.tables.items():
+			np.save(os.path.join(path, name+'.npy'), np.ascontiguousarray(table))
+		meta = {
+			'symbols': self.symbols,
+			'n_inputs': self.n_inputs,
+			'axes': [a.tolist() for a in self.axes],
+			'tables': list(self.tables),
+			'max_error': self.max_error,
+			'team_label': self.team_label,
+			'req': self.req,
+		}
+		with open(os.path.join(path, 'meta.json'), 'w') as f:
+			json.dump(meta, f, indent=1)
+
+	@classmethod
+	def load(cls, path, mmap_mode='r'):
+		"""Reads a saved surrogate; tables are memory-mapped unless mmap_mode is None."""
+		with open(os.path.join(path, 'meta.json')) as f:
+			meta = json.load(f)
+		tables = {name: np.load(os.path.join(path, name+'.npy'), mmap_mode=mmap_mode) for name in meta['tables']}
+		return cls(meta['symbols'], meta['n_inputs'], meta['axes'], tables, meta['max_error'], meta['team_label'], meta['req'])
+
+def _evaluate(component, cols):
+	# unrounded mass and fos of component at arrays cols (dict units), one per symbol
+	args = [c/scale if scale != 1 else c for c, scale in zip(cols, component._arg_scales)]
+	fos = component._fos(*args)
+	if isinstance(fos, tuple):
+		fos = np.minimum(*fos)
+	return {'mass': np.asarray(component._mass(*args), dtype=float), 'fos': np.asarray(fos, dtype=float)}
@@ -0,0 +1,223 @@
+"""
+Full-factorial sweep over the input catalogs of all five teams.
+
+The combined space is never materialized: designs are addressed by a flat index (mixed radix over
+the catalog rows, last team in roles order varying fastest), decoded chunk by chunk, evaluated
+with engine.evaluate_batch and handed to a sink. sampled_space addresses uniform random designs
+within the teams' bounds the same way, so it can be swept in place of the catalogs.
+"""
+from engine import engine
+import profiles
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+class catalog_space(object):
+
+	def __init__(self, req, eng=None):
+		self.req = req
+		self.engine = eng if eng is not None else engine(req)
+		self.design_symbols = self.engine.design_symbols
+		self.catalogs = [np.array(part.input_catalog[req], dtype=float) for part in self.engine.parts]
+		self.shape = tuple(len(cat) for cat in self.catalogs)
+		self.size = int(np.prod(self.shape))
+		self.key = ('catalog', req)             # identifies the space, e.g. in checkpoints
+
+	def designs(self, start, stop):
+		"""Design vectors with flat index in [start, stop), one row per design."""
+		rows = np.unravel_index(np.arange(start, stop), self.shape)
+		return np.concatenate([cat[r] for cat, r in zip(self.catalogs, rows)], axis=1)
+
+	def chunks(self, chunk_size, start=0, stop=None):
+		"""Yields (start index, design array) for consecutive chunks of at most chunk_size designs."""
+		stop = self.size if stop is None else min(stop, self.size)
+		for lo in range(start, stop, chunk_size):
+			yield lo, self.designs(lo, min(lo+chunk_size, stop))
+
+class sampled_space(object):
+
+	def __init__(self, req, size, seed=0, block=65536, eng=None):
+		"""
+		size designs uniform within engine.bounds(). Design i is drawn from a generator
+		seeded with (seed, i//block), so any index range decodes to the same designs however
+		the space is chunked or resumed.
+		"""
+		self.req = req
+		self.engine = eng if eng is not None else engine(req)
+		self.design_symbols = self.engine.design_symbols
+		lo, hi = self.engine.bounds()
+		self.lo = np.array(lo, dtype=float)
+		self.hi = np.array(hi, dtype=float)
+		self.size = size
+		self.seed = seed
+		self.block = block
+		self.key = ('sampled', req, size, seed, block)
+
+	def designs(self, start, stop):
+		"""Design vectors with index in [start, stop), one row per design."""
+		out = []
+		for b in range(start//self.block, (stop-1)//self.block+1 if stop > start else 0):
+			u = np.random.default_rng([self.seed, b]).random((self.block, len(self.lo)))
+			lo = max(start-b*self.block, 0)
+			hi = min(stop-b*self.block, self.block)
+			out.append(self.lo+(self.hi-self.lo)*u[lo:hi])
+		return np.concatenate(out) if out else np.zeros((0, len(self.lo)))
+
+	def chunks(self, chunk_size, start=0, stop=None):
+		"""Yields (start index, design array) for consecutive chunks of at most chunk_size designs."""
+		stop = self.size if stop is None else min(stop, self.size)
+		for lo in range(start, stop, chunk_size):
+			yield lo, self.designs(lo, min(lo+chunk_size, stop))
+
+def evaluate_chunk(space, lo, designs, prefilter=False):
+	"""
+	Evaluates one chunk; the result dict is what sweep() passes to its sink. With prefilter,
+	designs failing engine.screen are dropped before evaluation and counted in 'rejected'.
+	"""
+	index = np.arange(lo, lo+len(designs))
+	rejected = None
+	if prefilter:
+		valid, rejected = space.engine.screen(designs)
+		index = index[valid]
+		designs = designs[valid]
+	res = space.engine.evaluate_batch(designs)
+	res['index'] = index
+	res['design'] = designs
+	if rejected is not None:
+		res['rejected'] = rejected
+	return res
+
+def sweep(req, sink, chunk_size=65536, start=0, stop=None, prefilter=False, space=None):
+	"""
+	Evaluates every catalog combination for requirement set req ('engine' or 'lawn_mower').
+
+	sink         : called once per chunk with a dict of arrays: 'index', 'design' (one row per
+	               design, columns in design_symbols order), 'mass', 'fos', 'feasible',
+	               'component_mass' and 'component_fos' (dicts keyed by team)
+	start, stop  : flat index range to sweep; defaults to the whole space
+	prefilter    : skip designs that violate a geometric constraint (engine.screen); each
+	               chunk then only holds the valid designs and 'rejected' has the number of
+	               designs dropped per reason
+	space        : space to sweep instead of catalog_space(req), e.g. a sampled_space
+
+	Memory is bounded by chunk_size. Returns the number of designs evaluated.
+	"""
+	space = catalog_space(req) if space is None else space
+	n = 0
+	for lo, designs in space.chunks(chunk_size, start, stop):
+		chunk = evaluate_chunk(space, lo, designs, prefilter)
+		sink(chunk)
+		n += len(chunk['index'])
+	return n
+
+_result_fields = ['mass', 'fos']
+_worker_spaces = {}
+
+def _attach(name, shape):
+	shm = shared_memory.SharedMemory(name=name)
+	return shm, np.ndarray(shape, dtype=float, buffer=shm.buf)
+
+def _init_worker(data):
+	# a spawned worker starts from a fresh import: register the parent's profile there too
+	if data is not None:
+		profiles.register(data, replace=True)
+
+def _sweep_worker(req, out_name, in_name, n, start, lo, hi, prefilter=False):
+	# one chunk of parallel_sweep; results go straight into the parent's shared-memory buffer
+	if req not in _worker_spaces:
+		_worker_spaces[req] = catalog_space(req)
+	space = _worker_spaces[req]
+	in_shm = None
+	if in_name is None:
+		designs = space.designs(lo, hi)
+	else:
+		in_shm, shared = _attach(in_name, (n, len(space.design_symbols)))
+		designs = shared[lo-start:hi-start]
+	valid = None
+	rejected = {}
+	if prefilter:
+		valid, rejected = space.engine.screen(designs)
+		res = space.engine.evaluate_batch(designs[valid])
+	else:
+		res = space.engine.evaluate_batch(designs)
+	del designs
+	if in_shm is not None:
+		del shared
+		in_shm.close()
+	out_shm, out = _attach(out_name, (len(_result_fields), n))
+	for k, field in enumerate(_result_fields):
+		if valid is None:
+			out[k, lo-start:hi-start] = res[field]
+		else:
+			block = np.full(hi-lo, np.nan)
+			block[valid] = res[field]
+			out[k, lo-start:hi-start] = block
+	del out
+	out_shm.close()
+	return rejected
+
+def parallel_sweep(req, workers=None, chunk_size=65536, start=0, stop=None, designs=None, prefilter=False):
+	"""
+	sweep() over a process pool. The index range is split into the same chunks a serial sweep
+	uses and each worker writes total mass and system fos of its chunks into one shared-memory
+	buffer, so nothing but chunk bounds is pickled. Every design is evaluated element-wise by
+	the same code, so the result is bit-identical to a serial sweep for any chunk_size/workers.
+
+	workers      : number of processes; defaults to os.cpu_count()
+	designs      : optional array of design vectors (one row per design, e.g. sampled within
+	               engine.bounds) to evaluate instead of the catalog space; it is shared with
+	               the workers the same way and start/stop index its rows
+	prefilter    : skip designs that violate a geometric constraint (engine.screen); their
+	               mass and fos are NaN and 'rejected' has the number dropped per reason
+
+	Returns a dict of arrays 'index', 'mass' and 'fos' over [start, stop).
+	"""
+	space = catalog_space(req)
+	if designs is not None:
+		designs = np.asarray(designs, dtype=float)
+		size = len(designs)
+	else:
+		size = space.size
+	stop = size if stop is None else min(stop, size)
+	n = max(stop-start, 0)
+	shms = []
+	rejected = {}
+	try:
+		out_shm = shared_memory.SharedMemory(create=True, size=max(len(_result_fields)*n*8, 1))
+		shms.append(out_shm)
+		in_name = None
+		if designs is not None:
+			in_shm = shared_memory.SharedMemory(create=True, size=max(designs[start:stop].nbytes, 1))
+			shms.append(in_shm)
+			np.ndarray((n, len(space.design_symbols)), dtype=float, buffer=in_shm.buf)[:] = designs[start:stop]
+			in_name = in_shm.name
+		data = None if req in profiles._builtin else profiles.profile_data(req)
+		with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+			futures = [pool.submit(_sweep_worker, req, out_shm.name, in_name, n, start, lo, min(lo+chunk_size, stop), prefilter)
+					   for lo in range(start, stop, chunk_size)]
+			for future in futures:
+				for reason, count in future.result().items():
+					rejected[reason] = rejected.get(reason, 0)+count
+		out = np.ndarray((len(_result_fields), n), dtype=float, buffer=out_shm.buf).copy()
+	finally:
+		for shm in shms:
+			shm.close()
+			shm.unlink()
+	res = {field: out[k] for k, field in enumerate(_result_fields)}
+	res['index'] = np.arange(start, start+n)
+	if prefilter:
+		res['rejected'] = rejected
+	return res
+
+def records(chunk):
+	"""Yields (design, mass, fos) per design of a chunk, for sinks that want one record at a time."""
+	for design, mass, fos in zip(chunk['design'].tolist(), chunk['mass'].tolist(), chunk['fos'].tolist()):
+		yield design, mass, fos
+
+def csv_sink(f, design_symbols):
+	"""Sink writing one CSV line (index, design..., mass, fos) per design to the open file f."""
+	f.write(','.join(['index']+list(design_symbols)+['mass', 'fos'])+'\n')
+	def write(chunk):
+		table = np.column_stack([chunk['index'], chunk['design'], chunk['mass'], chunk['fos']])
+		f.writelines(','.join([str(int(row[0]))]+[repr(v) for v in row[1:]])+'\n' for row in table.tolist())
+	return write
@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiles
+import stream
+import sweep
+
+example_profile = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles', 'motorcycle.json')
+
+@pytest.fixture
+def fresh_profiles():
+	"""Removes the profiles a test registers, and the engines cached for them, on teardown."""
+	before = set(profiles._names)
+	yield
+	for name in set(profiles._names)-before:
+		if name not in profiles._builtin:
+			profiles.unregister(name)
+		stream._engines.pop(name, None)
+		sweep._worker_spaces.pop(name, None)
+
+@pytest.fixture
+def motorcycle(fresh_profiles):
+	"""The example profile profiles/motorcycle.json, registered for one test."""
+	return profiles.load(example_profile)
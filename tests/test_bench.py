@@ -0,0 +1,14 @@
+from bench import compare
+
+def _results(**values):
+	return {'results': {name: {'value': value, 'better': 'lower'} for name, value in values.items()}}
+
+def test_compare_flags_regressions_beyond_threshold():
+	lines, regressions = compare(_results(a=1.0, b=1.0), _results(a=1.05, b=1.2), threshold=0.1)
+	assert regressions == ['b']
+	assert 'REGRESSION' in lines[2] and 'REGRESSION' not in lines[1]
+
+def test_compare_reports_missing_metrics():
+	lines, regressions = compare(_results(a=1.0, b=1.0), _results(a=1.0), threshold=0.1)
+	assert regressions == ['b']
+	assert lines[2].endswith('MISSING')
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import checkpoint
+from sweep import sampled_space
+from store import result_store
+
+_chunk = 5000
+_stop = 40000
+
+class _crash(Exception):
+	pass
+
+def _crash_after(monkeypatch, chunks):
+	evaluate_chunk = checkpoint.evaluate_chunk
+	calls = [0]
+
+	def crashing(*args):
+		calls[0] += 1
+		if calls[0] > chunks:
+			raise _crash()
+		return evaluate_chunk(*args)
+
+	monkeypatch.setattr(checkpoint, 'evaluate_chunk', crashing)
+
+def _sweep(directory, **kwargs):
+	kwargs.setdefault('interval', 0.0)
+	kwargs.setdefault('stop', _stop)
+	return checkpoint.resumable_sweep('engine', str(directory), chunk_size=_chunk, prefilter=True, **kwargs)
+
+def _assert_same(a, b):
+	assert a['next'] == b['next'] == _stop
+	assert a['evaluated'] == b['evaluated']
+	assert a['rejected'] == b['rejected']
+	assert a['archive'].front() == b['archive'].front()
+	assert a['stats']['mass'].summary() == b['stats']['mass'].summary()
+	ra, rb = result_store(str(a['_dir']/'results')), result_store(str(b['_dir']/'results'))
+	assert len(ra) == len(rb) == a['store_length']
+	for c in ['index']+ra.columns:
+		assert np.array_equal(ra.column(c), rb.column(c))
+
+@pytest.mark.parametrize('space', [None, 'sampled'])
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path, monkeypatch, space):
+	space = sampled_space('engine', 100000, seed=1, block=7000) if space else None
+	ref = _sweep(tmp_path/'a', space=space)
+	ref['_dir'] = tmp_path/'a'
+
+	_sweep(tmp_path/'b', space=space, stop=2*_chunk)             # checkpoint at 2 chunks
+	with monkeypatch.context() as m:
+		# crash with no checkpoint written after 3 more chunks, whose rows are already stored
+		_crash_after(m, 3)
+		with pytest.raises(_crash):
+			checkpoint.resumable_sweep('engine', str(tmp_path/'b'), chunk_size=_chunk, space=space, prefilter=True,
+									   stop=_stop, interval=1e9)
+	state = checkpoint.load_checkpoint(str(tmp_path/'b'))
+	assert state['next'] == 2*_chunk
+	stored = result_store(str(tmp_path/'b'/'results'))
+	assert len(stored) > state['store_length']                   # rows past the checkpoint, dropped on resume
+	stored.close()
+	res = _sweep(tmp_path/'b', space=space)
+	res['_dir'] = tmp_path/'b'
+	assert res['done'] == ref['done']
+	_assert_same(ref, res)
+
+def test_settings_must_match_checkpoint(tmp_path):
+	_sweep(tmp_path, stop=_chunk)
+	with pytest.raises(ValueError):
+		checkpoint.resumable_sweep('engine', str(tmp_path), chunk_size=2*_chunk, prefilter=True)
@@ -0,0 +1,98 @@
+import pickle
+from copy import deepcopy
+import numpy as np
+import pytest
+from global_reqs import _global_reqs, _initial_global_pars
+from engine import engine
+from sweep import catalog_space
+
+@pytest.mark.parametrize('cls', engine.components)
+def test_extra_requirement_keys_are_ignored(cls):
+	reqs = dict(_global_reqs['engine'], ED=3)
+	part = cls(reqs, dict(cls._fixed_pars))
+	base = cls(dict(_global_reqs['engine']), dict(cls._fixed_pars))
+	x = dict(zip(cls.input_symbols, cls.input_catalog['engine'][12]))
+	outside_x = {s: _initial_global_pars['engine'][s] for s in cls.outside_input_symbols}
+	assert part.mass(x, outside_x) == base.mass(x, outside_x)
+	assert part.factor_of_safety(x, outside_x) == base.factor_of_safety(x, outside_x)
+	assert not hasattr(part, 'ED')
+
+def test_engine_accepts_extra_requirement_keys():
+	eng = engine(dict(_global_reqs['engine'], ED=3))
+	design = engine('engine').bounds()[1]
+	assert eng.evaluate(design) == engine('engine').evaluate(design)
+
+def _cases(cls, req):
+	# every catalog row, each with the outside inputs at their lower bound, midpoint and upper bound
+	xs, outs = [], []
+	lo = list(cls.outside_inputs_min[req]) if cls.outside_input_symbols else []
+	hi = list(cls.outside_inputs_max[req]) if cls.outside_input_symbols else []
+	for row in cls.input_catalog[req]:
+		for t in [0.0, 0.5, 1.0]:
+			xs.append(dict(zip(cls.input_symbols, row)))
+			outs.append({s: a+t*(b-a) for s, a, b in zip(cls.outside_input_symbols, lo, hi)})
+	return xs, outs
+
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+@pytest.mark.parametrize('cls', engine.components)
+def test_batch_equals_scalar(cls, req):
+	part = cls(dict(_global_reqs[req]), dict(cls._fixed_pars))
+	xs, outs = _cases(cls, req)
+	x = {s: [v[s] for v in xs] for s in cls.input_symbols}
+	outside_x = {s: [v[s] for v in outs] for s in cls.outside_input_symbols}
+	assert part.mass_batch(x, outside_x).tolist() == [part.mass(a, b) for a, b in zip(xs, outs)]
+	assert part.factor_of_safety_batch(x, outside_x).tolist() == [part.factor_of_safety(a, b) for a, b in zip(xs, outs)]
+
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+@pytest.mark.parametrize('cls', engine.components)
+def test_si_fast_path_equals_dict_methods(cls, req):
+	part = cls(dict(_global_reqs[req]), dict(cls._fixed_pars))
+	for x, outside_x in zip(*_cases(cls, req)):
+		values = [x[s] for s in cls.input_symbols]+[outside_x[s] for s in cls.outside_input_symbols]
+		args = [v/s if s != 1 else v for v, s in zip(values, part._arg_scales)]
+		assert round(part.mass_si(*args), 2) == part.mass(x, outside_x)
+		assert round(part.factor_of_safety_si(*args), 2) == part.factor_of_safety(x, outside_x)
+
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+def test_engine_evaluate_equals_evaluate_batch(req):
+	space = catalog_space(req)
+	designs = np.concatenate([space.designs(i, i+1) for i in range(0, space.size, space.size//500)])
+	res = space.engine.evaluate_batch(designs)
+	for i, design in enumerate(designs.tolist()):
+		one = space.engine.evaluate(design)
+		assert one['mass'] == res['mass'][i]
+		assert one['fos'] == res['fos'][i]
+		assert one['component_mass'] == {team: res['component_mass'][team][i] for team in space.engine.roles}
+
+@pytest.mark.parametrize('cls', engine.components)
+def test_pickle_round_trip(cls):
+	part = cls(dict(_global_reqs['lawn_mower']), dict(cls._fixed_pars))
+	copy = pickle.loads(pickle.dumps(part))
+	for x, outside_x in zip(*_cases(cls, 'lawn_mower')):
+		assert copy.mass(x, outside_x) == part.mass(x, outside_x)
+		assert copy.factor_of_safety(x, outside_x) == part.factor_of_safety(x, outside_x)
+
+@pytest.mark.parametrize('cls', engine.components)
+def test_parameters_are_read_only_once_built(cls):
+	part = cls(dict(_global_reqs['engine']), dict(cls._fixed_pars))
+	key = next(iter(cls._fixed_pars))
+	with pytest.raises(AttributeError):
+		setattr(part, key, 1.0)
+	with pytest.raises(AttributeError):
+		part.N = 1000
+
+@pytest.mark.parametrize('cls', engine.components)
+def test_class_tables_pickle_and_deepcopy_read_only(cls):
+	for table in [cls.input_catalog, cls.inputs_min, cls.outside_inputs_max]:
+		for clone in [pickle.loads(pickle.dumps(table)), deepcopy(table)]:
+			assert clone == table and type(clone) is type(table)
+			with pytest.raises(TypeError):
+				clone['engine'] = ()
+	with pytest.raises(TypeError):
+		cls.inputs_min.update(engine=())
+
+def test_engine_pickles():
+	eng = engine('engine')
+	copy = pickle.loads(pickle.dumps(eng))
+	designs = catalog_space('engine', eng).designs(0, 100)
+	assert copy.evaluate_batch(designs)['mass'].tolist() == eng.evaluate_batch(designs)['mass'].tolist()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from global_reqs import _global_reqs, _initial_global_pars
+from design_state import design_state
+from engine import engine
+
+def test_default_design_starts_from_initial_pars():
+	state = design_state('engine')
+	assert state['D'] == _initial_global_pars['engine']['D']
+	assert state.design[0] == engine('engine').bounds()[0][0]
+	assert state.results() == engine('engine').evaluate(state.design)
+
+def test_unnamed_requirements_need_a_design():
+	state = design_state(_global_reqs['engine'])
+	with pytest.raises(ValueError):
+		state.results()
+	state.update(engine('engine').bounds()[1])
+	assert state.results()['mass'] > 0
+
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+def test_incremental_results_equal_evaluate(req):
+	eng = engine(req)
+	lo, hi = map(np.array, eng.bounds())
+	rng = np.random.default_rng(3)
+	state = design_state(eng, lo)
+	for _ in range(200):
+		symbol = eng.design_symbols[rng.integers(len(lo))]
+		i = eng.design_symbols.index(symbol)
+		state.set(symbol, round(float(lo[i]+(hi[i]-lo[i])*rng.random()), 2))
+		assert state.results() == eng.evaluate(state.design)
+
+def test_only_dependents_are_recomputed():
+	state = design_state('engine')
+	state.results()
+	state.set('D', state['D']+1)
+	assert state.dirty_teams() == ['piston', 'crankshaft', 'conrod', 'pistonpin']
+	state.results()
+	assert state.recomputed == {'piston': 2, 'flywheel': 1, 'crankshaft': 2, 'conrod': 2, 'pistonpin': 2}
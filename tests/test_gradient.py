@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from engine import engine
+
+def _unrounded(eng, k, design):
+	# unrounded (mass, fos) of parts[k], as evaluate_part computes them before rounding
+	idx, scales = eng._routes[k]
+	args = [design[i]/s if s != 1 else design[i] for i, s in zip(idx, scales)]
+	part = eng.parts[k]
+	return part.mass_si(*args), part.factor_of_safety_si(*args)
+
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+def test_gradient_matches_central_differences(req):
+	eng = engine(req)
+	lo, hi = map(np.array, eng.bounds())
+	rng = np.random.default_rng(5)
+	for design in lo+(hi-lo)*rng.uniform(0.1, 0.9, (20, len(lo))):
+		mass, fos = eng.evaluate_gradient(design.tolist())
+		for k, team in enumerate(eng.roles):
+			value = _unrounded(eng, k, design)
+			assert (mass[team][0], fos[team][0]) == pytest.approx(value, rel=1e-12)
+			for i in range(len(design)):
+				h = 1e-6*max(abs(design[i]), 1.0)
+				up, down = design.copy(), design.copy()
+				up[i] += h
+				down[i] -= h
+				diff = [(a-b)/(2*h) for a, b in zip(_unrounded(eng, k, up), _unrounded(eng, k, down))]
+				scale = [abs(v)/max(abs(design[i]), 1.0) for v in value]
+				assert mass[team][1][i] == pytest.approx(diff[0], rel=1e-5, abs=1e-7*scale[0])
+				assert fos[team][1][i] == pytest.approx(diff[1], rel=1e-5, abs=1e-7*scale[1])
+
+def test_gradient_is_zero_for_unread_variables():
+	eng = engine('engine')
+	mass, fos = eng.evaluate_gradient(eng.bounds()[1])
+	piston = eng.roles.index('piston')
+	read = set(eng.parts[piston].input_symbols) | set(eng.parts[piston].outside_input_symbols)
+	for i, s in enumerate(eng.design_symbols):
+		if s not in read:
+			assert mass['piston'][1][i] == 0 and fos['piston'][1][i] == 0
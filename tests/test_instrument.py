@@ -0,0 +1,20 @@
+import instrument
+from engine import engine
+
+def test_reset_while_enabled_and_per_component_times():
+	eng = engine('engine')
+	design = eng.bounds()[1]
+	instrument.enable()
+	try:
+		eng.evaluate(design)
+		instrument.reset()
+		eng.evaluate(design)
+		eng.evaluate(design)
+		stats = instrument.stats()
+	finally:
+		instrument.disable()
+		instrument.reset()
+	assert stats['engine.evaluate']['calls'] == 2
+	for team in eng.roles:
+		assert stats['%s.evaluate_part' % team]['calls'] == 2
+	assert not hasattr(engine.evaluate_part, '__wrapped__')
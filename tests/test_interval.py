@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from engine import engine
+
+def _boxes(eng, rng, n, width):
+	# random sub-boxes of the design bounds, each spanning width of the range per variable
+	lo, hi = map(np.array, eng.bounds())
+	for _ in range(n):
+		a = lo+(hi-lo)*(1-width)*rng.random(len(lo))
+		yield a, a+(hi-lo)*width
+
+@pytest.mark.parametrize('width', [0.02, 0.2, 1.0])
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+def test_bounds_enclose_random_points(req, width):
+	eng = engine(req)
+	rng = np.random.default_rng(7)
+	for box_lo, box_hi in _boxes(eng, rng, 20, width):
+		bounds = eng.evaluate_bounds(box_lo.tolist(), box_hi.tolist())
+		designs = box_lo+(box_hi-box_lo)*rng.random((300, len(box_lo)))
+		designs = np.vstack([designs, box_lo, box_hi])
+		res = eng.evaluate_batch(designs)
+		assert bounds['mass'][0] <= res['mass'].min() and res['mass'].max() <= bounds['mass'][1]
+		assert bounds['fos'][0] <= res['fos'].min() and res['fos'].max() <= bounds['fos'][1]
+		for team in eng.roles:
+			m, f = bounds['component_mass'][team], bounds['component_fos'][team]
+			assert m[0] <= res['component_mass'][team].min() and res['component_mass'][team].max() <= m[1]
+			assert f[0] <= res['component_fos'][team].min() and res['component_fos'][team].max() <= f[1]
+		if bounds['feasible'] is not None:
+			assert (res['fos'] >= eng.fos_req).all() == bounds['feasible']
+			assert (res['fos'] < eng.fos_req).all() != bounds['feasible']
+
+def test_point_box_equals_evaluate():
+	eng = engine('engine')
+	design = eng.bounds()[1]
+	bounds = eng.evaluate_bounds(design, design)
+	res = eng.evaluate(design)
+	assert bounds['mass'][0] <= res['mass'] <= bounds['mass'][1]
+	assert bounds['mass'][1]-bounds['mass'][0] <= 0.05
+	assert bounds['fos'][0] <= res['fos'] <= bounds['fos'][1]
@@ -0,0 +1,41 @@
+import numpy as np
+import loadcase
+import shared
+from global_reqs import _global_reqs
+from engine import engine
+from sweep import catalog_space
+
+def test_one_gas_load_per_scalar_evaluation():
+	eng = engine('engine')
+	design = list(eng.bounds()[1])
+	design[eng.design_symbols.index('D')] = 97.13          # a bore no other test evaluates
+	before = loadcase.cache_info()
+	eng.evaluate(design)
+	after = loadcase.cache_info()
+	assert after.misses-before.misses == 1
+	assert after.hits-before.hits == 2*sum(eng._takes_load)-1      # mass and fos of each part
+
+def test_one_gas_load_per_batch(monkeypatch):
+	calls = []
+	kernel = loadcase.gas_load_kernel
+	def counting(N, T, LDr):
+		gas_load = kernel(N, T, LDr)
+		def counted(D):
+			calls.append(D)
+			return gas_load(D)
+		return counted
+	monkeypatch.setattr(loadcase, 'gas_load_kernel', counting)
+	shared.cache_clear()                                # build the parts with the counting kernel
+	try:
+		eng = engine('engine')
+		eng.evaluate_batch(catalog_space('engine', eng).designs(0, 1000))
+	finally:
+		shared.cache_clear()
+	assert len(calls) == 1
+
+def test_array_kernel_equals_cached_scalars():
+	reqs = _global_reqs['lawn_mower']
+	load_case = loadcase.load_case_kernel(reqs['N'], reqs['T'], reqs['LDr'])
+	D = np.linspace(0.04, 0.08, 41)
+	Fl, p_max, r = load_case(D)
+	assert [tuple(v) for v in zip(Fl.tolist(), p_max.tolist(), r.tolist())] == [load_case(d) for d in D.tolist()]
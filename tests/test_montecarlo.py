@@ -0,0 +1,30 @@
+import numpy as np
+from montecarlo import running_stats
+
+def test_running_stats_match_numpy():
+	rng = np.random.default_rng(1)
+	a = np.round(rng.normal(10, 2, 10000), 2)
+	stats = running_stats()
+	for block in np.array_split(a, 7):
+		stats.update(block)
+	assert stats.n == len(a) and stats.nonfinite == 0
+	assert np.isclose(stats.mean, a.mean()) and np.isclose(stats.var, a.var(ddof=1))
+	assert stats.quantile(0.5) == np.sort(a)[int(np.ceil(0.5*len(a)))-1]
+	assert stats.fraction_below(10) == np.count_nonzero(a < 10)/len(a)
+
+def test_running_stats_skip_non_finite_values():
+	stats = running_stats()
+	stats.update([1.0, 2.0, np.nan, np.inf])
+	stats.update([3.0, -np.inf])
+	summary = stats.summary(quantiles=(0.5, 1.0))
+	assert summary['n'] == 3 and summary['nonfinite'] == 3
+	assert summary['mean'] == 2.0 and summary['std'] == 1.0
+	assert summary['min'] == 1.0 and summary['max'] == 3.0
+	assert summary['quantiles'] == {0.5: 2.0, 1.0: 3.0}
+	assert stats.fraction_below(3.0) == 2/3
+
+def test_running_stats_all_non_finite():
+	stats = running_stats()
+	stats.update([np.nan, np.nan])
+	assert stats.n == 0 and stats.nonfinite == 2
+	assert np.isnan(stats.quantile(0.5)) and stats.fraction_below(1.0) == 0.0
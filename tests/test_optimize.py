@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from global_reqs import _global_reqs
+from engine import engine
+from optimize import minimize_mass
+from sweep import sampled_space
+
+@pytest.mark.parametrize('start', ['middle', 'lower', 'upper'])
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+def test_optimum_is_feasible_and_beats_sampling(req, start):
+	eng = engine(req)
+	lo, hi = eng.bounds()
+	x0 = {'middle': None, 'lower': lo, 'upper': hi}[start]
+	res = minimize_mass(req, x0=x0)
+	design = eng.design(res['design'])
+	assert all(a <= v <= b for a, v, b in zip(lo, design, hi))
+	assert res['feasible'] and res['fos'] >= _global_reqs[req]['fos']
+	assert eng.evaluate(design)['mass'] == res['mass']
+	space = sampled_space(req, 20000)
+	sampled = space.engine.evaluate_batch(space.designs(0, space.size))
+	assert res['mass'] < sampled['mass'][sampled['feasible']].min()
+
+def test_constraints_are_active_at_the_optimum():
+	# a lighter design nearby along the negative mass gradient must violate the fos requirement
+	res = minimize_mass('engine')
+	eng = engine('engine')
+	design = np.array(eng.design(res['design']))
+	mass, fos = eng.evaluate_gradient(design.tolist())
+	step = -sum(g for v, g in mass.values())
+	lo, hi = map(np.array, eng.bounds())
+	lighter = np.clip(design+0.05*step/np.abs(step).max(), lo, hi)
+	trial = eng.evaluate(lighter.tolist())
+	assert trial['mass'] >= res['mass'] or not trial['feasible']
+
+def test_evaluation_budget_is_kept():
+	assert minimize_mass('engine', max_evals=20)['evaluations'] <= 20
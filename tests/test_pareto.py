@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from pareto import pareto_archive
+
+def _brute_front(mass, fos, fos_min=None):
+	# distinct (mass, fos) pairs that no other pair matches or beats in both objectives
+	points = {(m, f) for m, f in zip(mass, fos) if fos_min is None or f >= fos_min}
+	return sorted(p for p in points if not any(q != p and q[0] <= p[0] and q[1] >= p[1] for q in points))
+
+def _points(seed, n=3000):
+	rng = np.random.default_rng(seed)
+	mass = np.round(rng.uniform(10, 60, n), 1)           # coarse values, so ties are common
+	fos = np.round(mass/20+rng.normal(0, 0.5, n), 1)
+	return mass.tolist(), fos.tolist()
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('fos_min', [None, 1.5])
+def test_add_matches_brute_force(seed, fos_min):
+	mass, fos = _points(seed)
+	archive = pareto_archive(fos_min)
+	for i, (m, f) in enumerate(zip(mass, fos)):
+		archive.add(m, f, i)
+	front = archive.front()
+	assert [(m, f) for m, f, _ in front] == _brute_front(mass, fos, fos_min)
+	assert all((mass[i], fos[i]) == (m, f) for m, f, i in front)
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('fos_min', [None, 1.5])
+def test_add_batch_matches_brute_force(seed, fos_min):
+	mass, fos = _points(seed)
+	designs = np.arange(len(mass)).reshape(-1, 1)
+	archive = pareto_archive(fos_min)
+	for lo in range(0, len(mass), 700):
+		archive.add_batch(mass[lo:lo+700], fos[lo:lo+700], designs[lo:lo+700])
+	front = archive.front()
+	assert [(m, f) for m, f, _ in front] == _brute_front(mass, fos, fos_min)
+	assert all((mass[d[0]], fos[d[0]]) == (m, f) for m, f, d in front)
@@ -0,0 +1,78 @@
+import json
+import pytest
+import profiles
+from global_reqs import _global_reqs
+from engine import engine
+from scoring import scorer
+from server import evaluation_server
+from sweep import catalog_space
+from conftest import example_profile
+
+pytestmark = pytest.mark.usefixtures('fresh_profiles')
+
+def _data(name):
+	with open(example_profile) as f:
+		data = json.load(f)
+	data['name'] = name
+	return data
+
+def test_load_example():
+	assert profiles.load(example_profile) == 'motorcycle'
+	assert 'motorcycle' in profiles.names()
+	eng = engine('motorcycle')
+	assert len(catalog_space('motorcycle', eng).designs(0, 10)) == 10
+	assert eng.evaluate(eng.bounds()[1])['mass'] > 0
+	assert scorer('motorcycle').score(10.0, 2.5)
+	assert 'motorcycle' in evaluation_server().batchers
+
+def test_default_catalogs_match_builtin_layout():
+	data = profiles.profile_data('engine')
+	for team, rows in data['catalogs'].items():
+		bounds = data['inputs'][team]
+		assert rows == profiles.grid_catalog(bounds['min'], bounds['max'])
+
+def test_derived_constants_shared_by_hash(motorcycle):
+	record = profiles.register(_data('motorcycle_copy'))
+	assert record is profiles.get('motorcycle')
+	assert record['derived']['del_E'] == pytest.approx(0.066*(50e3/0.70)*60/9000)
+
+def test_same_name_different_data_needs_replace():
+	data = _data('motorcycle_variant')
+	profiles.register(data)
+	data['requirements']['N'] = 9500
+	with pytest.raises(ValueError):
+		profiles.register(data)
+	profiles.register(data, replace=True)
+	assert _global_reqs['motorcycle_variant']['N'] == 9500
+
+def test_unregister_removes_every_table(motorcycle):
+	profiles.unregister(motorcycle)
+	assert motorcycle not in profiles.names() and motorcycle not in _global_reqs
+	assert all(motorcycle not in getattr(cls, table) for cls in profiles.components for table in profiles._tables)
+	with pytest.raises(ValueError):
+		profiles.unregister('engine')
+
+@pytest.mark.parametrize('field, value, message', [
+	('mass_scale', None, 'mass_scale: missing'),
+	('name', 'engine', 'built-in'),
+	('requirements', {'N': 9000}, 'requirements: expected exactly'),
+	('initial_pars', {'D': 200.0, 'c': 220.0, 't_f': 40.0, 'ds': 45.0}, 'initial_pars.D'),
+])
+def test_invalid_profiles_are_rejected(field, value, message):
+	data = _data('broken')
+	if value is None:
+		del data[field]
+	else:
+		data[field] = value
+	with pytest.raises(ValueError) as e:
+		profiles.register(data)
+	assert message in str(e.value)
+	assert 'broken' not in _global_reqs
+
+def test_every_problem_is_reported():
+	data = _data('broken')
+	data['inputs']['piston']['min'] = [3.0]
+	del data['inputs']['conrod']
+	problems = profiles.validate(data)
+	assert any(p.startswith('inputs.piston.min') for p in problems)
+	assert 'inputs: missing conrod' in problems
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from global_reqs import _global_reqs, _mass_scale, _fos_scale
+from scoring import scorer
+
+def _reference_mass_rating(req, mass):
+	# the rating whose interval holds mass, else the worse neighbour of the gap it falls in
+	for rating, (lo, hi) in sorted(_mass_scale[req].items(), reverse=True):
+		if mass <= hi:
+			return rating
+	return 0
+
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+def test_mass_rating_at_every_boundary(req):
+	s = scorer(req)
+	values = [v+d for lo, hi in _mass_scale[req].values() for v in (lo, hi) for d in (-0.0005, 0.0, 0.0005)]
+	assert s.mass_rating(values).tolist() == [_reference_mass_rating(req, v) for v in values]
+	assert s.mass_rating([0.0, 1e6]).tolist() == [4, 0]
+
+def test_fos_rating_at_every_boundary():
+	s = scorer('engine')
+	assert s.fos_rating([1.499, 1.4995, 1.5, 1.749, 1.7495, 1.75, 1.999, 1.9995, 2.0]).tolist() == [0, 0, 1, 1, 1, 2, 2, 2, 4]
+	assert s.fos_rating([0.0, -1.0, 200.0, 1e9]).tolist() == [0, 0, 4, 4]
+	assert 3 not in s.fos_rating(np.linspace(0, 250, 10001)).tolist()
+	assert sorted(_fos_scale) == [0, 1, 2, 4]
+
+def test_nan_is_unrated_and_earns_nothing():
+	s = scorer('engine')
+	score = s.score([np.nan, 30.0], [3.0, np.nan])
+	assert score['mass_rating'].tolist() == [-1, 4] and score['fos_rating'].tolist() == [4, -1]
+	assert score['payoff'].tolist() == [0, 0]
+	assert s.label(score['mass_rating']).tolist() == ['', 'Excellent']
+
+def test_payoff_needs_the_fos_requirement():
+	s = scorer('lawn_mower')
+	fos_req = _global_reqs['lawn_mower']['fos']
+	assert s.payoff([2.0, 2.0, 2.0], [fos_req, np.nextafter(fos_req, 0), fos_req+1]).tolist() == [20, 0, 20]
+	assert s.payoff([3.5, 3.5005], [fos_req, fos_req]).tolist() == [12, 10]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from engine import engine
+from sweep import sweep, parallel_sweep, sampled_space
+
+def _wide_designs(eng, n, seed=0):
+	# designs from a box well beyond the teams' bounds, where the geometric constraints bite
+	lo, hi = map(np.array, eng.bounds())
+	return 0.2*lo+(3*hi-0.2*lo)*np.random.default_rng(seed).random((n, len(lo)))
+
+@pytest.mark.parametrize('req', ['engine', 'lawn_mower'])
+def test_rejection_counts_match_scalar_checks(req):
+	eng = engine(req)
+	designs = _wide_designs(eng, 3000)
+	valid, rejected = eng.screen(designs)
+	expected = dict.fromkeys(rejected, 0)
+	ok = []
+	for design in designs.tolist():
+		bad = False
+		for part, (idx, scales) in zip(eng.parts, eng._routes):
+			if part.constraints:
+				args = [design[i]/s if s != 1 else design[i] for i, s in zip(idx, scales)]
+				for reason, violated in part._violations(*args).items():
+					expected[reason] += bool(violated)
+					bad = bad or bool(violated)
+		ok.append(not bad)
+	assert rejected == expected
+	assert valid.tolist() == ok
+	assert sorted(rejected) == sorted(c for part in eng.parts for c in part.constraints)
+	assert sum(rejected.values()) >= len(designs)-valid.sum() > 0
+
+def test_designs_within_bounds_pass():
+	eng = engine('engine')
+	valid, rejected = eng.screen(sampled_space('engine', 5000).designs(0, 5000))
+	assert valid.all() and not any(rejected.values())
+
+def test_prefiltered_sweeps_report_the_same_rejections():
+	eng = engine('engine')
+	designs = _wide_designs(eng, 4000, seed=1)
+	valid, rejected = eng.screen(designs)
+	chunks = []
+	space = sampled_space('engine', len(designs))
+	space.designs = lambda start, stop: designs[start:stop]
+	sweep('engine', chunks.append, chunk_size=1000, prefilter=True, space=space)
+	totals = {reason: sum(c['rejected'][reason] for c in chunks) for reason in rejected}
+	assert totals == rejected
+	assert np.concatenate([c['index'] for c in chunks]).tolist() == np.flatnonzero(valid).tolist()
+	res = parallel_sweep('engine', workers=2, chunk_size=1000, designs=designs, prefilter=True)
+	assert res['rejected'] == rejected
+	assert np.isnan(res['mass'][~valid]).all() and not np.isnan(res['mass'][valid]).any()
@@ -0,0 +1,38 @@
+import numpy as np
+from sensitivity import sobol, _indices
+
+def test_indices_of_an_additive_function():
+	# f = sum a_i x_i with x uniform: S1_i = ST_i = a_i**2/sum(a**2)
+	a = np.array([1.0, 2.0, 0.0, 3.0])
+	rng = np.random.default_rng(0)
+	A = rng.random((100000, len(a)))
+	B = rng.random((100000, len(a)))
+	AB = np.stack([np.where(np.arange(len(a)) == i, B, A) for i in range(len(a))])
+	S1, ST = _indices(A@a, B@a, AB@a)
+	expected = a*a/np.sum(a*a)
+	assert np.allclose(S1, expected, atol=0.02) and np.allclose(ST, expected, atol=0.02)
+
+def test_indices_of_an_interaction():
+	# f = x0*x1 with x uniform on [-1, 1]: no first-order effect, all of it in the total indices
+	rng = np.random.default_rng(1)
+	A = rng.uniform(-1, 1, (100000, 3))
+	B = rng.uniform(-1, 1, (100000, 3))
+	AB = np.stack([np.where(np.arange(3) == i, B, A) for i in range(3)])
+	S1, ST = _indices(A[:, 0]*A[:, 1], B[:, 0]*B[:, 1], AB[..., 0]*AB[..., 1])
+	assert np.allclose(S1, 0, atol=0.02)
+	assert np.allclose(ST, [1, 1, 0], atol=0.02)
+
+def test_sobol_of_the_engine():
+	res = sobol('lawn_mower', samples=20000, bootstrap=50)
+	assert res['evaluations'] == 20000*12
+	for name in ['mass', 'fos']:
+		indices = res[name]
+		assert sum(v['S1'] for v in indices.values()) <= 1.05
+		for v in indices.values():
+			assert v['ST'] >= -0.01 and v['S1'] <= v['ST']+0.05
+			assert v['S1_conf'][0] <= v['S1'] <= v['S1_conf'][1]
+		assert max(indices, key=lambda s: indices[s]['ST']) == 'D'      # the bore drives both
+	assert sobol('lawn_mower', samples=20000, bootstrap=50) == res
+
+def test_parallel_equals_serial():
+	assert sobol('engine', samples=500, bootstrap=10, workers=2, chunk_size=1000) == sobol('engine', samples=500, bootstrap=10)
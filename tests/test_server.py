@@ -0,0 +1,52 @@
+import json
+import asyncio
+from server import evaluation_server
+from engine import engine
+
+_design = [8.88, 97.5, 31.5, 50.0, 225.0, 40.0, 10.0, 4.5, 0.8, 0.55]
+
+class _writer(object):
+	# records what _respond writes and whether it waited for the transport after each reply
+	def __init__(self):
+		self.lines = []
+		self.drained = 0
+
+	def write(self, data):
+		self.lines.append(json.loads(data))
+
+	async def drain(self):
+		self.drained += 1
+
+def test_each_reply_is_drained():
+	async def run():
+		server = evaluation_server()
+		writer = _writer()
+		await asyncio.gather(*[server._respond(json.dumps({'id': i, 'req': 'engine', 'design': _design}), writer) for i in range(3)])
+		await server._respond('not json', writer)
+		return writer
+	writer = asyncio.run(run())
+	assert writer.drained == len(writer.lines) == 4
+	assert sorted(line['id'] for line in writer.lines[:3]) == [0, 1, 2]
+	assert writer.lines[0]['mass'] == engine('engine').evaluate(_design)['mass']
+	assert writer.lines[3]['error'].startswith('JSONDecodeError')
+
+def test_round_trip_over_tcp():
+	async def run():
+		server = evaluation_server()
+		tcp = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+		port = tcp.sockets[0].getsockname()[1]
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		symbols = engine('engine').design_symbols
+		writer.write((json.dumps({'id': 1, 'req': 'engine', 'design': dict(zip(symbols, _design)), 'team': 'piston'})+'\n').encode())
+		writer.write(b'{"id": 2, "req": "lawnmower", "design": []}\n')
+		writer.write_eof()
+		replies = [json.loads(line) async for line in reader]
+		writer.close()
+		tcp.close()
+		await tcp.wait_closed()
+		return {reply['id']: reply for reply in replies}
+	replies = asyncio.run(run())
+	expected = engine('engine').evaluate(_design)
+	assert replies[1]['team'] == 'piston'
+	assert (replies[1]['mass'], replies[1]['fos']) == (expected['mass'], expected['fos'])
+	assert 'unknown requirement set' in replies[2]['error']
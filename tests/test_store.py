@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from engine import engine
+from sweep import sweep, catalog_space
+from store import result_store, engine_columns
+
+def _chunk(columns, lo, n):
+	data = {'index': np.arange(lo, lo+n)}
+	for k, c in enumerate(columns):
+		data[c] = np.arange(lo, lo+n)+k/10
+	return data
+
+def test_round_trip(tmp_path):
+	eng = engine('engine')
+	store = result_store(str(tmp_path/'s'), engine_columns(eng))
+	n = sweep('engine', store.add_chunk, chunk_size=1000, stop=2500)
+	store.close()
+
+	store = result_store(str(tmp_path/'s'))
+	assert len(store) == n == 2500
+	assert store.column('index').tolist() == list(range(2500))
+	res = eng.evaluate_batch(catalog_space('engine', eng).designs(0, 2500))
+	assert np.array_equal(store.column('mass'), res['mass'])
+	assert np.array_equal(store.column('fos.crankshaft'), res['component_fos']['crankshaft'])
+
+def test_query_matches_scan(tmp_path):
+	eng = engine('engine')
+	store = result_store(str(tmp_path/'s'), engine_columns(eng))
+	sweep('engine', store.add_chunk, chunk_size=1000, stop=3000)
+	store.build_index('fos')
+	sweep('engine', store.add_chunk, chunk_size=1000, start=3000, stop=4000)     # not covered by the index
+	rows = store.query(fos=(2.0, None), mass=(None, 60))
+	fos, mass = store.column('fos'), store.column('mass')
+	assert sorted(rows) == np.flatnonzero((fos >= 2.0) & (mass <= 60)).tolist()
+
+@pytest.mark.parametrize('bad', ['missing', 'shape'])
+def test_failed_append_leaves_store_unchanged(tmp_path, bad):
+	columns = ['a', 'b', 'c']
+	store = result_store(str(tmp_path/'s'), columns)
+	store.append(_chunk(columns, 0, 3))
+	chunk = _chunk(columns, 100, 3)
+	if bad == 'missing':
+		del chunk['c']
+	else:
+		chunk['c'] = chunk['c'][:2]
+	with pytest.raises(ValueError):
+		store.append(chunk)
+	store.append(_chunk(columns, 3, 3))
+	store.close()
+
+	store = result_store(str(tmp_path/'s'))
+	assert len(store) == 6
+	assert store.column('index').tolist() == list(range(6))
+	for k, c in enumerate(columns):
+		assert np.allclose(store.column(c), np.arange(6)+k/10)
+	assert store.rows([4], ['index', 'b'])['index'].tolist() == [4]
+
+def test_truncate_on_reopen_drops_partial_chunk(tmp_path):
+	columns = ['a']
+	store = result_store(str(tmp_path/'s'), columns)
+	store.append(_chunk(columns, 0, 4))
+	store.close()
+	with open(str(tmp_path/'s'/'a.bin'), 'ab') as f:      # a chunk cut off before meta.json was written
+		f.write(np.zeros(2).tobytes())
+	store = result_store(str(tmp_path/'s'))
+	assert len(store) == 4
+	assert store.column('a').tolist() == (np.arange(4)+0.0).tolist()
@@ -0,0 +1,75 @@
+import io
+import csv
+import json
+import pytest
+from engine import engine
+from sweep import catalog_space
+import stream
+
+def _designs(n=5):
+	eng = engine('engine')
+	return eng, catalog_space('engine', eng).designs(0, n)
+
+def _csv_input(eng, designs, ids):
+	lines = ['id,note,'+','.join(eng.design_symbols)]
+	for row_id, design in zip(ids, designs):
+		lines.append('%s,"a, quoted note",%s' % (row_id, ','.join(repr(float(v)) for v in design)))
+	return '\n'.join(lines)+'\n'
+
+def test_csv_matches_evaluate_batch():
+	eng, designs = _designs()
+	fout = io.StringIO()
+	n = stream.run('engine', io.StringIO(_csv_input(eng, designs, range(5))), fout, chunk_size=2)
+	assert n == 5
+	rows = list(csv.DictReader(io.StringIO(fout.getvalue())))
+	res = eng.evaluate_batch(designs)
+	assert [r['id'] for r in rows] == ['0', '1', '2', '3', '4']
+	assert [float(r['mass']) for r in rows] == res['mass'].tolist()
+	assert [float(r['fos.conrod']) for r in rows] == res['component_fos']['conrod'].tolist()
+	assert all(r['error'] == '' for r in rows)
+
+def test_csv_error_rows_keep_their_id():
+	eng, designs = _designs(2)
+	text = _csv_input(eng, designs, ['a', 'b'])
+	text = text.replace('b,"a, quoted note",', 'b,"a, quoted note",bad,', 1)+'c,short\n'
+	fout = io.StringIO()
+	stream.run('engine', io.StringIO(text), fout)
+	rows = list(csv.DictReader(io.StringIO(fout.getvalue())))
+	assert [r['id'] for r in rows] == ['a', 'b', 'c']
+	assert rows[0]['error'] == ''
+	assert rows[1]['error'].startswith('ValueError') and rows[1]['mass'] == ''
+	assert rows[2]['error'].startswith('ValueError')
+
+def test_jsonl_ids_and_errors():
+	eng, designs = _designs(1)
+	lines = [
+		json.dumps({'id': 1, 'design': designs[0].tolist()}),
+		json.dumps({'id': 2, 'design': [1, 2]}),
+		'not json',
+		json.dumps(dict(zip(eng.design_symbols, designs[0].tolist()), id='x')),
+	]
+	fout = io.StringIO()
+	stream.run('engine', io.StringIO('\n'.join(lines)+'\n'), fout)
+	out = [json.loads(line) for line in fout.getvalue().splitlines()]
+	assert [o.get('id') for o in out] == [1, 2, None, 'x']
+	assert 'error' in out[1] and 'error' in out[2]
+	assert out[0]['mass'] == out[3]['mass'] == eng.evaluate(designs[0].tolist())['mass']
+
+def test_jsonl_output_is_standard_json():
+	eng, designs = _designs(1)
+	design = designs[0].tolist()
+	design[1] = float('nan')                            # bore: every D-dependent result is NaN
+	fout = io.StringIO()
+	stream.run('engine', io.StringIO(json.dumps({'id': 1, 'design': design})+'\n'), fout)
+	text = fout.getvalue()
+	assert 'NaN' not in text and 'Infinity' not in text
+	out = json.loads(text, parse_constant=lambda name: pytest.fail('non-standard token %s' % name))
+	assert out['design'][1] is None and out['mass'] is None
+
+def test_workers_match_single_process():
+	eng, designs = _designs(7)
+	text = _csv_input(eng, designs, range(7))
+	single, pooled = io.StringIO(), io.StringIO()
+	stream.run('engine', io.StringIO(text), single, chunk_size=3)
+	stream.run('engine', io.StringIO(text), pooled, chunk_size=3, workers=2)
+	assert single.getvalue() == pooled.getvalue()
@@ -0,0 +1,49 @@
+import itertools
+import numpy as np
+import pytest
+from global_reqs import _global_reqs
+from engine import engine
+from surrogate import surrogate, _evaluate
+
+def _part(cls, req='engine'):
+	return cls(dict(_global_reqs[req]), dict(cls._fixed_pars))
+
+@pytest.mark.parametrize('cls', engine.components)
+def test_grid_nodes_are_exact(cls):
+	s = surrogate.build(_part(cls), 'engine', points=5, samples=100)
+	nodes = [np.array(p) for p in zip(*itertools.product(*s.axes))]
+	exact = _evaluate(_part(cls), nodes)
+	for name in ['mass', 'fos']:
+		assert np.allclose(s.interpolate(name, nodes), exact[name], rtol=1e-12, atol=0)
+
+@pytest.mark.parametrize('cls', engine.components)
+def test_max_error_bounds_fresh_samples(cls):
+	part = _part(cls, 'lawn_mower')
+	s = surrogate.build(part, 'lawn_mower', points=9, samples=5000)
+	rng = np.random.default_rng(11)
+	lo = [a[0] for a in s.axes]
+	hi = [a[-1] for a in s.axes]
+	sample = [rng.uniform(a, b, 500) for a, b in zip(lo, hi)]
+	exact = _evaluate(part, sample)
+	for name in ['mass', 'fos']:
+		err = np.abs(s.interpolate(name, sample)-exact[name]).max()
+		assert err <= 1.5*s.max_error[name]+1e-12
+
+def test_finer_grids_are_more_accurate():
+	part = _part(engine.components[1])
+	coarse = surrogate.build(part, 'engine', points=5)
+	fine = surrogate.build(part, 'engine', points=17)
+	assert fine.max_error['mass'] < coarse.max_error['mass']
+	assert fine.max_error['fos'] < coarse.max_error['fos']
+
+def test_save_and_load(tmp_path):
+	part = _part(engine.components[3])
+	s = surrogate.build(part, 'engine', points=7)
+	s.save(str(tmp_path))
+	loaded = surrogate.load(str(tmp_path))
+	assert isinstance(loaded.tables['mass'], np.memmap)
+	assert loaded.max_error == s.max_error and loaded.symbols == s.symbols
+	x = dict(zip(part.input_symbols, part.input_catalog['engine'][-1]))
+	outside_x = {sym: (a+b)/2 for sym, a, b in zip(part.outside_input_symbols, part.outside_inputs_min['engine'], part.outside_inputs_max['engine'])}
+	assert loaded.mass(x, outside_x) == s.mass(x, outside_x)
+	assert loaded.factor_of_safety(x, outside_x) == s.factor_of_safety(x, outside_x)
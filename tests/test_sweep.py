@@ -0,0 +1,47 @@
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import io
+import itertools
+import numpy as np
+import sweep
+from engine import engine
+
+def test_designs_follow_the_mixed_radix_order():
+	space = sweep.catalog_space('lawn_mower')
+	rows = itertools.product(*[range(len(cat)) for cat in space.catalogs])
+	for i, row in zip(range(2000), rows):
+		expected = np.concatenate([cat[r] for cat, r in zip(space.catalogs, row)])
+		assert space.designs(i, i+1)[0].tolist() == expected.tolist()
+	assert space.size == np.prod([len(cat) for cat in space.catalogs])
+
+def test_chunked_sweep_equals_one_batch():
+	chunks = []
+	n = sweep.sweep('engine', chunks.append, chunk_size=700, start=300, stop=5300)
+	assert n == 5000 and [c['index'][0] for c in chunks] == list(range(300, 5300, 700))
+	space = sweep.catalog_space('engine')
+	whole = space.engine.evaluate_batch(space.designs(300, 5300))
+	assert np.concatenate([c['mass'] for c in chunks]).tolist() == whole['mass'].tolist()
+	assert np.concatenate([c['fos'] for c in chunks]).tolist() == whole['fos'].tolist()
+
+def test_sampled_space_is_independent_of_chunking():
+	space = sweep.sampled_space('engine', 1000, seed=4, block=64)
+	lo, hi = engine('engine').bounds()
+	whole = space.designs(0, 1000)
+	assert np.concatenate([d for _, d in space.chunks(37)]).tolist() == whole.tolist()
+	assert (whole >= lo).all() and (whole <= hi).all()
+
+def test_csv_sink_writes_one_line_per_design():
+	f = io.StringIO()
+	space = sweep.catalog_space('lawn_mower')
+	sweep.sweep('lawn_mower', sweep.csv_sink(f, space.design_symbols), chunk_size=50, stop=120)
+	lines = f.getvalue().splitlines()
+	assert len(lines) == 121 and lines[0].split(',') == ['index']+list(space.design_symbols)+['mass', 'fos']
+	assert lines[-1].startswith('119,')
+
+def test_parallel_sweep_registers_profile_in_spawned_workers(motorcycle, monkeypatch):
+	monkeypatch.setattr(sweep, 'ProcessPoolExecutor', partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn')))
+	space = sweep.catalog_space(motorcycle)
+	res = sweep.parallel_sweep(motorcycle, workers=2, chunk_size=500, stop=2000)
+	serial = space.engine.evaluate_batch(space.designs(0, 2000))
+	assert np.array_equal(res['mass'], serial['mass']) and np.array_equal(res['fos'], serial['fos'])